@@ -1,16 +1,27 @@
+from functools import partial
+
 import numpy as np
-from scipy import signal
-from scipy.fft import fft, fftfreq
-from scipy.stats import entropy, kurtosis, skew
 
-from utils.filter_validation import FilterValidator
+from analyzer.connectivity import ConnectivityEngine
+from analyzer.features import WindowFeatureEngine
+from analyzer.moments import MomentAccumulator
+from analyzer.spikes import detect_spikes_multichannel
+from utils.filter_design import filter_design_cache
+from utils.lazy_import import lazy_import
+from utils.parallel import default_executor
 from utils.performance import PerformanceMonitor
 
+signal = lazy_import('scipy.signal')
+sp_fft = lazy_import('scipy.fft')
+stats = lazy_import('scipy.stats')
+
 
 class EEGAnalyzer:
 
-    def __init__(self):
+    def __init__(self, executor=None):
         self.performance_monitor = PerformanceMonitor()
+        # Исполнитель независимых задач анализа (serial / thread / process)
+        self.executor = executor or default_executor
 
         # Определение ритмов ЭЭГ
         self.rhythm_bands = {
@@ -180,8 +191,8 @@ class EEGAnalyzer:
 
             # БПФ
             n = len(signal_data)
-            fft_result = fft(signal_data)
-            frequencies = fftfreq(n, 1 / sampling_rate)
+            fft_result = sp_fft.fft(signal_data)
+            frequencies = sp_fft.fftfreq(n, 1 / sampling_rate)
 
             # Отслеживаем память FFT результатов
             self.performance_monitor.track_eeg_data("fft_result", fft_result)
@@ -246,9 +257,16 @@ class EEGAnalyzer:
                 'spike_rate': len(peaks) / (len(signal_data) / sampling_rate)
             }
 
-    def analyze_rhythms(self, data, sampling_rate, channel_idx=0):
+    def detect_spikes_all_channels(self, data, sampling_rate, threshold=3.0):
+        with self.performance_monitor.measure("Детекция спайков (все каналы)"):
+            # Порог по медиане и MAD каждого канала, без цикла по каналам
+            return detect_spikes_multichannel(data, sampling_rate, threshold)
+
+    def analyze_rhythms(self, data, sampling_rate, channel_idx=0, spectral_result=None):
         with self.performance_monitor.measure_with_memory("Анализ ритмов"):
-            spectral_result = self.calculate_spectral_power(data, sampling_rate, channel_idx)
+            # Готовый спектр канала (например, из графа вычислений) не пересчитывается
+            if spectral_result is None:
+                spectral_result = self.calculate_spectral_power(data, sampling_rate, channel_idx)
 
             if data.ndim == 2:
                 signal_data = data[channel_idx]
@@ -258,14 +276,15 @@ class EEGAnalyzer:
             # Отслеживаем память исходного сигнала
             self.performance_monitor.track_eeg_data("rhythm_analysis_signal", signal_data)
 
-            # Анализ для каждого ритма
-            rhythm_analysis = {}
-            for rhythm, (low_freq, high_freq) in self.rhythm_bands.items():
-                # Фильтрация ритма
-                filtered_signal = self.bandpass_filter_signal(
-                    signal_data, sampling_rate, low_freq, high_freq
-                )
+            # Фильтрация и характеристики ритмов независимы - раздаем их исполнителю,
+            # результаты приходят в порядке self.rhythm_bands
+            band_results = self.executor.map(
+                partial(self._rhythm_band_features, signal_data, sampling_rate),
+                self.rhythm_bands.values()
+            )
 
+            rhythm_analysis = {}
+            for rhythm, (filtered_signal, mean_amplitude, dominant_frequency) in zip(self.rhythm_bands, band_results):
                 # Отслеживаем память отфильтрованного сигнала
                 self.performance_monitor.track_eeg_data(f"filtered_{rhythm}", filtered_signal)
 
@@ -273,13 +292,10 @@ class EEGAnalyzer:
                 rhythm_analysis[rhythm] = {
                     'power': spectral_result['rhythm_power'][rhythm],
                     'relative_power': spectral_result['relative_power'][rhythm],
-                    'mean_amplitude': np.mean(np.abs(filtered_signal)),
-                    'dominant_frequency': self.find_dominant_frequency(
-                        filtered_signal, sampling_rate, low_freq, high_freq
-                    )
+                    'mean_amplitude': mean_amplitude,
+                    'dominant_frequency': dominant_frequency
                 }
 
-
             return {
                 'rhythm_analysis': rhythm_analysis,
                 'dominant_rhythm': max(spectral_result['relative_power'].items(),
@@ -295,32 +311,35 @@ class EEGAnalyzer:
                 'total_power': spectral_result['total_power']
             }
 
-    def bandpass_filter_signal(self, signal_data, sampling_rate, low_freq, high_freq):
-        # Используем валидатор для проверки и коррекции параметров
-        validator = FilterValidator()
-        corrected_low, corrected_high, warnings = validator.validate_bandpass_params(
-            low_freq, high_freq, sampling_rate
-        )
+    @staticmethod
+    def _rhythm_band_features(signal_data, sampling_rate, band):
+        low_freq, high_freq = band
+        filtered_signal = EEGAnalyzer._bandpass_filter(signal_data, sampling_rate, low_freq, high_freq)
+        dominant_frequency = EEGAnalyzer._dominant_frequency(filtered_signal, sampling_rate, low_freq, high_freq)
 
-        if warnings:
-            print(f"Коррекция параметров фильтра для ритма {low_freq}-{high_freq} Гц:")
-            for warning in warnings:
-                print(f"   • {warning}")
+        return filtered_signal, np.mean(np.abs(filtered_signal)), dominant_frequency
 
-        nyquist = sampling_rate / 2
-        low = corrected_low / nyquist
-        high = corrected_high / nyquist
+    def bandpass_filter_signal(self, signal_data, sampling_rate, low_freq, high_freq):
+        return self._bandpass_filter(signal_data, sampling_rate, low_freq, high_freq)
+
+    @staticmethod
+    def _bandpass_filter(signal_data, sampling_rate, low_freq, high_freq):
+        # Валидированные коэффициенты берутся из общего кеша фильтров
+        sos = filter_design_cache.get_sos('bandpass', (low_freq, high_freq), sampling_rate, 4)
 
         try:
-            b, a = signal.butter(4, [low, high], btype='band')
-            return signal.filtfilt(b, a, signal_data)
+            return signal.sosfiltfilt(sos, signal_data, axis=-1)
         except Exception as e:
-            raise ValueError(f"Ошибка фильтрации сигнала: {e}. Частоты: low={low:.4f}, high={high:.4f}")
+            raise ValueError(f"Ошибка фильтрации сигнала: {e}. Частоты: {low_freq}-{high_freq} Гц")
 
     def find_dominant_frequency(self, signal_data, sampling_rate, low_freq, high_freq):
+        return self._dominant_frequency(signal_data, sampling_rate, low_freq, high_freq)
+
+    @staticmethod
+    def _dominant_frequency(signal_data, sampling_rate, low_freq, high_freq):
         n = len(signal_data)
-        fft_result = fft(signal_data)
-        frequencies = fftfreq(n, 1 / sampling_rate)
+        fft_result = sp_fft.fft(signal_data)
+        frequencies = sp_fft.fftfreq(n, 1 / sampling_rate)
 
         # Только положительные частоты в диапазоне
         freq_mask = (frequencies >= low_freq) & (frequencies <= high_freq) & (frequencies > 0)
@@ -337,7 +356,7 @@ class EEGAnalyzer:
         normalized_spectrum = power_spectrum / np.sum(power_spectrum)
 
         # Расчет энтропии
-        return entropy(normalized_spectrum)
+        return stats.entropy(normalized_spectrum)
 
     def calculate_coherence(self, data, channel1, channel2, sampling_rate):
         with self.performance_monitor.measure("Когерентность"):
@@ -360,25 +379,29 @@ class EEGAnalyzer:
                 'mean_coherence': np.mean(Cxy)
             }
 
+    def calculate_connectivity(self, data, sampling_rate, nperseg=1024):
+        with self.performance_monitor.measure("Матрица связности"):
+            # Каналы x каналы x ритмы для когерентности, мнимой когерентности и PLV
+            engine = ConnectivityEngine(self.rhythm_bands, nperseg=nperseg)
+            return engine.compute(data, sampling_rate)
+
+    def extract_window_features(self, data, sampling_rate, window_seconds=2.0, step_seconds=1.0, channel_names=None):
+        with self.performance_monitor.measure("Оконные признаки"):
+            # Таблица признаков: строка на каждое окно и канал
+            engine = WindowFeatureEngine(self.rhythm_bands, window_seconds, step_seconds)
+            return engine.compute(data, sampling_rate, channel_names)
+
     def calculate_statistics(self, data):
         with self.performance_monitor.measure("Статистика"):
-            if data.ndim == 2:
-                # Для многоканальных данных - усредняем по каналам
-                flat_data = data.flatten()
-            else:
-                flat_data = data
+            # Моменты накапливаются блоками за один проход, без копии всей записи
+            accumulator = MomentAccumulator.from_data(data)
+            result = accumulator.global_statistics()
 
-            return {
-                'mean': np.mean(flat_data),
-                'std': np.std(flat_data),
-                'variance': np.var(flat_data),
-                'kurtosis': kurtosis(flat_data),
-                'skewness': skew(flat_data),
-                'rms': np.sqrt(np.mean(flat_data ** 2)),
-                'max_amplitude': np.max(np.abs(flat_data)),
-                'dynamic_range': np.max(flat_data) - np.min(flat_data)
-            }
+            if data.ndim == 2:
+                # Для многоканальных данных - дополнительно статистика каждого канала
+                result['per_channel'] = accumulator.channel_statistics()
 
+            return result
 
     def get_eeg_performance_report(self):
         return self.performance_monitor.get_detailed_summary()
@@ -0,0 +1,97 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from utils.lazy_import import lazy_import
+
+signal = lazy_import('scipy.signal')
+
+
+class ConnectivityEngine:
+    """Связность всех пар каналов по общим STFT-сегментам.
+
+    Сегменты (окно Ханна, перекрытие 50%, удаление среднего - как в scipy.signal.coherence)
+    преобразуются один раз, после чего по каждому ритму строится кросс-спектральная матрица
+    и из нее - когерентность, мнимая когерентность и PLV для всех пар сразу.
+    """
+
+    MEASURES = ('coherence', 'imaginary_coherence', 'plv')
+
+    def __init__(self, bands, nperseg=1024, noverlap=None, window='hann'):
+        if nperseg < 1:
+            raise ValueError(f"Длина сегмента должна быть положительной, получено nperseg={nperseg}")
+        if noverlap is not None and not 0 <= noverlap < nperseg:
+            raise ValueError(f"Перекрытие сегментов должно быть в диапазоне 0 <= noverlap < nperseg, "
+                             f"получено noverlap={noverlap}, nperseg={nperseg}")
+        self.bands = dict(bands)
+        self.nperseg = nperseg
+        self.noverlap = noverlap
+        self.window = window
+
+    def compute(self, data, sampling_rate):
+        data = np.asarray(data, dtype=float)
+        if data.ndim != 2 or data.shape[0] < 2:
+            raise ValueError("Для матрицы связности нужны многоканальные данные (минимум 2 канала)")
+
+        spectra, frequencies = self._segment_spectra(data, sampling_rate)
+
+        n_channels = data.shape[0]
+        shape = (n_channels, n_channels, len(self.bands))
+        result = {measure: np.full(shape, np.nan) for measure in self.MEASURES}
+
+        for band_idx, (low, high) in enumerate(self.bands.values()):
+            band_mask = (frequencies >= low) & (frequencies <= high)
+            if not np.any(band_mask):
+                continue
+
+            for measure, values in self._band_connectivity(spectra[:, :, band_mask]).items():
+                result[measure][:, :, band_idx] = values
+
+        result['bands'] = list(self.bands)
+        result['frequencies'] = frequencies
+        result['n_segments'] = spectra.shape[1]
+        return result
+
+    def _segment_spectra(self, data, sampling_rate):
+        nperseg = min(self.nperseg, data.shape[1])
+        # Для записи короче сегмента длина сегмента уменьшается - перекрытие вместе с ней
+        noverlap = nperseg // 2 if self.noverlap is None else min(self.noverlap, nperseg - 1)
+        step = nperseg - noverlap
+
+        # Сегменты - представления исходного массива, копия появляется только после удаления среднего
+        segments = sliding_window_view(data, nperseg, axis=-1)[:, ::step]
+        window = signal.get_window(self.window, nperseg)
+
+        spectra = np.fft.rfft((segments - segments.mean(axis=-1, keepdims=True)) * window, axis=-1)
+        frequencies = np.fft.rfftfreq(nperseg, 1 / sampling_rate)
+
+        # Только частоты, попадающие хотя бы в один ритм
+        used = np.zeros(frequencies.size, dtype=bool)
+        for low, high in self.bands.values():
+            used |= (frequencies >= low) & (frequencies <= high)
+
+        return spectra[:, :, used], frequencies[used]
+
+    @staticmethod
+    def _band_connectivity(spectra):
+        # spectra: каналы x сегменты x частоты ритма
+        n_segments = spectra.shape[1]
+
+        # Кросс-спектральная матрица для каждой частоты: (частоты, каналы, каналы)
+        cross = np.einsum('isf,jsf->fij', spectra, spectra.conj()) / n_segments
+        auto = np.real(np.einsum('fii->fi', cross))
+        auto[auto == 0] = np.finfo(float).tiny
+        norm = np.sqrt(auto[:, :, np.newaxis] * auto[:, np.newaxis, :])
+
+        coherency = cross / norm
+
+        # PLV - модуль среднего единичного фазора разности фаз по сегментам
+        magnitude = np.abs(spectra)
+        magnitude[magnitude == 0] = 1.0
+        phasors = spectra / magnitude
+        plv = np.abs(np.einsum('isf,jsf->fij', phasors, phasors.conj())) / n_segments
+
+        return {
+            'coherence': np.mean(np.abs(coherency) ** 2, axis=0),
+            'imaginary_coherence': np.mean(np.imag(coherency), axis=0),
+            'plv': np.mean(plv, axis=0)
+        }
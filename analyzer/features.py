@@ -0,0 +1,133 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from utils.lazy_import import lazy_import
+
+pd = lazy_import('pandas')
+stats = lazy_import('scipy.stats')
+
+# Отношения мощностей ритмов (числитель, знаменатель), часто используемые как признаки
+BAND_RATIOS = (('theta', 'beta'), ('alpha', 'theta'), ('alpha', 'beta'))
+
+# Число окон, обрабатываемых за один пакетный БПФ (ограничивает пиковую память)
+WINDOWS_PER_BATCH = 256
+
+
+class WindowFeatureEngine:
+    """Признаки ЭЭГ в скользящих окнах для всех каналов.
+
+    Окна - представления исходного массива (sliding_window_view), спектры считаются
+    одним БПФ на пакет окон. Результат - "длинная" таблица: строка на пару окно-канал.
+    """
+
+    def __init__(self, bands, window_seconds=2.0, step_seconds=1.0):
+        if window_seconds <= 0 or step_seconds <= 0:
+            raise ValueError(f"Длина окна и шаг должны быть больше 0, получено: {window_seconds} с, {step_seconds} с")
+
+        self.bands = dict(bands)
+        self.window_seconds = window_seconds
+        self.step_seconds = step_seconds
+
+    def compute(self, data, sampling_rate, channel_names=None):
+        data = np.atleast_2d(np.asarray(data, dtype=float))
+        n_channels, n_samples = data.shape
+
+        window = int(round(self.window_seconds * sampling_rate))
+        step = max(1, int(round(self.step_seconds * sampling_rate)))
+        if window < 3 or window > n_samples:
+            raise ValueError(f"Длина окна {window} отсчетов не подходит для записи из {n_samples} отсчетов")
+
+        if channel_names is None:
+            channel_names = [f"Канал {i + 1}" for i in range(n_channels)]
+        elif len(channel_names) != n_channels:
+            raise ValueError(f"Ожидалось {n_channels} названий каналов, получено: {len(channel_names)}")
+
+        # Каналы x окна x отсчеты; производные считаются один раз по всей записи
+        windows = sliding_window_view(data, window, axis=-1)[:, ::step]
+        first_diff = np.diff(data, axis=-1)
+        derivative = sliding_window_view(first_diff, window - 1, axis=-1)[:, ::step]
+        second_derivative = sliding_window_view(np.diff(first_diff, axis=-1), window - 2, axis=-1)[:, ::step]
+        n_windows = windows.shape[1]
+
+        frequencies = np.fft.rfftfreq(window, 1 / sampling_rate)
+        # Положительные частоты как у fftfreq: без нулевой и (для четной длины) частоты Найквиста
+        positive = frequencies > 0
+        if window % 2 == 0:
+            positive[-1] = False
+        band_masks = {band: (frequencies >= low) & (frequencies <= high)
+                      for band, (low, high) in self.bands.items()}
+
+        columns = {}
+        for start in range(0, n_windows, WINDOWS_PER_BATCH):
+            batch = slice(start, start + WINDOWS_PER_BATCH)
+            batch_features = self._batch_features(windows[:, batch], derivative[:, batch],
+                                                  second_derivative[:, batch], positive, band_masks)
+            for name, values in batch_features.items():
+                columns.setdefault(name, []).append(values)
+
+        # Окна x каналы -> строки таблицы (окно - внешний индекс)
+        table = {name: np.concatenate(parts, axis=1).T.ravel() for name, parts in columns.items()}
+
+        window_starts = np.arange(n_windows) * step / sampling_rate
+        frame = pd.DataFrame({
+            'window': np.repeat(np.arange(n_windows), n_channels),
+            'channel': np.tile(np.asarray(channel_names, dtype=object), n_windows),
+            'start_time': np.repeat(window_starts, n_channels),
+            'end_time': np.repeat(window_starts + window / sampling_rate, n_channels),
+        })
+        for name, values in table.items():
+            frame[name] = values
+
+        return frame
+
+    def _batch_features(self, windows, derivative, second_derivative, positive, band_masks):
+        n = windows.shape[-1]
+
+        # Спектр мощности как в EEGAnalyzer.calculate_spectral_power, но для всех окон сразу
+        power = np.abs(np.fft.rfft(windows, axis=-1)) ** 2 / n
+        power[..., ~positive] = 0.0
+        total_power = power.sum(axis=-1)
+        safe_total = np.where(total_power > 0, total_power, np.nan)
+
+        features = {}
+        band_power = {}
+        for band, mask in band_masks.items():
+            band_power[band] = power[..., mask].sum(axis=-1)
+            features[f'{band}_power'] = band_power[band]
+            features[f'{band}_relative_power'] = band_power[band] / safe_total
+
+        for numerator, denominator in BAND_RATIOS:
+            if numerator in band_power and denominator in band_power:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    features[f'{numerator}_{denominator}_ratio'] = band_power[numerator] / band_power[denominator]
+
+        features['total_power'] = total_power
+
+        # Спектральная энтропия (натуральный логарифм, как scipy.stats.entropy)
+        normalized = power / safe_total[..., np.newaxis]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            features['spectral_entropy'] = -np.sum(np.where(normalized > 0, normalized * np.log(normalized), 0.0), axis=-1)
+
+        # Параметры Хьорта
+        activity = windows.var(axis=-1)
+        derivative_var = derivative.var(axis=-1)
+        second_var = second_derivative.var(axis=-1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mobility = np.sqrt(derivative_var / activity)
+            features['hjorth_activity'] = activity
+            features['hjorth_mobility'] = mobility
+            features['hjorth_complexity'] = np.sqrt(second_var / derivative_var) / mobility
+
+        # Статистика как в EEGAnalyzer.calculate_statistics, по каждому окну
+        maximum = windows.max(axis=-1)
+        minimum = windows.min(axis=-1)
+        features['mean'] = windows.mean(axis=-1)
+        features['std'] = np.sqrt(activity)
+        features['variance'] = activity
+        features['kurtosis'] = stats.kurtosis(windows, axis=-1)
+        features['skewness'] = stats.skew(windows, axis=-1)
+        features['rms'] = np.sqrt(np.mean(np.square(windows), axis=-1))
+        features['max_amplitude'] = np.maximum(np.abs(maximum), np.abs(minimum))
+        features['dynamic_range'] = maximum - minimum
+
+        return features
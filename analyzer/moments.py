@@ -0,0 +1,120 @@
+import numpy as np
+
+# Размер блока отсчетов на канал при проходе по записи (временные массивы остаются в кеше)
+CHUNK_SAMPLES = 65536
+
+
+class MomentAccumulator:
+    """Однопроходное накопление моментов до 4-го порядка по каналам (Уэлфорд / Пебэ).
+
+    Блоки (каналы x отсчеты) добавляются через update(), аккумуляторы разных частей
+    записи объединяются через merge() - так статистику можно считать по частям файла
+    или по пакетам real-time потока без хранения истории.
+    """
+
+    def __init__(self, n_channels=1):
+        self.n_channels = n_channels
+        self.count = 0
+        self.mean = np.zeros(n_channels)
+        self.m2 = np.zeros(n_channels)
+        self.m3 = np.zeros(n_channels)
+        self.m4 = np.zeros(n_channels)
+        self.minimum = np.full(n_channels, np.inf)
+        self.maximum = np.full(n_channels, -np.inf)
+
+    @classmethod
+    def from_data(cls, data, chunk_samples=CHUNK_SAMPLES):
+        data = np.atleast_2d(data)
+        accumulator = cls(data.shape[0])
+        for start in range(0, data.shape[1], chunk_samples):
+            accumulator.update(data[:, start:start + chunk_samples])
+        return accumulator
+
+    def update(self, block):
+        block = np.atleast_2d(np.asarray(block, dtype=float))
+        if block.shape[0] != self.n_channels:
+            raise ValueError(f"Ожидалось {self.n_channels} каналов, получено: {block.shape[0]}")
+        if block.shape[1] == 0:
+            return self
+
+        # Центральные моменты блока, затем объединение с накопленными
+        n_b = block.shape[1]
+        mean_b = block.mean(axis=1)
+        deviation = block - mean_b[:, np.newaxis]
+        squared = deviation * deviation
+        m2_b = squared.sum(axis=1)
+        m3_b = (squared * deviation).sum(axis=1)
+        m4_b = (squared * squared).sum(axis=1)
+
+        self._combine(n_b, mean_b, m2_b, m3_b, m4_b, block.min(axis=1), block.max(axis=1))
+        return self
+
+    def merge(self, other):
+        if other.n_channels != self.n_channels:
+            raise ValueError(f"Нельзя объединить аккумуляторы с {self.n_channels} и {other.n_channels} каналами")
+        if other.count:
+            self._combine(other.count, other.mean, other.m2, other.m3, other.m4, other.minimum, other.maximum)
+        return self
+
+    def _combine(self, n_b, mean_b, m2_b, m3_b, m4_b, min_b, max_b):
+        n_a = self.count
+        n = n_a + n_b
+        delta = mean_b - self.mean
+        delta_n = delta / n
+
+        m4 = (self.m4 + m4_b
+              + delta * delta_n ** 3 * n_a * n_b * (n_a * n_a - n_a * n_b + n_b * n_b)
+              + 6 * delta_n ** 2 * (n_a * n_a * m2_b + n_b * n_b * self.m2)
+              + 4 * delta_n * (n_a * m3_b - n_b * self.m3))
+        m3 = (self.m3 + m3_b
+              + delta * delta_n ** 2 * n_a * n_b * (n_a - n_b)
+              + 3 * delta_n * (n_a * m2_b - n_b * self.m2))
+
+        self.m2 = self.m2 + m2_b + delta * delta_n * n_a * n_b
+        self.m3 = m3
+        self.m4 = m4
+        self.mean = self.mean + delta_n * n_b
+        self.count = n
+        self.minimum = np.minimum(self.minimum, min_b)
+        self.maximum = np.maximum(self.maximum, max_b)
+
+    def channel_statistics(self):
+        """Статистика по каждому каналу (массивы длиной n_channels)."""
+        return self._statistics(self.count, self.mean, self.m2, self.m3, self.m4, self.minimum, self.maximum)
+
+    def global_statistics(self):
+        """Статистика по всем каналам вместе, как по одному сигналу."""
+        total = self.count * self.n_channels
+        grand_mean = self.mean.mean()
+
+        # Сдвиг центральных моментов каналов к общему среднему
+        shift = self.mean - grand_mean
+        n = self.count
+        m2 = np.sum(self.m2 + n * shift ** 2)
+        m3 = np.sum(self.m3 + 3 * shift * self.m2 + n * shift ** 3)
+        m4 = np.sum(self.m4 + 4 * shift * self.m3 + 6 * shift ** 2 * self.m2 + n * shift ** 4)
+
+        stats = self._statistics(total, grand_mean, m2, m3, m4, self.minimum.min(), self.maximum.max())
+        return {name: float(value) for name, value in stats.items()}
+
+    @staticmethod
+    def _statistics(count, mean, m2, m3, m4, minimum, maximum):
+        if count == 0:
+            raise ValueError("Нет данных для расчета статистики")
+
+        variance = m2 / count
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Смещенные оценки, как scipy.stats.skew / kurtosis (коэффициент эксцесса Фишера)
+            skewness = (m3 / count) / variance ** 1.5
+            kurt = (m4 / count) / variance ** 2 - 3.0
+
+        return {
+            'mean': mean,
+            'std': np.sqrt(variance),
+            'variance': variance,
+            'kurtosis': kurt,
+            'skewness': skewness,
+            'rms': np.sqrt(mean ** 2 + variance),
+            'max_amplitude': np.maximum(np.abs(maximum), np.abs(minimum)),
+            'dynamic_range': maximum - minimum
+        }
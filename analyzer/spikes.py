@@ -0,0 +1,158 @@
+import numpy as np
+
+from preprocessor.preprocessor import MAD_TO_SIGMA
+
+# Медиана и MAD оцениваются по прореженной выборке не длиннее этого числа отсчетов на канал
+ROBUST_MAX_SAMPLES = 65536
+
+
+def robust_thresholds(data, threshold=3.0):
+    """Медиана и порог по каждому каналу: median + threshold * 1.4826 * MAD.
+
+    Если больше половины отсчетов канала совпадают (плоский канал, грубо квантованный АЦП),
+    MAD равен нулю - тогда масштаб берется по стандартному отклонению, а для постоянного
+    канала порог не опускается ниже машинной точности, чтобы спайками не считался шум округления.
+    """
+    data = np.atleast_2d(data)
+    # Для оценки распределения амплитуд достаточно прореженной выборки (срез без копирования)
+    data = data[:, ::max(1, data.shape[1] // ROBUST_MAX_SAMPLES)]
+    median = np.median(data, axis=-1)
+    scale = MAD_TO_SIGMA * np.median(np.abs(data - median[:, np.newaxis]), axis=-1)
+
+    degenerate = scale <= 0
+    if np.any(degenerate):
+        scale[degenerate] = np.std(data[degenerate], axis=-1)
+    scale = np.maximum(scale, np.finfo(float).eps * np.maximum(np.abs(median), 1.0))
+    return median, threshold * scale
+
+
+def group_events(mask, deviation, min_distance):
+    """События из маски превышений (каналы x отсчеты) без цикла по каналам.
+
+    Превышения одного канала, отстоящие друг от друга не более чем на min_distance
+    отсчетов, объединяются в одно событие; его позиция - максимум отклонения.
+    Возвращает (каналы, позиции) событий в порядке каналов и времени.
+    """
+    channels, positions = np.nonzero(mask)
+    if channels.size == 0:
+        return channels, positions
+
+    new_event = np.ones(channels.size, dtype=bool)
+    new_event[1:] = (channels[1:] != channels[:-1]) | (np.diff(positions) > min_distance)
+    event_ids = np.cumsum(new_event) - 1
+
+    # Внутри события сортируем по убыванию отклонения - первый элемент группы и есть пик
+    values = deviation[channels, positions]
+    order = np.lexsort((-values, event_ids))
+    peaks = order[np.flatnonzero(np.r_[True, np.diff(event_ids[order]) > 0])]
+
+    return channels[peaks], positions[peaks]
+
+
+def detect_spikes_multichannel(data, sampling_rate, threshold=3.0, min_distance_s=0.1):
+    """Детекция спайков сразу по всем каналам с робастным порогом на каждый канал."""
+    data = np.atleast_2d(np.asarray(data, dtype=float))
+    n_channels, n_samples = data.shape
+
+    median, channel_thresholds = robust_thresholds(data, threshold)
+    deviation = np.abs(data - median[:, np.newaxis])
+    mask = deviation > channel_thresholds[:, np.newaxis]
+
+    channels, positions = group_events(mask, deviation, int(sampling_rate * min_distance_s))
+    counts = np.bincount(channels, minlength=n_channels)
+    # Границы событий каждого канала в общих массивах
+    bounds = np.r_[0, np.cumsum(counts)]
+
+    return {
+        'channels': channels,
+        'spike_samples': positions,
+        'spike_times': [positions[bounds[i]:bounds[i + 1]] / sampling_rate for i in range(n_channels)],
+        'spike_amplitudes': [data[i, positions[bounds[i]:bounds[i + 1]]] for i in range(n_channels)],
+        'spike_counts': counts,
+        'spike_rates': counts / (n_samples / sampling_rate),
+        'thresholds': channel_thresholds,
+        'medians': median
+    }
+
+
+class StreamingSpikeDetector:
+    """Инкрементальная детекция спайков на потоке пакетов (каналы x отсчеты).
+
+    Хранит по каждому каналу бегущие среднее и дисперсию (объединение по Чану),
+    историю не пересматривает. Отсчеты, признанные спайками, в статистику не попадают,
+    поэтому всплески не завышают порог. До накопления warmup_s секунд детекции нет.
+    """
+
+    def __init__(self, n_channels, sampling_rate, threshold=3.0, min_distance_s=0.1, warmup_s=2.0):
+        self.n_channels = n_channels
+        self.fs = sampling_rate
+        self.threshold = threshold
+        self.min_distance = int(sampling_rate * min_distance_s)
+        self.warmup_samples = int(sampling_rate * warmup_s)
+        self.reset()
+
+    def reset(self):
+        self.samples_seen = 0
+        self.count = np.zeros(self.n_channels)
+        self.mean = np.zeros(self.n_channels)
+        self.m2 = np.zeros(self.n_channels)
+        self.spike_counts = np.zeros(self.n_channels, dtype=int)
+        # Позиция последнего спайка канала (глобальный индекс отсчета) для рефрактерности между пакетами
+        self._last_spike = np.full(self.n_channels, -np.iinfo(np.int64).max // 2, dtype=np.int64)
+
+    @property
+    def std(self):
+        return np.sqrt(np.divide(self.m2, self.count, out=np.zeros_like(self.m2), where=self.count > 0))
+
+    def update(self, block):
+        """Обрабатывает пакет каналы x отсчеты, возвращает (каналы, времена, амплитуды) новых спайков."""
+        block = np.atleast_2d(np.asarray(block, dtype=float))
+        if block.shape[0] != self.n_channels:
+            raise ValueError(f"Ожидалось {self.n_channels} каналов, получено: {block.shape[0]}")
+
+        offset = self.samples_seen
+        self.samples_seen += block.shape[1]
+
+        if offset < self.warmup_samples:
+            self._merge_statistics(block, np.ones(block.shape, dtype=bool))
+            empty = np.array([], dtype=int)
+            return empty, np.array([]), np.array([])
+
+        deviation = np.abs(block - self.mean[:, np.newaxis])
+        mask = deviation > (self.threshold * self.std)[:, np.newaxis]
+        channels, positions = group_events(mask, deviation, self.min_distance)
+
+        # Событие, начавшееся в прошлом пакете, не считается повторно
+        global_positions = positions + offset
+        fresh = global_positions - self._last_spike[channels] > self.min_distance
+        channels, positions, global_positions = channels[fresh], positions[fresh], global_positions[fresh]
+
+        # Для события, продолжающегося в следующих пакетах, отсчитываем рефрактерность от конца превышения
+        last_above = np.where(mask.any(axis=1), block.shape[1] - 1 - np.argmax(mask[:, ::-1], axis=1) + offset, -1)
+        self._last_spike = np.maximum(self._last_spike, last_above)
+        np.add.at(self.spike_counts, channels, 1)
+
+        self._merge_statistics(block, ~mask)
+        return channels, global_positions / self.fs, block[channels, positions]
+
+    def update_batch(self, batch):
+        """Пакет EEGSampleBatch от RealtimeEEGController."""
+        return self.update(np.array([sample.amplitudes for sample in batch.samples], dtype=float).T)
+
+    def get_spike_rates(self):
+        duration = self.samples_seen / self.fs
+        return self.spike_counts / duration if duration > 0 else np.zeros(self.n_channels)
+
+    def _merge_statistics(self, block, valid):
+        # Объединение бегущих моментов с моментами пакета (только допустимые отсчеты)
+        n_b = valid.sum(axis=1).astype(float)
+        sums = np.where(valid, block, 0.0).sum(axis=1)
+        mean_b = np.divide(sums, n_b, out=np.zeros_like(sums), where=n_b > 0)
+        m2_b = np.where(valid, (block - mean_b[:, np.newaxis]) ** 2, 0.0).sum(axis=1)
+
+        total = self.count + n_b
+        delta = mean_b - self.mean
+        safe_total = np.where(total > 0, total, 1.0)
+        self.mean = self.mean + delta * n_b / safe_total
+        self.m2 = self.m2 + m2_b + delta ** 2 * self.count * n_b / safe_total
+        self.count = total
@@ -1,27 +1,31 @@
 # app/eeg_app.py
-import serial.tools.list_ports
-
 from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QTabWidget, QScrollArea,
-    QFileDialog, QMessageBox, QProgressBar, QLabel
+    QFileDialog, QMessageBox, QProgressBar, QLabel, QPushButton
 )
 
+from app.pipeline import RhythmAnalysisCache, build_pipeline_graph
 from app.processing import ProcessingMethods, RealtimeMethods
 from app.visualization import VisualizationMethods
 from analyzer.analyzer import EEGAnalyzer
 from data_loader.data_loader import EEGDataLoader
-from preprocessor.preprocessor import EEGPreprocessor
-from realtime_work.realtime_visualizer import RealtimeEEGWidget
+from preprocessor.preprocessor import DEFAULT_PROCESSING_PARAMS, EEGPreprocessor
 from validator.validator import EEGValidator
 from core.visualizer import EEGVisualizer
 from gui.menu_bar import EEGMenuBar
 from gui.panels import *
+from gui.task_executor import GuiTaskExecutor
 from gui.threads import *
 from gui.widgets import *
+from utils.parallel import ChannelExecutor
 from utils.performance import PerformanceMonitor
 
 
+# Индекс вкладки записи: она создается при первом открытии
+RECORDING_TAB_INDEX = 1
+
+
 class EEGAnalyzerApp(QMainWindow, ProcessingMethods, RealtimeMethods, VisualizationMethods):
     def __init__(self):
         super().__init__()
@@ -37,10 +41,13 @@ class EEGAnalyzerApp(QMainWindow, ProcessingMethods, RealtimeMethods, Visualizat
         self.data_loader = EEGDataLoader()
         self.data_loader.performance_monitor = self.performance_monitor
 
-        self.preprocessor = EEGPreprocessor()
+        # Общий пул потоков для поканальной обработки (фильтрация, детренд, вейвлеты, ритмы)
+        self.executor = ChannelExecutor('thread')
+
+        self.preprocessor = EEGPreprocessor(executor=self.executor)
         self.preprocessor.performance_monitor = self.performance_monitor
 
-        self.analyzer = EEGAnalyzer()
+        self.analyzer = EEGAnalyzer(executor=self.executor)
         self.analyzer.performance_monitor = self.performance_monitor
 
         self.visualizer = EEGVisualizer()
@@ -48,9 +55,19 @@ class EEGAnalyzerApp(QMainWindow, ProcessingMethods, RealtimeMethods, Visualizat
 
         self.validator = EEGValidator()
 
+        # Долгоживущие рабочие потоки для загрузки, обработки и анализа вместо QThread на каждый клик
+        self.task_executor = GuiTaskExecutor(max_workers=2, parent=self)
+
+        # Граф вычислений: этапы обработки, анализ и графики пересчитываются только при изменении входов
+        # Анализ ритмов по каналам: заполняется фоновым предрасчетом после обработки
+        self.analysis_cache = RhythmAnalysisCache()
+        self.compute_graph = build_pipeline_graph(self.preprocessor, self.analyzer, self.analysis_cache)
+        self.register_plot_nodes()
+
     def init_data_variables(self):
         self.raw_data = None
         self.processed_data = None
+        self.artifact_mask = None
         self.sampling_rate = 250
         self.channel_names = []
         self.current_analysis = None
@@ -65,15 +82,7 @@ class EEGAnalyzerApp(QMainWindow, ProcessingMethods, RealtimeMethods, Visualizat
         self.realtime_driver = None
 
     def init_processing_params(self):
-        self.processing_params = {
-            'low_freq': 1.0,
-            'high_freq': 40.0,
-            'notch_freq': 50.0,
-            'detrend': True,
-            'remove_dc': True,
-            'remove_artifacts': True,
-            'artifact_threshold': 3.0
-        }
+        self.processing_params = dict(DEFAULT_PROCESSING_PARAMS)
 
     def initUI(self):
         self.setWindowTitle("Coursework EEG")
@@ -87,10 +96,15 @@ class EEGAnalyzerApp(QMainWindow, ProcessingMethods, RealtimeMethods, Visualizat
 
         self.tabs = QTabWidget()
         self.data_tab = self.create_scrollable_tab(self.create_data_tab())
-        self.recording_tab = self.create_scrollable_tab(self.create_recording_tab())
+
+        # Вкладка записи (real-time график, COM-порты) строится при первом открытии
+        self.recording_tab = QWidget()
+        QVBoxLayout(self.recording_tab).setContentsMargins(0, 0, 0, 0)
+        self.recording_tab_built = False
 
         self.tabs.addTab(self.data_tab, "АНАЛИЗ ДАННЫХ")
         self.tabs.addTab(self.recording_tab, "ЗАПИСЬ ДАННЫХ")
+        self.tabs.currentChanged.connect(self.on_tab_changed)
 
         main_layout.addWidget(self.tabs)
 
@@ -145,7 +159,20 @@ class EEGAnalyzerApp(QMainWindow, ProcessingMethods, RealtimeMethods, Visualizat
         widget.setLayout(layout)
         return widget
 
+    def on_tab_changed(self, index):
+        if index == RECORDING_TAB_INDEX:
+            self.ensure_recording_tab()
+
+    def ensure_recording_tab(self):
+        if self.recording_tab_built:
+            return
+        with self.performance_monitor.measure("Создание вкладки записи"):
+            self.recording_tab.layout().addWidget(self.create_scrollable_tab(self.create_recording_tab()))
+        self.recording_tab_built = True
+
     def create_recording_tab(self):
+        from realtime_work.realtime_visualizer import RealtimeEEGWidget
+
         widget = QWidget()
         layout = QVBoxLayout()
 
@@ -180,6 +207,9 @@ class EEGAnalyzerApp(QMainWindow, ProcessingMethods, RealtimeMethods, Visualizat
         self.processing_panel.remove_dc_check.stateChanged.connect(self.update_processing_params)
         self.processing_panel.artifacts_check.stateChanged.connect(self.update_processing_params)
         self.processing_panel.threshold_spin.valueChanged.connect(self.update_processing_params)
+        self.processing_panel.ica_check.stateChanged.connect(self.update_processing_params)
+        self.processing_panel.wavelet_check.stateChanged.connect(self.update_processing_params)
+        self.processing_panel.wavelet_method_combo.currentIndexChanged.connect(self.update_processing_params)
 
         self.processing_panel.btn_process.clicked.connect(self.process_data)
 
@@ -206,20 +236,22 @@ class EEGAnalyzerApp(QMainWindow, ProcessingMethods, RealtimeMethods, Visualizat
             "Файлы ЭЭГ (*.edf *.csv *.txt *.set);;All Files (*.*)"
         )
         if file_path:
-            self.load_thread = DataLoadThread(file_path, self.data_loader)
-            self.load_thread.result_signal.connect(self.on_data_loaded)
-            self.load_thread.error_signal.connect(self.on_load_error)
-            self.load_thread.info_signal.connect(self.on_load_info)
-            self.load_thread.start()
+            self.load_task = self.task_executor.submit("DataLoadTask", load_data_task, self.data_loader, file_path,
+                                                       key='load')
+            self.load_task.result_signal.connect(self.on_data_loaded)
+            self.load_task.error_signal.connect(self.on_load_error)
+            self.load_task.info_signal.connect(self.on_load_info)
             self.statusBar().showMessage(f"Загрузка: {file_path}")
 
     def on_data_loaded(self, result):
         data, sampling_rate, channel_names = result
+        self.cancel_data_tasks()
         self.raw_data = data
         self.sampling_rate = sampling_rate
         self.channel_names = channel_names
 
         self.processed_data = None
+        self.artifact_mask = None
         self.current_analysis = None
 
         self.update_channel_combo()
@@ -245,7 +277,9 @@ class EEGAnalyzerApp(QMainWindow, ProcessingMethods, RealtimeMethods, Visualizat
     def generate_test_data(self):
         try:
             self.raw_data, self.sampling_rate, self.channel_names = self.data_loader.generate_test_data()
+            self.cancel_data_tasks()
             self.processed_data = None
+            self.artifact_mask = None
             self.current_analysis = None
 
             self.update_channel_combo()
@@ -282,12 +316,22 @@ class EEGAnalyzerApp(QMainWindow, ProcessingMethods, RealtimeMethods, Visualizat
             'detrend': self.processing_panel.detrend_check.isChecked(),
             'remove_dc': self.processing_panel.remove_dc_check.isChecked(),
             'remove_artifacts': self.processing_panel.artifacts_check.isChecked(),
-            'artifact_threshold': self.processing_panel.threshold_spin.value()
+            'artifact_threshold': self.processing_panel.threshold_spin.value(),
+            'ica': self.processing_panel.ica_check.isChecked(),
+            'wavelet_denoise': self.processing_panel.wavelet_check.isChecked(),
+            'wavelet_method': self.processing_panel.wavelet_method_combo.currentData(),
+            'wavelet_level': self.processing_params.get('wavelet_level', 4)
         }
 
+        # После первой обработки параметры применяются сразу: пересчитываются только затронутые этапы
+        if self.processed_data is not None:
+            self.process_data()
+
     def refresh_ports(self):
+        from serial.tools import list_ports
+
         self.recording_settings_panel.com_port_combo.clear()
-        ports = serial.tools.list_ports.comports()
+        ports = list_ports.comports()
         for port in ports:
             self.recording_settings_panel.com_port_combo.addItem(f"{port.device} - {port.description}")
 
@@ -331,6 +375,14 @@ class EEGAnalyzerApp(QMainWindow, ProcessingMethods, RealtimeMethods, Visualizat
         self.processing_progress.setMaximumHeight(16)
         layout.addWidget(self.processing_progress)
 
+        self.btn_cancel_tasks = QPushButton("Отмена")
+        self.btn_cancel_tasks.setVisible(False)
+        self.btn_cancel_tasks.setMaximumHeight(18)
+        self.btn_cancel_tasks.setToolTip("Отменить фоновую обработку и анализ")
+        self.btn_cancel_tasks.clicked.connect(self.cancel_background_tasks)
+        layout.addWidget(self.btn_cancel_tasks)
+        self.task_executor.active_changed.connect(self.on_active_tasks_changed)
+
         from PyQt5.QtCore import QTimer
         self.memory_timer = QTimer()
         self.memory_timer.timeout.connect(self.update_memory_status)
@@ -357,10 +409,23 @@ class EEGAnalyzerApp(QMainWindow, ProcessingMethods, RealtimeMethods, Visualizat
         if show:
             self.processing_progress.setValue(value)
 
+    def on_active_tasks_changed(self, count):
+        self.btn_cancel_tasks.setVisible(count > 0)
+        if count == 0:
+            self.show_processing_progress(False)
+            self.start_analysis_precompute()
+
+    def cancel_background_tasks(self):
+        # Предрасчет анализа не ждет пользователь - он продолжается в свободном пуле
+        self.task_executor.cancel_all(background=False)
+        self.statusBar().showMessage("Фоновые задачи отменены")
+
     def closeEvent(self, event):
         try:
             if hasattr(self, 'realtime_controller') and self.realtime_controller:
                 self.realtime_controller.stop()
+            self.task_executor.shutdown()
+            self.executor.shutdown()
             event.accept()
         except Exception as e:
             print(f"Ошибка при закрытии приложения: {e}")
@@ -0,0 +1,196 @@
+"""
+Узлы обработки и анализа в графе вычислений приложения.
+
+Цепочка EEGPreprocessor.process разбита на этапы: каждый зависит от результата
+предыдущего и только от своих параметров. Смена порога артефактов пересчитывает
+лишь последний этап, а ICA, фильтрация и денойзинг берутся из памяти. Удаление тренда
+и постоянной составляющей не хранится и повторяется только перед пересчетом денойзинга.
+"""
+
+import threading
+
+from preprocessor.preprocessor import DEFAULT_PROCESSING_PARAMS
+from utils.compute_graph import ComputeGraph
+
+# Входы, которые приложение выставляет из своего состояния
+GRAPH_INPUTS = ('raw', 'sampling_rate', 'channel_names', 'plot_channel', 'viz_type',
+                'processed_data', 'processed_mask', 'analysis_channel', 'analysis')
+
+# Параметры этапов обработки (входы графа)
+STAGE_INPUTS = ('ica', 'filter_params', 'detrend', 'remove_dc', 'wavelet_params', 'artifact_params')
+
+# Больше каналов фоновый предрасчет не держит: в каждом результате полный спектр канала
+PRECOMPUTE_MAX_CHANNELS = 64
+
+def rhythm_analysis_result(analyzer, data, sampling_rate, channel_idx, spectral_result=None):
+    """Результат анализа ритмов канала в том виде, в каком его показывает вкладка анализа"""
+    analysis_result = analyzer.analyze_rhythms(data, sampling_rate, channel_idx, spectral_result=spectral_result)
+    recommendations = analyzer.get_rhythm_recommendations(analysis_result)
+    return {'analysis': analysis_result, 'recommendations': recommendations, 'channel_idx': channel_idx}
+
+
+def precompute_analysis_task(context, analyzer, cache, data, sampling_rate, should_yield=None):
+    """Фоновый анализ ритмов всех каналов по одному, начиная с выбранного.
+
+    Порядок берется из cache.priority_channel на каждом шаге, поэтому переключение
+    канала во время предрасчета сразу поднимает его в начало очереди. Как только
+    should_yield() истинно (пользователь запустил обработку или анализ), задача
+    завершается после текущего канала и освобождает поток; продолжить можно новым
+    запуском - посчитанные каналы уже в кэше. Возвращает число посчитанных каналов.
+    """
+    computed = 0
+    while should_yield is None or not should_yield():
+        context.check_cancelled()
+        channel_idx = cache.next_channel(data, sampling_rate)
+        if channel_idx is None:
+            break
+        result = rhythm_analysis_result(analyzer, data, sampling_rate, channel_idx)
+        if cache.put(data, sampling_rate, channel_idx, result):
+            computed += 1
+    return computed
+
+
+class RhythmAnalysisCache:
+    """Анализ ритмов по каналам для текущих обработанных данных.
+
+    Заполняется фоновым предрасчетом и обычным анализом; смена обработанных данных
+    (новый объект массива) сбрасывает кэш. Результаты для прежних данных, пришедшие
+    из потоков с опозданием, отбрасываются.
+    """
+
+    def __init__(self, max_channels=PRECOMPUTE_MAX_CHANNELS):
+        self.max_channels = max_channels
+        # Канал, с которого предрасчет продолжает обход (выбранный в комбобоксе анализа)
+        self.priority_channel = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._data = None
+        self._sampling_rate = None
+        self._results = {}
+
+    def __len__(self):
+        return len(self._results)
+
+    def bind(self, data, sampling_rate):
+        """Привязка к новым обработанным данным; возвращает True, если кэш сброшен"""
+        with self._lock:
+            if data is self._data and sampling_rate == self._sampling_rate:
+                return False
+            self._data = data
+            self._sampling_rate = sampling_rate
+            self._results = {}
+            return True
+
+    def get(self, data, sampling_rate, channel_idx):
+        with self._lock:
+            result = self._results.get(channel_idx) if self._matches(data, sampling_rate) else None
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return result
+
+    def put(self, data, sampling_rate, channel_idx, result):
+        with self._lock:
+            if not self._matches(data, sampling_rate):
+                return False
+            if channel_idx not in self._results and len(self._results) >= self.max_channels:
+                return False
+            self._results[channel_idx] = result
+            return True
+
+    def prioritize(self, channel_idx):
+        if channel_idx >= 0:
+            self.priority_channel = channel_idx
+
+    def next_channel(self, data, sampling_rate):
+        """Следующий непосчитанный канал: выбранный, затем следующие за ним по кругу"""
+        with self._lock:
+            if not self._matches(data, sampling_rate) or len(self._results) >= self.max_channels:
+                return None
+            n_channels = data.shape[0] if data.ndim == 2 else 1
+            for offset in range(n_channels):
+                channel_idx = (self.priority_channel + offset) % n_channels
+                if channel_idx not in self._results:
+                    return channel_idx
+            return None
+
+    def _matches(self, data, sampling_rate):
+        return data is not None and data is self._data and sampling_rate == self._sampling_rate
+
+
+def processing_inputs(processing_params):
+    """Параметры панели обработки -> входы этапов.
+
+    Параметры выключенного этапа не попадают во вход, чтобы их изменение его не сбрасывало.
+    """
+    params = dict(DEFAULT_PROCESSING_PARAMS, **(processing_params or {}))
+    return {
+        'ica': bool(params.get('ica')),
+        'filter_params': (params['low_freq'], params['high_freq'], params['notch_freq']),
+        'detrend': bool(params['detrend']),
+        'remove_dc': bool(params['remove_dc']),
+        'wavelet_params': ((True, params.get('wavelet_level', 4), params.get('wavelet_method', 'universal'))
+                           if params.get('wavelet_denoise') else (False,)),
+        'artifact_params': (True, params['artifact_threshold']) if params['remove_artifacts'] else (False,),
+    }
+
+
+def build_pipeline_graph(preprocessor, analyzer, analysis_cache=None):
+    graph = ComputeGraph()
+    for name in GRAPH_INPUTS + STAGE_INPUTS:
+        graph.add_input(name)
+
+    def ica_stage(data, sampling_rate, enabled):
+        return preprocessor.ica_artifact_removal(data, sampling_rate) if enabled else data
+
+    def filter_stage(data, sampling_rate, filter_params):
+        return preprocessor.apply_filters(data, sampling_rate, *filter_params)
+
+    def detrend_stage(data, enabled):
+        return preprocessor.detrend_signal(data) if enabled else data
+
+    def dc_stage(data, enabled):
+        return preprocessor.remove_dc_offset(data) if enabled else data
+
+    def wavelet_stage(data, wavelet_params):
+        if not wavelet_params[0]:
+            return data
+        _, level, method = wavelet_params
+        return preprocessor.wavelet_denoising(data, level=level, threshold_method=method)
+
+    def artifact_stage(data, artifact_params):
+        if not artifact_params[0]:
+            return data, None
+        return preprocessor.remove_artifacts(data, artifact_params[1], return_mask=True)
+
+    # Каждый хранимый этап - полная копия записи. Хранятся дорогие этапы (ICA, фильтрация,
+    # вейвлет-денойзинг) и результат вместе с маской артефактов; удаление тренда и постоянной
+    # составляющей дешевле копии и восстанавливается от фильтрации, только если пересчитывается
+    # денойзинг
+    graph.add_node('ica_cleaned', ica_stage, ('raw', 'sampling_rate', 'ica'),
+                   "ICA: удаление глазных и мышечных компонент...")
+    graph.add_node('filtered', filter_stage, ('ica_cleaned', 'sampling_rate', 'filter_params'), "Фильтрация...")
+    graph.add_node('detrended', detrend_stage, ('filtered', 'detrend'), "Удаление тренда...", retain=False)
+    graph.add_node('dc_removed', dc_stage, ('detrended', 'remove_dc'), "Удаление постоянной составляющей...",
+                   retain=False)
+    graph.add_node('denoised', wavelet_stage, ('dc_removed', 'wavelet_params'), "Вейвлет-денойзинг...")
+    graph.add_node('artifacts', artifact_stage, ('denoised', 'artifact_params'), "Удаление артефактов...")
+    # Результат и маска - элементы хранимого кортежа artifacts, отдельных копий нет
+    graph.add_node('processed', lambda result: result[0], ('artifacts',))
+    graph.add_node('artifact_mask', lambda result: result[1], ('artifacts',))
+
+    # Анализ строится по показанным обработанным данным (вход processed_data), а не по узлу
+    # processed: запрос анализа не должен запускать обработку с еще не примененными параметрами
+    def rhythm_analysis(data, sampling_rate, channel_idx, spectral_result):
+        result = rhythm_analysis_result(analyzer, data, sampling_rate, channel_idx, spectral_result)
+        if analysis_cache is not None:
+            analysis_cache.put(data, sampling_rate, channel_idx, result)
+        return result
+
+    graph.add_node('spectrum', analyzer.calculate_spectral_power,
+                   ('processed_data', 'sampling_rate', 'analysis_channel'), "Спектральный анализ...")
+    graph.add_node('rhythms', rhythm_analysis,
+                   ('processed_data', 'sampling_rate', 'analysis_channel', 'spectrum'), "Анализ ритмов ЭЭГ...")
+    return graph
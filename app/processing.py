@@ -1,14 +1,14 @@
 import time
 
 import numpy as np
+from PyQt5.QtCore import QTimer
 from PyQt5.QtWidgets import QMessageBox, QFileDialog
 
 from realtime_work.realtime_controller import RealtimeEEGController, RealtimeDataBuffer
 from realtime_work.realtime_driver import SerialEEGDriver, SyntheticEEGDriver, EEGSample, EEGSampleBatch
 from realtime_work.realtime_recorder import RealtimeEEGRecorder
-from report_generator.report_dialog import ReportConfigDialog
-from validator.validation_dialog import ValidationDialog
-from gui.threads import ProcessingThread, AnalysisThread, SingleRhythmAnalysisThread
+from app.pipeline import processing_inputs, precompute_analysis_task
+from gui.threads import processing_task, analysis_task, single_rhythm_task
 
 
 class ProcessingMethods:
@@ -16,19 +16,26 @@ class ProcessingMethods:
         if self.raw_data is None:
             QMessageBox.warning(self, "Предупреждение", "Сначала загрузите данные!")
             return
-        self.processing_panel.btn_process.setEnabled(False)
+        # Повторный запуск заменяет незавершенную обработку; пересчитываются только этапы,
+        # параметры которых изменились с прошлого раза
         self.processing_panel.btn_process.setText("ОБРАБОТКА...")
-        self.process_thread = ProcessingThread(self.preprocessor, self.raw_data, self.sampling_rate,
-                                               self.processing_params)
-        self.process_thread.result_signal.connect(self.on_processing_complete)
-        self.process_thread.error_signal.connect(self.on_processing_error)
-        self.process_thread.info_signal.connect(self.on_processing_info)
-        self.process_thread.start()
+        self.task_executor.cancel('precompute')
+        self.compute_graph.set_inputs(raw=self.raw_data, sampling_rate=self.sampling_rate,
+                                      **processing_inputs(self.processing_params))
+        self.process_task = self.task_executor.submit(
+            "ProcessingTask", processing_task, self.compute_graph, self.performance_monitor, key='processing')
+        self.process_task.result_signal.connect(self.on_processing_complete)
+        self.process_task.error_signal.connect(self.on_processing_error)
+        self.process_task.info_signal.connect(self.on_processing_info)
+        self.process_task.progress_signal.connect(self.on_task_progress)
+        self.process_task.cancelled_signal.connect(self.on_processing_cancelled)
+        self.show_processing_progress(True, 0)
         self.statusBar().showMessage("Обработка данных...")
 
-    def on_processing_complete(self, processed_data):
+    def on_processing_complete(self, result):
+        processed_data, self.artifact_mask = result
         self.processed_data = processed_data
-        self.processing_panel.btn_process.setEnabled(True)
+        self.analysis_cache.bind(processed_data, self.sampling_rate)
         self.processing_panel.btn_process.setText("ОБРАБОТАТЬ СИГНАЛ")
         self.performance_monitor.take_system_snapshot()
         self.update_performance_display()
@@ -39,28 +46,78 @@ class ProcessingMethods:
         self.update_data_info()
         self.statusBar().showMessage("Обработка завершена! Теперь можно анализировать ритмы.")
 
+        # Анализ ритмов всех каналов - в фоне, когда GUI освободится после перерисовки
+        QTimer.singleShot(0, self.start_analysis_precompute)
+
     def on_processing_error(self, error_msg):
-        self.processing_panel.btn_process.setEnabled(True)
         self.processing_panel.btn_process.setText("ОБРАБОТАТЬ СИГНАЛ")
         QMessageBox.critical(self, "Ошибка обработки", error_msg)
         self.statusBar().showMessage("Ошибка обработки данных")
 
+    def on_processing_cancelled(self):
+        # Замененная обработка тоже отменяется - кнопку не трогаем, пока идет более новая
+        if not self.task_executor.is_running('processing'):
+            self.processing_panel.btn_process.setText("ОБРАБОТАТЬ СИГНАЛ")
+
     def on_processing_info(self, info_msg):
         self.info_panel.info_text.append(info_msg)
 
+    def on_task_progress(self, value):
+        self.show_processing_progress(True, value)
+
+    def cancel_data_tasks(self):
+        # Результаты обработки и анализа прежней записи больше не нужны
+        self.task_executor.cancel('processing')
+        self.task_executor.cancel('analysis')
+        self.task_executor.cancel('precompute')
+        self.analysis_cache.bind(None, None)
+
+    def start_analysis_precompute(self):
+        # Предрасчет идет только при свободном пуле: задача пользователя заставляет его
+        # завершиться, а продолжается он из on_active_tasks_changed, когда пул освободится
+        if (self.processed_data is None or self.task_executor.foreground_count
+                or self.task_executor.is_running('precompute')
+                or self.analysis_cache.next_channel(self.processed_data, self.sampling_rate) is None):
+            return
+        self.analysis_cache.prioritize(self.analysis_panel.analysis_channel_combo.currentIndex())
+        self.precompute_task = self.task_executor.submit(
+            "AnalysisPrecomputeTask", precompute_analysis_task, self.analyzer, self.analysis_cache,
+            self.processed_data, self.sampling_rate, lambda: self.task_executor.foreground_count > 0,
+            key='precompute', background=True)
+        self.precompute_task.result_signal.connect(self.on_precompute_complete)
+        self.precompute_task.error_signal.connect(self.on_analysis_info)
+
+    def on_precompute_complete(self, computed):
+        if self.analysis_cache.next_channel(self.processed_data, self.sampling_rate) is not None:
+            # Уступил задаче пользователя - продолжаем, если она уже завершилась
+            self.start_analysis_precompute()
+        elif computed:
+            self.info_panel.info_text.append(
+                f"Анализ ритмов рассчитан заранее для {len(self.analysis_cache)} каналов")
+
     def analyze_rhythms(self):
         if self.processed_data is None:
             QMessageBox.warning(self, "Предупреждение", "Сначала обработайте данные!")
             return
         channel_idx = self.analysis_panel.analysis_channel_combo.currentIndex()
-        self.analysis_panel.btn_analyze.setEnabled(False)
+        self.start_rhythm_analysis(channel_idx)
+
+    def start_rhythm_analysis(self, channel_idx):
+        cached = self.analysis_cache.get(self.processed_data, self.sampling_rate, channel_idx)
+        if cached is not None:
+            # Канал уже посчитан фоновым предрасчетом; незавершенный запрос по другому каналу не нужен
+            self.task_executor.cancel('analysis')
+            self.on_analysis_complete(cached)
+            return
+
+        # Полный анализ и анализ одного ритма делят ключ: результат дает только последний запрос
         self.analysis_panel.btn_analyze.setText("АНАЛИЗ...")
-        self.analysis_panel.btn_analyze_single.setEnabled(False)
-        self.analysis_thread = AnalysisThread(self.analyzer, self.processed_data, self.sampling_rate, channel_idx)
-        self.analysis_thread.result_signal.connect(self.on_analysis_complete)
-        self.analysis_thread.error_signal.connect(self.on_analysis_error)
-        self.analysis_thread.info_signal.connect(self.on_analysis_info)
-        self.analysis_thread.start()
+        self.compute_graph.set_inputs(processed_data=self.processed_data, sampling_rate=self.sampling_rate,
+                                      analysis_channel=channel_idx)
+        self.analysis_task = self.task_executor.submit("AnalysisTask", analysis_task, self.compute_graph,
+                                                       key='analysis')
+        self.analysis_task.result_signal.connect(self.on_analysis_complete)
+        self.connect_analysis_task(self.analysis_task)
         self.statusBar().showMessage("Анализ всех ритмов...")
 
     def analyze_single_rhythm(self):
@@ -73,22 +130,28 @@ class ProcessingMethods:
             return
         rhythm_name = self.analysis_panel.rhythm_combo.currentText()
         channel_idx = self.analysis_panel.analysis_channel_combo.currentIndex()
-        self.analysis_panel.btn_analyze_single.setEnabled(False)
         self.analysis_panel.btn_analyze_single.setText("АНАЛИЗ...")
-        self.analysis_panel.btn_analyze.setEnabled(False)
-        self.single_rhythm_thread = SingleRhythmAnalysisThread(self.analyzer, self.processed_data, self.sampling_rate,
-                                                               channel_idx, rhythm_name)
-        self.single_rhythm_thread.result_signal.connect(self.on_single_rhythm_complete)
-        self.single_rhythm_thread.error_signal.connect(self.on_analysis_error)
-        self.single_rhythm_thread.info_signal.connect(self.on_analysis_info)
-        self.single_rhythm_thread.start()
+        self.analysis_task = self.task_executor.submit(
+            "SingleRhythmTask", single_rhythm_task, self.processed_data, self.sampling_rate, channel_idx,
+            rhythm_name, key='analysis')
+        self.analysis_task.result_signal.connect(self.on_single_rhythm_complete)
+        self.connect_analysis_task(self.analysis_task)
         self.statusBar().showMessage(f"Анализ ритма {rhythm_name}...")
 
+    def connect_analysis_task(self, task):
+        task.error_signal.connect(self.on_analysis_error)
+        task.info_signal.connect(self.on_analysis_info)
+        task.progress_signal.connect(self.on_task_progress)
+        task.cancelled_signal.connect(self.on_analysis_cancelled)
+        self.show_processing_progress(True, 0)
+
+    def reset_analysis_buttons(self):
+        self.analysis_panel.btn_analyze.setText("АНАЛИЗИРОВАТЬ ВСЕ РИТМЫ")
+        self.analysis_panel.btn_analyze_single.setText("АНАЛИЗИРОВАТЬ ВЫБРАННЫЙ РИТМ")
+
     def on_analysis_complete(self, result):
         self.current_analysis = result
-        self.analysis_panel.btn_analyze.setEnabled(True)
-        self.analysis_panel.btn_analyze.setText("АНАЛИЗИРОВАТЬ ВСЕ РИТМЫ")
-        self.analysis_panel.btn_analyze_single.setEnabled(True)
+        self.reset_analysis_buttons()
         self.analysis_panel.btn_save_report.setEnabled(True)
         self.update_analysis_plots()
 
@@ -102,14 +165,12 @@ class ProcessingMethods:
         self.statusBar().showMessage("Анализ ритмов завершен!")
 
     def on_single_rhythm_complete(self, result):
-        self.analysis_panel.btn_analyze_single.setEnabled(True)
-        self.analysis_panel.btn_analyze_single.setText("АНАЛИЗИРОВАТЬ ВЫБРАННЫЙ РИТМ")
-        self.analysis_panel.btn_analyze.setEnabled(True)
+        self.reset_analysis_buttons()
 
-        # Сохраняем результат для отображения графиков
+        # Сохраняем результат для отображения графиков (канал - тот, для которого считали)
         self.current_analysis = {
             'analysis': result,
-            'channel_idx': self.analysis_panel.analysis_channel_combo.currentIndex()
+            'channel_idx': result['channel_idx']
         }
 
         # Обновляем графики анализа
@@ -176,13 +237,14 @@ class ProcessingMethods:
         return "• Интерпретация недоступна для данного ритма"
 
     def on_analysis_error(self, error_msg):
-        self.analysis_panel.btn_analyze.setEnabled(True)
-        self.analysis_panel.btn_analyze.setText("АНАЛИЗИРОВАТЬ ВСЕ РИТМЫ")
-        self.analysis_panel.btn_analyze_single.setEnabled(True)
-        self.analysis_panel.btn_analyze_single.setText("АНАЛИЗИРОВАТЬ ВЫБРАННЫЙ РИТМ")
+        self.reset_analysis_buttons()
         QMessageBox.critical(self, "Ошибка анализа", error_msg)
         self.statusBar().showMessage("Ошибка анализа данных")
 
+    def on_analysis_cancelled(self):
+        if not self.task_executor.is_running('analysis'):
+            self.reset_analysis_buttons()
+
     def on_analysis_info(self, info_msg):
         self.info_panel.info_text.append(info_msg)
 
@@ -200,7 +262,21 @@ class ProcessingMethods:
             return
 
         try:
-            dialog = ReportConfigDialog(self)
+            # Генератор создается до диалога - по его данным строится предпросмотр в HTML
+            from report_generator.report_generator import EEGReportGenerator
+            report_generator = EEGReportGenerator()
+            report_generator.set_data(
+                raw_data=self.raw_data,
+                processed_data=self.processed_data,
+                analysis_results=self.current_analysis,
+                sampling_rate=self.sampling_rate,
+                channel_names=list(self.channel_names),
+                recommendations=self.analyzer.get_rhythm_recommendations(self.current_analysis),
+                processing_params=self.processing_params
+            )
+
+            from report_generator.report_dialog import ReportConfigDialog
+            dialog = ReportConfigDialog(self, report_generator=report_generator)
             if dialog.exec_() == dialog.Accepted:
                 # Получаем конфигурацию отчета
                 report_config = dialog.get_report_info()
@@ -211,18 +287,16 @@ class ProcessingMethods:
                     QMessageBox.warning(self, "Ошибка", "Не указан путь для сохранения отчета!")
                     return
 
-                # Создаем генератор отчетов
-                from report_generator.report_generator import EEGReportGenerator
-                report_generator = EEGReportGenerator()
-
-                # Генерируем отчет используя правильный интерфейс
-                success = report_generator.generate_report(
+                # Генерируем отчет в выбранном формате
+                success = report_generator.export_report(
                     output_path=output_path,
                     patient_info=patient_info,
+                    report_format=report_config.get('format', 'pdf'),
+                    quality=report_config.get('quality', 'print'),
                 )
 
                 if success:
-                    QMessageBox.information(self, "Успех", f"PDF-отчет успешно сохранен:\n{output_path}")
+                    QMessageBox.information(self, "Успех", f"Отчет успешно сохранен:\n{output_path}")
                     self.statusBar().showMessage(f"Отчет сохранен: {output_path}")
 
                     # Предлагаем открыть файл
@@ -269,6 +343,9 @@ class ProcessingMethods:
             return
 
         try:
+            # Диалог валидации (и MNE) загружается только при первой валидации
+            from validator.validation_dialog import ValidationDialog
+
             # Передаем правильные параметры в ValidationDialog
             dialog = ValidationDialog(
                 validator=self.validator,
@@ -276,7 +353,8 @@ class ProcessingMethods:
                 sampling_rate=self.sampling_rate,
                 channel_names=self.channel_names,
                 our_filtered=self.processed_data,  # Наши обработанные данные
-                parent=self
+                parent=self,
+                processing_params=self.processing_params  # MNE фильтрует с теми же параметрами
             )
             dialog.exec_()
         except Exception as e:
@@ -284,8 +362,17 @@ class ProcessingMethods:
             print(f"Детали ошибки валидации: {e}")  # Для отладки
 
     def on_analysis_channel_changed(self):
-        if self.current_analysis is not None:
+        channel_idx = self.analysis_panel.analysis_channel_combo.currentIndex()
+        # Фоновый предрасчет продолжает с выбранного канала
+        self.analysis_cache.prioritize(channel_idx)
+        if self.current_analysis is None or self.processed_data is None:
+            return
+        if channel_idx < 0 or channel_idx == self.current_analysis['channel_idx']:
             self.update_analysis_plots()
+            return
+        # Посчитанный заранее канал показывается сразу; при быстром переключении непосчитанных
+        # каналов предыдущие запросы заменяются - считается только последний
+        self.start_rhythm_analysis(channel_idx)
 
 
 class RealtimeMethods:
@@ -293,7 +380,7 @@ class RealtimeMethods:
         try:
             data_source = self.recording_settings_panel.data_source_combo.currentText()
             sample_rate = self.recording_settings_panel.recording_sampling_spin.value()
-            self.realtime_buffer = RealtimeDataBuffer(max_duration_seconds=3600, sample_rate=sample_rate)
+            self.realtime_buffer = RealtimeDataBuffer(max_duration_seconds=3600)
             if "Serial" in data_source:
                 port_text = self.recording_settings_panel.com_port_combo.currentText()
                 if not port_text:
@@ -301,14 +388,15 @@ class RealtimeMethods:
                     return
                 port = port_text.split(' - ')[0]
                 baudrate = int(self.recording_settings_panel.baudrate_combo.currentText())
-                self.realtime_driver = SerialEEGDriver(port=port, baudrate=baudrate, sample_rate=sample_rate)
+                self.realtime_driver = SerialEEGDriver(port=port, baudrate=baudrate, sample_rate_hz=sample_rate)
             else:
-                self.realtime_driver = SyntheticEEGDriver(sample_rate=sample_rate, num_channels=1)
-            self.realtime_controller = RealtimeEEGController(driver=self.realtime_driver, buffer=self.realtime_buffer)
+                self.realtime_driver = SyntheticEEGDriver(sample_rate_hz=sample_rate)
+            self.realtime_controller = RealtimeEEGController(driver=self.realtime_driver)
             self.realtime_controller.data_received.connect(self._on_realtime_data)
             self.realtime_controller.status_changed.connect(self._on_realtime_status)
             self.realtime_controller.error_occurred.connect(self._on_realtime_error)
             self.realtime_plot_widget.set_buffer(self.realtime_buffer)
+            self.realtime_plot_widget.set_latency_monitor(self.realtime_controller.latency_monitor)
             self.realtime_controller.start()
             self.is_recording = True
             self.recording_control_panel.btn_start_recording.setEnabled(False)
@@ -384,9 +472,11 @@ class RealtimeMethods:
             QMessageBox.warning(self, "Предупреждение", "Нет записанных данных!")
             return
         self.raw_data = self.recorded_data
+        self.cancel_data_tasks()
         self.sampling_rate = self.recording_settings_panel.recording_sampling_spin.value()
         self.channel_names = [f'Recorded_Ch{i}' for i in range(self.recorded_data.shape[0])]
         self.processed_data = None
+        self.artifact_mask = None
         self.current_analysis = None
         self.update_channel_combo()
         self.update_analysis_channel_combo()
@@ -403,6 +493,8 @@ class RealtimeMethods:
         try:
             if self.realtime_buffer:
                 self.realtime_buffer.add_batch(batch)
+                if self.realtime_controller:
+                    self.realtime_controller.latency_monitor.on_batch_buffered(batch)
             if self.realtime_plot_widget:
                 self.realtime_plot_widget.update_plot()
         except Exception as e:
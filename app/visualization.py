@@ -1,80 +1,16 @@
 import numpy as np
 
+from report_generator.html_report import badge, html_page, safe_html
+
 class VisualizationMethods:
     def _safe_html(self, s):
-        if s is None:
-            return ""
-        return (str(s)
-                .replace("&", "&amp;")
-                .replace("<", "&lt;")
-                .replace(">", "&gt;")
-                .replace('"', "&quot;"))
+        return safe_html(s)
 
     def _html_page(self, title, body_html):
-        return f"""
-        <html><head><meta charset="utf-8">
-        <style>
-          body {{
-            background:#0b1220; color:#e5e7eb;
-            font-family: Helvetica, Arial;
-            font-size:13px; line-height:1.55; margin:0; padding:14px;
-          }}
-          .title {{ font-size:15px; font-weight:900; margin:0 0 12px 0; }}
-          .grid {{ display:block; }}
-          .card {{
-            background:rgba(255,255,255,0.04);
-            border:1px solid #243244;
-            border-radius:12px;
-            padding:12px;
-            margin:10px 0;
-          }}
-          .card h3 {{
-            margin:0 0 8px 0;
-            font-size:12px;
-            font-weight:900;
-            letter-spacing:.4px;
-            color:#cbd5e1;
-            text-transform:uppercase;
-          }}
-          .row {{
-            display:flex; justify-content:space-between; gap:10px;
-            padding:6px 0; border-bottom:1px solid rgba(36,50,68,.55);
-          }}
-          .row:last-child {{ border-bottom:none; }}
-          .k {{ color:#9ca3af; }}
-          .v {{ color:#e5e7eb; font-weight:800; }}
-          .muted {{ color:#94a3b8; }}
-          .badge {{
-            display:inline-block; padding:2px 8px; border-radius:999px;
-            border:1px solid #243244; font-size:11px; font-weight:900;
-            margin-left:6px;
-          }}
-          .ok {{ background:rgba(34,197,94,.14); color:#86efac; }}
-          .warn {{ background:rgba(245,158,11,.14); color:#fcd34d; }}
-          .bad {{ background:rgba(239,68,68,.14); color:#fca5a5; }}
-          .accent {{ background:rgba(59,130,246,.14); color:#93c5fd; }}
-          table {{ width:100%; border-collapse:collapse; margin-top:6px; border-radius:10px; overflow:hidden; }}
-          th,td {{ border:1px solid rgba(36,50,68,.7); padding:8px 10px; text-align:left; }}
-          th {{ background:rgba(255,255,255,.05); color:#cbd5e1; font-weight:900; font-size:12px; }}
-          ul {{ margin:8px 0 0 18px; padding:0; }}
-          li {{ margin:6px 0; }}
-          pre {{
-            margin:0; white-space:pre-wrap; word-break:break-word;
-            color:#cbd5e1;
-            font-family: Menlo, Monaco, "Courier New";
-            font-size:12px;
-          }}
-        </style></head>
-        <body>
-          <div class="title">{self._safe_html(title)}</div>
-          <div class="grid">{body_html}</div>
-        </body></html>
-        """
+        return html_page(title, body_html)
 
     def _badge(self, text, level="accent"):
-        cls = "badge " + (
-            "ok" if level == "ok" else "warn" if level == "warn" else "bad" if level == "bad" else "accent")
-        return f'<span class="{cls}">{self._safe_html(text)}</span>'
+        return badge(text, level)
 
     def _style_axes(self, ax, title=None):
         # Цвета под тёмный фон приложения
@@ -94,17 +30,51 @@ class VisualizationMethods:
 
         if title:
             ax.set_title(title, color=fg, fontsize=12, fontweight="bold")
+
+    def register_plot_nodes(self):
+        # Каждый график - узел графа: перерисовывается, только если изменились его входы
+        graph = self.compute_graph
+        graph.add_node('raw_plot', self._draw_raw_plot,
+                       ('raw', 'sampling_rate', 'channel_names', 'plot_channel', 'viz_type'))
+        graph.add_node('processed_plot', self._draw_processed_plot,
+                       ('processed_data', 'processed_mask', 'sampling_rate', 'channel_names', 'plot_channel',
+                        'viz_type'))
+        graph.add_node('analysis_plot', self._draw_analysis_plot,
+                       ('analysis', 'processed_data', 'sampling_rate', 'channel_names'))
+
+    def sync_graph_inputs(self):
+        self.compute_graph.set_inputs(
+            raw=self.raw_data,
+            sampling_rate=self.sampling_rate,
+            channel_names=tuple(self.channel_names),
+            plot_channel=self.top_panel.channel_combo.currentIndex(),
+            viz_type=self.top_panel.viz_combo.currentText(),
+            processed_data=self.processed_data,
+            processed_mask=self.artifact_mask,
+            analysis=self.current_analysis
+        )
+
+    def _draw_raw_plot(self, raw_data, sampling_rate, channel_names, channel_idx, viz_type):
+        self.update_raw_plot(channel_idx, viz_type)
+
+    def _draw_processed_plot(self, processed_data, artifact_mask, sampling_rate, channel_names, channel_idx,
+                             viz_type):
+        self.update_processed_plot(channel_idx, viz_type)
+
+    def _draw_analysis_plot(self, analysis, processed_data, sampling_rate, channel_names):
+        self.draw_analysis_plots()
+
     def update_plots(self):
         if self.raw_data is None:
             return
         try:
-            channel_idx = self.top_panel.channel_combo.currentIndex()
-            viz_type = self.top_panel.viz_combo.currentText()
-            self.update_raw_plot(channel_idx, viz_type)
-            if self.processed_data is not None:
-                self.update_processed_plot(channel_idx, viz_type)
-            if self.current_analysis is not None:
-                self.update_analysis_plots()
+            with self.performance_monitor.measure("Обновление графиков"):
+                self.sync_graph_inputs()
+                self.compute_graph.get('raw_plot')
+                if self.processed_data is not None:
+                    self.compute_graph.get('processed_plot')
+                if self.current_analysis is not None:
+                    self.compute_graph.get('analysis_plot')
         except Exception as e:
             print(f"Ошибка обновления графиков: {e}")
 
@@ -127,7 +97,8 @@ class VisualizationMethods:
         try:
             self.processed_canvas.fig.clear()
             if viz_type == "Временной ряд":
-                self.plot_time_series(self.processed_canvas, self.processed_data, channel_idx, "Обработанный сигнал")
+                self.plot_time_series(self.processed_canvas, self.processed_data, channel_idx, "Обработанный сигнал",
+                                      artifact_mask=self.artifact_mask)
             elif viz_type == "Спектр мощности":
                 self.plot_power_spectrum(self.processed_canvas, self.processed_data, channel_idx,
                                          "Спектр мощности (обработанный)")
@@ -143,6 +114,10 @@ class VisualizationMethods:
     def update_analysis_plots(self):
         if self.current_analysis is None:
             return
+        self.sync_graph_inputs()
+        self.compute_graph.get('analysis_plot')
+
+    def draw_analysis_plots(self):
         try:
             self.analysis_canvas.fig.clear()
             analysis_result = self.current_analysis['analysis']
@@ -183,12 +158,19 @@ class VisualizationMethods:
             ax.set_title('Анализ ритмов ЭЭГ')
             self.analysis_canvas.draw()
 
-    def plot_time_series(self, canvas, data, channel_idx, title):
+    def plot_time_series(self, canvas, data, channel_idx, title, artifact_mask=None):
         ax = canvas.fig.add_subplot(111)
         if channel_idx < len(data):
             channel_data = data[channel_idx]
             time_axis = np.arange(len(channel_data)) / self.sampling_rate
             ax.plot(time_axis, channel_data, color="#22c55e", linewidth=1.2, alpha=0.95)
+            if artifact_mask is not None:
+                # Участки, замененные интерполяцией при удалении артефактов
+                channel_mask = artifact_mask[channel_idx] if artifact_mask.ndim == 2 else artifact_mask
+                if np.any(channel_mask):
+                    ax.fill_between(time_axis, 0, 1, where=channel_mask, transform=ax.get_xaxis_transform(),
+                                    color="#ef4444", alpha=0.25, linewidth=0, label='Артефакты')
+                    ax.legend(loc='upper right', fontsize=8)
             ax.set_xlabel('Время (с)')
             ax.set_ylabel('Амплитуда (мкВ)')
             t = f'{title} - {self.channel_names[channel_idx] if channel_idx < len(self.channel_names) else f"Канал {channel_idx}"}'
@@ -423,6 +405,8 @@ class VisualizationMethods:
                   <div class="row"><div class="k">Detrend</div><div class="v">{self._badge("ON", "ok") if p.get("detrend") else self._badge("OFF", "warn")}</div></div>
                   <div class="row"><div class="k">DC offset</div><div class="v">{self._badge("ON", "ok") if p.get("remove_dc") else self._badge("OFF", "warn")}</div></div>
                   <div class="row"><div class="k">Artifacts</div><div class="v">{self._badge("ON", "ok") if p.get("remove_artifacts") else self._badge("OFF", "warn")}</div></div>
+                  <div class="row"><div class="k">ICA</div><div class="v">{self._badge("ON", "ok") if p.get("ica") else self._badge("OFF", "warn")}</div></div>
+                  <div class="row"><div class="k">Wavelet</div><div class="v">{self._badge(p.get("wavelet_method", "universal").upper(), "ok") if p.get("wavelet_denoise") else self._badge("OFF", "warn")}</div></div>
                 </div>
                 """
                 if p.get("remove_artifacts"):
@@ -759,6 +743,12 @@ class VisualizationMethods:
               <h3>Отчёт</h3>
               <pre>{self._safe_html(report)}</pre>
             </div>
+            <div class="card">
+              <h3>Граф вычислений</h3>
+              <pre>{self._safe_html(self.compute_graph.report())}</pre>
+              <div class="row"><div class="k">Анализ ритмов по каналам</div><div class="v">
+                посчитано {len(self.analysis_cache)}, из кэша {self.analysis_cache.hits}</div></div>
+            </div>
             """
             self.info_panel.performance_text.setHtml(self._html_page("Мониторинг", body))
         except Exception as e:
@@ -792,4 +782,46 @@ class VisualizationMethods:
         </div>
         """
         self.info_panel.performance_text.setHtml(self._html_page("Отчёт", body))
-        self.info_panel.info_tabs.setCurrentWidget(self.info_panel.performance_text)
\ No newline at end of file
+        self.info_panel.info_tabs.setCurrentWidget(self.info_panel.performance_text)
+
+    def export_performance_trace(self):
+        from PyQt5.QtWidgets import QFileDialog, QMessageBox
+
+        chrome_filter = "Chrome trace / Perfetto (*.json)"
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Экспорт трассировки", "eeg_trace.json",
+            f"{chrome_filter};;JSON со статистикой (*.json)"
+        )
+        if not file_path:
+            return
+
+        try:
+            trace_format = 'chrome' if selected_filter == chrome_filter else 'json'
+            self.performance_monitor.save_trace(file_path, trace_format)
+            self.statusBar().showMessage(f"Трассировка сохранена: {file_path}")
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", f"Ошибка экспорта трассировки: {e}")
+
+    def show_startup_report(self):
+        from utils.startup import startup_timer
+
+        self.show_performance_report(startup_timer.report())
+
+    def show_import_breakdown(self):
+        from PyQt5.QtWidgets import QMessageBox
+        from gui.threads import import_breakdown_task
+
+        # Замер идет несколько секунд - в пуле задач, окно остается отзывчивым
+        task = self.task_executor.submit("ImportBreakdownTask", import_breakdown_task, 'main',
+                                         key='import_breakdown')
+        task.info_signal.connect(self.statusBar().showMessage)
+        task.result_signal.connect(self.on_import_breakdown_ready)
+        task.error_signal.connect(
+            lambda error: QMessageBox.critical(self, "Ошибка", f"Ошибка замера импорта: {error}"))
+
+    def on_import_breakdown_ready(self, breakdown):
+        from utils.startup import startup_timer
+
+        self.statusBar().clearMessage()
+        self.show_performance_report(
+            f"{startup_timer.report()}\n\nИМПОРТ МОДУЛЕЙ (python -X importtime, чистый процесс)\n{breakdown}")
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный тест real-time тракта без GUI: драйвер -> контроллер -> буфер -> запись в CSV.
+
+Запуск:
+    python benchmarks/realtime_load_test.py --channels 8 --rate 1000 --duration 5
+    python benchmarks/realtime_load_test.py --channels 32 --find-max
+    python benchmarks/realtime_load_test.py --channels 8 --unthrottled
+
+Сообщает доставленную частоту отсчетов, потери пакетов и задержки; в режиме --find-max
+удваивает частоту, пока тракт справляется без потерь.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Добавляем родительскую директорию в Python path для импорта модулей
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import QCoreApplication, QTimer
+
+from realtime_work.realtime_controller import RealtimeEEGController, RealtimeDataBuffer
+from realtime_work.realtime_driver import SyntheticBlockEEGDriver
+from realtime_work.realtime_recorder import RealtimeEEGRecorder
+
+# Доля целевой частоты, которую драйвер должен сгенерировать, чтобы тракт считался устойчивым
+SUSTAINED_RATIO = 0.95
+
+# Допустимый хвост недоставленных пакетов в конце прогона
+MAX_BACKLOG_BATCHES = 2
+
+
+def run_load_test(sample_rate, n_channels, duration=5.0, batch_size=64, realtime=True, record=True):
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+
+    driver = SyntheticBlockEEGDriver(sample_rate_hz=sample_rate, n_channels=n_channels,
+                                     realtime=realtime, seed=0)
+    controller = RealtimeEEGController(driver, batch_size=batch_size)
+    buffer = RealtimeDataBuffer(max_duration_seconds=duration + 1)
+    recorder = RealtimeEEGRecorder()
+
+    delivered = {'samples': 0}
+
+    def on_batch(batch):
+        buffer.add_batch(batch)
+        controller.latency_monitor.on_batch_buffered(batch)
+        if record:
+            recorder.write_batch(batch)
+        delivered['samples'] += len(batch.samples)
+
+    controller.data_received.connect(on_batch)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if record:
+            recorder.start_recording(os.path.join(tmp_dir, 'load_test.csv'))
+
+        start = time.perf_counter()
+        controller.start()
+        QTimer.singleShot(int(duration * 1000), app.quit)
+        app.exec_()
+        controller.stop()
+        elapsed = time.perf_counter() - start
+
+        if record:
+            recorder.stop_recording()
+
+    stats = controller.get_statistics()
+    latency = controller.get_latency_statistics()['hops']
+    delivered_rate = delivered['samples'] / elapsed
+    generated_rate = stats['samples_received'] / elapsed
+    backlog = stats['samples_received'] - delivered['samples']
+
+    return {
+        'target_rate': sample_rate if realtime else None,
+        'channels': n_channels,
+        'batch_size': batch_size,
+        'duration': elapsed,
+        'generated_samples': stats['samples_received'],
+        'delivered_samples': delivered['samples'],
+        'generated_rate': generated_rate,
+        'delivered_rate': delivered_rate,
+        'backlog_samples': backlog,
+        'batches_dropped': stats['batches_dropped'],
+        'max_queue_size': stats['max_queue_size'],
+        'queue_wait_p95_ms': latency['queue_wait']['p95'],
+        'sustained': (stats['batches_dropped'] == 0
+                      and backlog <= MAX_BACKLOG_BATCHES * batch_size
+                      and (not realtime or generated_rate >= SUSTAINED_RATIO * sample_rate))
+    }
+
+
+def find_max_throughput(n_channels, start_rate=250, max_rate=256000, duration=3.0, batch_size=64, record=True):
+    results = []
+    rate = start_rate
+    best = None
+
+    while rate <= max_rate:
+        result = run_load_test(rate, n_channels, duration, batch_size, record=record)
+        results.append(result)
+        print_result(result)
+
+        if not result['sustained']:
+            break
+        best = rate
+        rate *= 2
+
+    return best, results
+
+
+def print_result(result):
+    target = f"{result['target_rate']:g} Гц" if result['target_rate'] else "без ограничения"
+    status = "OK" if result['sustained'] else "НЕ СПРАВЛЯЕТСЯ"
+    print(f"  {target:>16} x {result['channels']:>3} кан: доставлено {result['delivered_rate']:10.0f} отсч/с, "
+          f"потеряно пакетов {result['batches_dropped']:>5}, очередь макс {result['max_queue_size']:>3}, "
+          f"ожидание p95 {result['queue_wait_p95_ms']:7.1f} мс  [{status}]")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест real-time тракта ЭЭГ")
+    parser.add_argument('--channels', type=int, default=1, help="Число каналов")
+    parser.add_argument('--rate', type=float, default=1000.0, help="Частота дискретизации, Гц")
+    parser.add_argument('--duration', type=float, default=5.0, help="Длительность прогона, с")
+    parser.add_argument('--batch-size', type=int, default=64, help="Размер пакета контроллера")
+    parser.add_argument('--unthrottled', action='store_true', help="Драйвер без задержек (максимальная скорость)")
+    parser.add_argument('--find-max', action='store_true', help="Поиск максимальной устойчивой частоты")
+    parser.add_argument('--no-record', action='store_true', help="Не писать данные в CSV")
+    parser.add_argument('--output', help="Путь для JSON с результатами")
+    args = parser.parse_args()
+
+    record = not args.no_record
+    print(f"=== Нагрузочный тест: {args.channels} каналов, пакет {args.batch_size} ===")
+
+    if args.find_max:
+        best, results = find_max_throughput(args.channels, duration=args.duration,
+                                            batch_size=args.batch_size, record=record)
+        print(f"Максимальная устойчивая частота: {best:g} Гц" if best else "Тракт не справился даже с начальной частотой")
+        report = {'max_sustained_rate': best, 'runs': results}
+    else:
+        result = run_load_test(args.rate, args.channels, args.duration, args.batch_size,
+                               realtime=not args.unthrottled, record=record)
+        print_result(result)
+        report = result
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Результаты сохранены: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Бенчмарки горячих путей обработки и анализа ЭЭГ.
+
+Запуск:
+    python benchmarks/run_benchmarks.py --scale quick
+    python benchmarks/run_benchmarks.py --scale default --output results.json --compare baseline.json
+
+Результаты сохраняются в JSON, сравнение с предыдущим запуском показывает регрессии.
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import scipy
+
+# Добавляем родительскую директорию в Python path для импорта модулей
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from analyzer.analyzer import EEGAnalyzer
+from data_loader.data_loader import EEGDataLoader
+from preprocessor.preprocessor import EEGPreprocessor
+from utils.parallel import ChannelExecutor
+
+# Наборы синтетических данных: (каналы, длительность в секундах, частота дискретизации)
+SCALES = {
+    'quick': [
+        (1, 60, 250),
+        (8, 60, 500),
+    ],
+    'default': [
+        (1, 60, 250),
+        (8, 600, 250),
+        (32, 300, 500),
+        (64, 60, 2000),
+    ],
+    'full': [
+        (1, 60, 250),
+        (8, 600, 500),
+        (32, 1800, 1000),
+        (64, 600, 2000),
+        (256, 60, 1000),
+        (4, 7200, 250),
+    ],
+}
+
+# Отчет строится только для небольших наборов (каналы * отсчеты)
+REPORT_MAX_SIZE = 5_000_000
+
+EMOTION_DIR = os.path.join(ROOT_DIR, 'emotion_6')
+
+
+def time_call(func, repeat):
+    # Первый вызов - прогрев (кеши фильтров, импорты), в статистику не входит
+    func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+class BenchmarkSuite:
+
+    def __init__(self, repeat=3, executor='serial', only=None):
+        self.repeat = repeat
+        self.only = only
+        self.executor = ChannelExecutor(executor)
+        self.data_loader = EEGDataLoader()
+        self.preprocessor = EEGPreprocessor(executor=self.executor)
+        self.analyzer = EEGAnalyzer(executor=self.executor)
+        self.results = []
+
+    def run_case(self, name, params, func):
+        if self.only and self.only not in name:
+            return
+
+        try:
+            times = time_call(func, self.repeat)
+        except Exception as e:
+            print(f"  ✗ {name} {params}: {e}")
+            self.results.append({'name': name, 'params': params, 'error': str(e)})
+            return
+
+        result = {
+            'name': name,
+            'params': params,
+            'times': times,
+            'min': min(times),
+            'median': statistics.median(times),
+            'mean': statistics.mean(times),
+            'stdev': statistics.stdev(times) if len(times) > 1 else 0.0
+        }
+        self.results.append(result)
+        print(f"  {name:<22} {self._format_params(params):<32} min {result['min'] * 1000:10.2f} мс"
+              f"  медиана {result['median'] * 1000:10.2f} мс")
+
+    @staticmethod
+    def _format_params(params):
+        return ", ".join(f"{key}={value}" for key, value in params.items())
+
+    def run_dataset(self, data, sampling_rate, params):
+        processed = self.preprocessor.apply_filters(data, sampling_rate)
+
+        self.run_case('filter', params, lambda: self.preprocessor.apply_filters(data, sampling_rate))
+        self.run_case('artifact_removal', params, lambda: self.preprocessor.remove_artifacts(processed))
+        self.run_case('rhythm_analysis', params, lambda: self.analyzer.analyze_rhythms(processed, sampling_rate, 0))
+        self.run_case('statistics', params, lambda: self.analyzer.calculate_statistics(processed))
+
+        if data.shape[0] > 1:
+            self.run_case('coherence', params,
+                          lambda: self.analyzer.calculate_coherence(processed, 0, 1, sampling_rate))
+
+        if data.size <= REPORT_MAX_SIZE:
+            self.run_case('report', params, lambda: self._generate_report(data, processed, sampling_rate))
+
+    def _generate_report(self, data, processed, sampling_rate):
+        from report_generator.report_generator import EEGReportGenerator
+
+        analysis = self.analyzer.analyze_rhythms(processed, sampling_rate, 0)
+        # Страницы рисуются выбранным для прогона исполнителем (--executor)
+        generator = EEGReportGenerator(executor=self.executor)
+        generator.set_data(
+            raw_data=data, processed_data=processed, analysis_results=analysis,
+            sampling_rate=sampling_rate, channel_names=[f'Ch{i}' for i in range(data.shape[0])],
+            recommendations=self.analyzer.get_rhythm_recommendations(analysis)
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            if not generator.generate_report(os.path.join(tmp_dir, 'report.pdf')):
+                raise RuntimeError("Не удалось создать отчет")
+
+    def run_synthetic(self, scale):
+        for n_channels, duration, sampling_rate in SCALES[scale]:
+            params = {'channels': n_channels, 'duration_s': duration, 'fs': sampling_rate}
+            print(f"\n=== Синтетические данные: {self._format_params(params)} ===")
+
+            np.random.seed(0)
+            data, sampling_rate, _ = self.data_loader.generate_test_data(
+                duration=duration, sampling_rate=sampling_rate, n_channels=n_channels
+            )
+            self.run_dataset(data, sampling_rate, params)
+
+    def run_emotion(self):
+        files = sorted(glob.glob(os.path.join(EMOTION_DIR, '*.csv')))
+        if not files:
+            print("\nНаборы emotion_6 не найдены, пропускаем")
+            return
+
+        for file_path in files:
+            params = {'file': os.path.basename(file_path)}
+            print(f"\n=== emotion_6: {params['file']} ===")
+
+            self.run_case('load_csv', params, lambda: self.data_loader.load_data(file_path))
+            data, sampling_rate, _ = self.data_loader.load_data(file_path)
+            self.run_dataset(data, sampling_rate, params)
+
+    def to_json(self, scale):
+        return {
+            'metadata': {
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'revision': git_revision(),
+                'scale': scale,
+                'repeat': self.repeat,
+                'executor': self.executor.backend,
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'scipy': scipy.__version__,
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count()
+            },
+            'results': self.results
+        }
+
+
+def result_key(result):
+    return result['name'], json.dumps(result['params'], sort_keys=True)
+
+
+def compare_results(current, baseline, threshold):
+    baseline_results = {result_key(result): result for result in baseline['results'] if 'min' in result}
+
+    print(f"\n=== Сравнение с {baseline['metadata'].get('revision') or 'базовым запуском'} ===")
+    regressions = []
+    for result in current['results']:
+        previous = baseline_results.get(result_key(result))
+        if previous is None or 'min' not in result:
+            continue
+
+        ratio = result['min'] / previous['min'] if previous['min'] > 0 else float('inf')
+        marker = "  РЕГРЕССИЯ" if ratio > threshold else ("  ускорение" if ratio < 1 / threshold else "")
+        print(f"  {result['name']:<22} {BenchmarkSuite._format_params(result['params']):<32} x{ratio:6.2f}{marker}")
+        if ratio > threshold:
+            regressions.append(result)
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки обработки и анализа ЭЭГ")
+    parser.add_argument('--scale', choices=sorted(SCALES), default='quick', help="Набор размеров данных")
+    parser.add_argument('--repeat', type=int, default=3, help="Число замеров на случай")
+    parser.add_argument('--executor', choices=ChannelExecutor.BACKENDS, default='serial',
+                        help="Исполнитель поканальных блоков")
+    parser.add_argument('--only', help="Запускать только случаи, содержащие подстроку")
+    parser.add_argument('--no-emotion', action='store_true', help="Не использовать записи emotion_6")
+    parser.add_argument('--output', help="Путь для JSON с результатами")
+    parser.add_argument('--compare', help="JSON предыдущего запуска для сравнения")
+    parser.add_argument('--threshold', type=float, default=1.2, help="Порог регрессии (отношение времен)")
+    args = parser.parse_args()
+
+    suite = BenchmarkSuite(repeat=args.repeat, executor=args.executor, only=args.only)
+    try:
+        suite.run_synthetic(args.scale)
+        if not args.no_emotion:
+            suite.run_emotion()
+    finally:
+        suite.executor.shutdown()
+
+    report = suite.to_json(args.scale)
+
+    output = args.output or os.path.join(
+        ROOT_DIR, 'benchmarks', 'results', f"{datetime.now():%Y%m%d_%H%M%S}_{args.scale}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nРезультаты сохранены: {output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare_results(report, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Пропускная способность SerialEEGDriver на виртуальном serial порту (pty, только Linux/macOS).
+
+Запуск:
+    python benchmarks/serial_throughput.py --rate 250 --duration 5
+    python benchmarks/serial_throughput.py --rate 4000 --corruption 0.01 --jitter 2 --bursts 0.05
+    python benchmarks/serial_throughput.py --source emotion_6/2.csv --rate 1000
+
+Сообщает число отправленных, разобранных и потерянных строк, а также скорость разбора
+строк без порта (чистый _parse_line).
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+# Добавляем родительскую директорию в Python path для импорта модулей
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from realtime_work.realtime_driver import SerialEEGDriver
+from realtime_work.virtual_serial import VirtualSerialPort, emotion_source, synthetic_source
+
+
+def measure_parse_rate(n_lines=200000):
+    driver = SerialEEGDriver(port='virtual')
+    lines = [f"{i / 250:.3f},{512 + i % 100}".encode('ascii') for i in range(n_lines)]
+
+    start = time.perf_counter()
+    parsed = sum(1 for line in lines if driver._parse_line(line) is not None)
+    elapsed = time.perf_counter() - start
+
+    return parsed / elapsed
+
+
+def run_serial_test(sample_rate, duration=5.0, source=None, jitter_ms=0.0, corruption_rate=0.0,
+                    burst_probability=0.0, driver_rate=None):
+    port = VirtualSerialPort(source=source, sample_rate_hz=sample_rate, jitter_ms=jitter_ms,
+                             corruption_rate=corruption_rate, burst_probability=burst_probability, seed=0)
+    port.start()
+
+    # Частота опроса драйвера: по умолчанию совпадает с частотой устройства
+    driver = SerialEEGDriver(port=port.port_name, sample_rate_hz=driver_rate or sample_rate)
+    parsed = []
+
+    try:
+        driver.open()
+        # Строки, отправленные во время открытия порта драйвером, не учитываем
+        sent_before = port.lines_sent
+        dropped_before = port.lines_dropped
+        corrupted_before = port.lines_corrupted
+
+        def stop_later():
+            time.sleep(duration)
+            driver._running = False
+
+        threading.Thread(target=stop_later, daemon=True).start()
+
+        start = time.perf_counter()
+        for sample in driver.iter_samples():
+            parsed.append(sample)
+        elapsed = time.perf_counter() - start
+        sent = port.lines_sent - sent_before
+        dropped = port.lines_dropped - dropped_before
+        corrupted = port.lines_corrupted - corrupted_before
+    finally:
+        driver.close()
+        port.stop()
+
+    # Метки времени скетча округлены до 1 мс, поэтому разрыв - не меньше 1.5 мс
+    max_step = max(1.5 / sample_rate, 0.0015)
+    timestamps = [sample.timestamp for sample in parsed]
+    gaps = sum(1 for a, b in zip(timestamps, timestamps[1:]) if b - a > max_step)
+
+    return {
+        'sample_rate': sample_rate,
+        'duration': elapsed,
+        'lines_sent': sent,
+        'samples_parsed': len(parsed),
+        'parsed_rate': len(parsed) / elapsed if elapsed > 0 else 0.0,
+        'lines_corrupted': corrupted,
+        'lines_dropped_by_port': dropped,
+        'timestamp_gaps': gaps,
+        'bursts': port.bursts
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пропускная способность serial драйвера на виртуальном порту")
+    parser.add_argument('--rate', type=float, default=250.0, help="Частота отсчетов устройства, Гц")
+    parser.add_argument('--driver-rate', type=float, help="Частота опроса драйвера (по умолчанию = --rate)")
+    parser.add_argument('--duration', type=float, default=5.0, help="Длительность прогона, с")
+    parser.add_argument('--source', help="CSV из emotion_6 для воспроизведения (по умолчанию синтетика)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Джиттер отправки, мс")
+    parser.add_argument('--corruption', type=float, default=0.0, help="Доля испорченных строк")
+    parser.add_argument('--bursts', type=float, default=0.0, help="Вероятность пачечной выдачи на пакет")
+    parser.add_argument('--output', help="Путь для JSON с результатами")
+    args = parser.parse_args()
+
+    source = emotion_source(args.source) if args.source else synthetic_source(args.rate, seed=0)
+
+    print(f"Разбор строк без порта: {measure_parse_rate():.0f} строк/с")
+    result = run_serial_test(args.rate, args.duration, source, args.jitter, args.corruption,
+                             args.bursts, args.driver_rate)
+
+    print(f"Отправлено: {result['lines_sent']}, разобрано: {result['samples_parsed']} "
+          f"({result['parsed_rate']:.0f} отсч/с), испорчено: {result['lines_corrupted']}, "
+          f"потеряно в порту: {result['lines_dropped_by_port']}, разрывов по времени: {result['timestamp_gaps']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"Результаты сохранены: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,17 @@
 import os
 from datetime import time
 
-import mne
 import numpy as np
-import pandas as pd
-import pyedflib
-from scipy import signal
 
+from utils.lazy_import import lazy_import
 from utils.performance import PerformanceMonitor
 
+# Форматы загружаются библиотеками только при первом файле своего типа
+mne = lazy_import('mne')
+pd = lazy_import('pandas')
+pyedflib = lazy_import('pyedflib')
+signal = lazy_import('scipy.signal')
+
 
 class EEGDataLoader:
 
@@ -73,6 +73,10 @@ class EEGMenuBar:
         test_action.triggered.connect(self.parent.generate_test_data)
         file_menu.addAction(test_action)
 
+        trace_action = QAction(' Экспорт &трассировки...', self.parent)
+        trace_action.triggered.connect(self.parent.export_performance_trace)
+        file_menu.addAction(trace_action)
+
         file_menu.addSeparator()
 
         exit_action = QAction(' В&ыход', self.parent)
@@ -99,6 +103,16 @@ class EEGMenuBar:
     def create_help_menu(self, menubar):
         help_menu = menubar.addMenu('&Справка')
 
+        startup_action = QAction(' &Время запуска', self.parent)
+        startup_action.triggered.connect(self.parent.show_startup_report)
+        help_menu.addAction(startup_action)
+
+        imports_action = QAction(' &Импорт модулей (-X importtime)', self.parent)
+        imports_action.triggered.connect(self.parent.show_import_breakdown)
+        help_menu.addAction(imports_action)
+
+        help_menu.addSeparator()
+
         about_action = QAction(' &О программе', self.parent)
         about_action.triggered.connect(self.show_about)
         help_menu.addAction(about_action)
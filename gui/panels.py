@@ -568,9 +568,25 @@ class ProcessingPanel(QWidget):
         self.artifacts_check = QCheckBox("Удалять артефакты (по порогу)")
         self.artifacts_check.setChecked(True)
 
+        self.ica_check = QCheckBox("ICA (глазные / мышечные компоненты)")
+        self.ica_check.setChecked(False)
+
         go.addWidget(self.detrend_check)
         go.addWidget(self.remove_dc_check)
         go.addWidget(self.artifacts_check)
+        go.addWidget(self.ica_check)
+
+        self.wavelet_check = QCheckBox("Вейвлет-денойзинг")
+        self.wavelet_check.setChecked(False)
+
+        self.wavelet_method_combo = QComboBox()
+        self.wavelet_method_combo.addItem("Универсальный порог", 'universal')
+        self.wavelet_method_combo.addItem("SURE", 'sure')
+
+        wavelet_row = QHBoxLayout()
+        wavelet_row.addWidget(self.wavelet_check)
+        wavelet_row.addWidget(self.wavelet_method_combo)
+        go.addLayout(wavelet_row)
 
         hint = QLabel("Совет: сначала HPF/LPF, потом Detrend/DC, затем артефакты.")
         hint.setObjectName("muted")
@@ -0,0 +1,219 @@
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+
+
+class TaskCancelled(Exception):
+    """Задача отменена или заменена более новой с тем же ключом"""
+
+
+class TaskContext:
+    """Передается задаче первым аргументом: сообщения, прогресс и точки отмены.
+
+    Отмена кооперативная - задача прерывается на ближайшем вызове info/progress/check_cancelled.
+    """
+
+    def __init__(self, executor, future):
+        self._executor = executor
+        self._future = future
+
+    @property
+    def cancelled(self):
+        return self._future.cancel_requested
+
+    def check_cancelled(self):
+        if self._future.cancel_requested:
+            raise TaskCancelled(self._future.name)
+
+    def info(self, message):
+        self.check_cancelled()
+        self._executor._task_event.emit(self._future, 'info', message)
+
+    def progress(self, value):
+        self.check_cancelled()
+        self._executor._task_event.emit(self._future, 'progress', int(value))
+
+
+class TaskFuture(QObject):
+    """Результат фоновой задачи. Сигналы всегда приходят в GUI-поток."""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FINISHED = 'finished'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+    result_signal = pyqtSignal(object)
+    error_signal = pyqtSignal(str)
+    info_signal = pyqtSignal(str)
+    progress_signal = pyqtSignal(int)
+    cancelled_signal = pyqtSignal()
+
+    def __init__(self, task_id, name, key=None, background=False):
+        super().__init__()
+        self.task_id = task_id
+        self.name = name
+        self.key = key
+        self.background = background
+        self.state = self.PENDING
+        self.cancel_requested = False
+        self._result = None
+        self._error = None
+        self._done_event = threading.Event()
+        self._delivered = False
+
+    def cancel(self):
+        """Запрос отмены; результат уже выполняющейся задачи будет отброшен"""
+        if self._delivered:
+            return False
+        self.cancel_requested = True
+        return True
+
+    def done(self):
+        return self._done_event.is_set()
+
+    def cancelled(self):
+        return self.state == self.CANCELLED
+
+    def result(self, timeout=None):
+        """Блокирующее ожидание результата (для тестов и кода вне GUI-потока)"""
+        if not self._done_event.wait(timeout):
+            raise TimeoutError(f"Задача {self.name} не завершилась за {timeout} с")
+        if self.state == self.CANCELLED:
+            raise TaskCancelled(self.name)
+        if self.state == self.FAILED:
+            raise self._error
+        return self._result
+
+    def _finish(self, state, result=None, error=None):
+        self._result = result
+        self._error = error
+        self.state = state
+        self._done_event.set()
+
+    def __repr__(self):
+        return f"<TaskFuture {self.name}#{self.task_id} ({self.state})>"
+
+
+class GuiTaskExecutor(QObject):
+    """Долгоживущий пул потоков для фоновых задач GUI.
+
+    Задачи с одинаковым ключом объединяются: новая задача отменяет предыдущую, еще
+    не начатая отмененная задача не запускается вовсе, а результат уже выполняющейся
+    отбрасывается. Результаты, сообщения и прогресс доставляются через один сигнал
+    с очередью, поэтому обработчики выполняются в GUI-потоке и подключать их к
+    future можно сразу после submit() - ни одно событие не потеряется.
+
+    Фоновые задачи (background=True) не входят в foreground_count и active_changed:
+    пользователь их не ждет, и кнопка отмены в строке состояния их не показывает.
+    """
+
+    # Число задач пользователя в очереди и в работе (для индикатора в строке состояния)
+    active_changed = pyqtSignal(int)
+
+    _task_event = pyqtSignal(object, str, object)
+
+    def __init__(self, max_workers=2, parent=None):
+        super().__init__(parent)
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='gui-task')
+        self._ids = itertools.count(1)
+        # Незавершенные задачи: ссылка удерживает future до доставки результата
+        self._active = {}
+        self._latest = {}
+        # Меняется только в GUI-потоке; читать можно из задач (например, чтобы уступить пул)
+        self._foreground = 0
+        self._task_event.connect(self._on_task_event)
+
+    @property
+    def active_count(self):
+        return len(self._active)
+
+    @property
+    def foreground_count(self):
+        return self._foreground
+
+    def submit(self, name, func, *args, key=None, background=False, **kwargs):
+        """Запуск func(context, *args, **kwargs) в пуле; возвращает TaskFuture"""
+        if key is not None:
+            self.cancel(key)
+
+        future = TaskFuture(next(self._ids), name, key, background)
+        self._active[future.task_id] = future
+        if key is not None:
+            self._latest[key] = future
+
+        self._pool.submit(self._run, future, func, args, kwargs)
+        if not background:
+            self._foreground += 1
+            self.active_changed.emit(self._foreground)
+        return future
+
+    def cancel(self, key):
+        future = self._latest.get(key)
+        return future.cancel() if future is not None else False
+
+    def cancel_all(self, background=True):
+        """Отмена всех задач; background=False оставляет фоновые"""
+        for future in list(self._active.values()):
+            if background or not future.background:
+                future.cancel()
+
+    def is_running(self, key):
+        future = self._latest.get(key)
+        return future is not None and not future.cancel_requested and future.task_id in self._active
+
+    def shutdown(self, wait=False):
+        self.cancel_all()
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(self, future, func, args, kwargs):
+        # Выполняется в рабочем потоке
+        if future.cancel_requested:
+            future._finish(TaskFuture.CANCELLED)
+            self._task_event.emit(future, 'done', None)
+            return
+
+        # Потоки пула постоянные: в трассировке PerformanceMonitor они видны как gui-task_N
+        future.state = TaskFuture.RUNNING
+        try:
+            result = func(TaskContext(self, future), *args, **kwargs)
+            if future.cancel_requested:
+                future._finish(TaskFuture.CANCELLED)
+            else:
+                future._finish(TaskFuture.FINISHED, result=result)
+        except TaskCancelled:
+            future._finish(TaskFuture.CANCELLED)
+        except Exception as e:
+            future._finish(TaskFuture.FAILED, error=e)
+        self._task_event.emit(future, 'done', None)
+
+    @pyqtSlot(object, str, object)
+    def _on_task_event(self, future, kind, payload):
+        # GUI-поток: отмена, запрошенная после завершения задачи, но до доставки, тоже учитывается
+        if kind != 'done':
+            if not future.cancel_requested:
+                if kind == 'info':
+                    future.info_signal.emit(payload)
+                else:
+                    future.progress_signal.emit(payload)
+            return
+
+        future._delivered = True
+        self._active.pop(future.task_id, None)
+        if self._latest.get(future.key) is future:
+            del self._latest[future.key]
+        if not future.background:
+            self._foreground -= 1
+
+        if future.cancel_requested or future.state == TaskFuture.CANCELLED:
+            future.state = TaskFuture.CANCELLED
+            future.cancelled_signal.emit()
+        elif future.state == TaskFuture.FAILED:
+            future.error_signal.emit(str(future._error))
+        else:
+            future.result_signal.emit(future._result)
+        if not future.background:
+            self.active_changed.emit(self._foreground)
@@ -1,151 +1,106 @@
 import time
 
 import numpy as np
-import serial
 from PyQt5.QtCore import QThread, pyqtSignal
-from scipy import signal as sp_signal
 
-
-class DataLoadThread(QThread):
-    progress_signal = pyqtSignal(int)
-    result_signal = pyqtSignal(tuple)
-    error_signal = pyqtSignal(str)
-    info_signal = pyqtSignal(str)
-
-    def __init__(self, file_path, data_loader):
-        super().__init__()
-        self.file_path = file_path
-        self.data_loader = data_loader
-
-    def run(self):
-        try:
-            self.info_signal.emit("Начало загрузки данных...")
-            data, sampling_rate, channel_names = self.data_loader.load_data(self.file_path)
-            self.info_signal.emit("Данные успешно загружены!")
-            self.result_signal.emit((data, sampling_rate, channel_names))
-        except Exception as e:
-            self.error_signal.emit(str(e))
-
-
-class ProcessingThread(QThread):
-    progress_signal = pyqtSignal(int)
-    result_signal = pyqtSignal(object)
-    error_signal = pyqtSignal(str)
-    info_signal = pyqtSignal(str)
-
-    def __init__(self, preprocessor, data, sampling_rate, processing_params):
-        super().__init__()
-        self.preprocessor = preprocessor
-        self.data = data
-        self.sampling_rate = sampling_rate
-        self.processing_params = processing_params
-
-    def run(self):
-        try:
-            self.info_signal.emit("Начало обработки сигнала...")
-            processed_data = self.preprocessor.apply_filters(self.data, self.sampling_rate,
-                                                             self.processing_params['low_freq'],
-                                                             self.processing_params['high_freq'],
-                                                             self.processing_params['notch_freq'])
-            if self.processing_params['detrend']:
-                self.info_signal.emit("Удаление тренда...")
-                processed_data = self.preprocessor.detrend_signal(processed_data)
-            if self.processing_params['remove_dc']:
-                self.info_signal.emit("Удаление постоянной составляющей...")
-                processed_data = self.preprocessor.remove_dc_offset(processed_data)
-            if self.processing_params['remove_artifacts']:
-                self.info_signal.emit("Удаление артефактов...")
-                processed_data = self.preprocessor.remove_artifacts(processed_data,
-                                                                    self.processing_params['artifact_threshold'])
-            self.info_signal.emit("Обработка завершена!")
-            self.result_signal.emit(processed_data)
-        except Exception as e:
-            self.error_signal.emit(str(e))
-
-
-class AnalysisThread(QThread):
-    progress_signal = pyqtSignal(int)
-    result_signal = pyqtSignal(dict)
-    error_signal = pyqtSignal(str)
-    info_signal = pyqtSignal(str)
-
-    def __init__(self, analyzer, data, sampling_rate, channel_idx):
-        super().__init__()
-        self.analyzer = analyzer
-        self.data = data
-        self.sampling_rate = sampling_rate
-        self.channel_idx = channel_idx
-
-    def run(self):
-        try:
-            self.info_signal.emit("Анализ ритмов ЭЭГ...")
-            analysis_result = self.analyzer.analyze_rhythms(self.data, self.sampling_rate, self.channel_idx)
-            recommendations = self.analyzer.get_rhythm_recommendations(analysis_result)
-            result = {'analysis': analysis_result, 'recommendations': recommendations, 'channel_idx': self.channel_idx}
-            self.info_signal.emit("Анализ завершен!")
-            self.result_signal.emit(result)
-        except Exception as e:
-            self.error_signal.emit(str(e))
-
-
-class SingleRhythmAnalysisThread(QThread):
-    result_signal = pyqtSignal(dict)
-    error_signal = pyqtSignal(str)
-    info_signal = pyqtSignal(str)
-
-    def __init__(self, analyzer, data, sampling_rate, channel_idx, rhythm_name):
-        super().__init__()
-        self.analyzer = analyzer
-        self.data = data
-        self.sampling_rate = sampling_rate
-        self.channel_idx = channel_idx
-        self.rhythm_name = rhythm_name
-
-    def run(self):
-        try:
-            self.info_signal.emit(f"Анализ ритма {self.rhythm_name}...")
-            rhythm_bands = {'дельта': (0.5, 4), 'тета': (4, 8), 'альфа': (8, 13), 'бета': (13, 30), 'гамма': (30, 100)}
-            if self.rhythm_name not in rhythm_bands:
-                raise ValueError(f"Неизвестный ритм: {self.rhythm_name}")
-            low_freq, high_freq = rhythm_bands[self.rhythm_name]
-            channel_data = self.data[self.channel_idx]
-            freqs, psd = sp_signal.welch(channel_data, fs=self.sampling_rate, nperseg=min(256, len(channel_data)))
-            freq_mask = (freqs >= low_freq) & (freqs <= high_freq)
-            rhythm_freqs = freqs[freq_mask]
-            rhythm_psd = psd[freq_mask]
-            rhythm_power = np.trapezoid(rhythm_psd, rhythm_freqs)
-            total_power = np.trapezoid(psd, freqs)
-            relative_power = rhythm_power / total_power if total_power > 0 else 0
-            peak_idx = np.argmax(rhythm_psd)
-            peak_freq = rhythm_freqs[peak_idx]
-            # Добавляем информацию для визуализации
-            result = {
-                'rhythm_name': self.rhythm_name,
-                'channel_idx': self.channel_idx,
-                'freqs': rhythm_freqs,
-                'psd': rhythm_psd,
+from utils.lazy_import import lazy_import
+from utils.startup import format_import_breakdown, import_breakdown
+
+serial = lazy_import('serial')
+sp_signal = lazy_import('scipy.signal')
+
+# Задачи для GuiTaskExecutor: первым аргументом приходит TaskContext (сообщения, прогресс, отмена)
+
+def load_data_task(context, data_loader, file_path):
+    context.info("Начало загрузки данных...")
+    data, sampling_rate, channel_names = data_loader.load_data(file_path)
+    context.info("Данные успешно загружены!")
+    return data, sampling_rate, channel_names
+
+
+def compute_node(context, graph, node_name):
+    """Значение узла графа с прогрессом по пересчитываемым узлам; между узлами - точки отмены"""
+    stale = graph.stale_nodes(node_name)
+    completed = [0]
+
+    def before_compute(node):
+        context.progress(100 * completed[0] // max(len(stale), 1))
+        completed[0] += 1
+        if node.description:
+            context.info(node.description)
+
+    context.progress(0)
+    value = graph.get(node_name, before_compute)
+    context.progress(100)
+    return value
+
+
+def processing_task(context, graph, performance_monitor):
+    # Входы графа (данные и параметры этапов) выставлены GUI-потоком перед запуском
+    context.info("Начало обработки сигнала...")
+    with performance_monitor.measure("Обработка сигнала"):
+        stale = graph.stale_nodes('processed')
+        processed_data = compute_node(context, graph, 'processed')
+        # Маска - из того же хранимого результата удаления артефактов, без пересчета этапов
+        artifact_mask = graph.get('artifact_mask')
+    context.info(f"Обработка завершена! Пересчитано этапов: {sum(1 for name in stale if name != 'processed')}")
+    return processed_data, artifact_mask
+
+
+def analysis_task(context, graph):
+    result = compute_node(context, graph, 'rhythms')
+    context.info("Анализ завершен!")
+    return result
+
+
+def import_breakdown_task(context, module='main'):
+    # Отдельный процесс с -X importtime: несколько секунд, текущий запуск не затрагивает
+    context.info(f"Замер импорта {module} в отдельном процессе...")
+    return format_import_breakdown(import_breakdown(module))
+
+
+def single_rhythm_task(context, data, sampling_rate, channel_idx, rhythm_name):
+    context.info(f"Анализ ритма {rhythm_name}...")
+    rhythm_bands = {'дельта': (0.5, 4), 'тета': (4, 8), 'альфа': (8, 13), 'бета': (13, 30), 'гамма': (30, 100)}
+    if rhythm_name not in rhythm_bands:
+        raise ValueError(f"Неизвестный ритм: {rhythm_name}")
+    low_freq, high_freq = rhythm_bands[rhythm_name]
+    channel_data = data[channel_idx]
+    freqs, psd = sp_signal.welch(channel_data, fs=sampling_rate, nperseg=min(256, len(channel_data)))
+    freq_mask = (freqs >= low_freq) & (freqs <= high_freq)
+    rhythm_freqs = freqs[freq_mask]
+    rhythm_psd = psd[freq_mask]
+    rhythm_power = np.trapezoid(rhythm_psd, rhythm_freqs)
+    total_power = np.trapezoid(psd, freqs)
+    relative_power = rhythm_power / total_power if total_power > 0 else 0
+    peak_idx = np.argmax(rhythm_psd)
+    peak_freq = rhythm_freqs[peak_idx]
+    # Добавляем информацию для визуализации
+    result = {
+        'rhythm_name': rhythm_name,
+        'channel_idx': channel_idx,
+        'freqs': rhythm_freqs,
+        'psd': rhythm_psd,
+        'power': rhythm_power,
+        'relative_power': relative_power,
+        'peak_freq': peak_freq,
+        'freq_range': (low_freq, high_freq),
+        # Добавляем полный спектр для визуализации
+        'frequencies': freqs,
+        'power_spectrum': psd,
+        # Добавляем информацию о ритмах для графика
+        'rhythm_powers': {rhythm_name: rhythm_power},
+        'rhythm_analysis': {
+            rhythm_name: {
                 'power': rhythm_power,
                 'relative_power': relative_power,
-                'peak_freq': peak_freq,
-                'freq_range': (low_freq, high_freq),
-                # Добавляем полный спектр для визуализации
-                'frequencies': freqs,
-                'power_spectrum': psd,
-                # Добавляем информацию о ритмах для графика
-                'rhythm_powers': {self.rhythm_name: rhythm_power},
-                'rhythm_analysis': {
-                    self.rhythm_name: {
-                        'power': rhythm_power,
-                        'relative_power': relative_power,
-                        'dominant_frequency': peak_freq,
-                        'frequency_range': (low_freq, high_freq)
-                    }
-                }
+                'dominant_frequency': peak_freq,
+                'frequency_range': (low_freq, high_freq)
             }
-            self.info_signal.emit(f"Анализ ритма {self.rhythm_name} завершен!")
-            self.result_signal.emit(result)
-        except Exception as e:
-            self.error_signal.emit(str(e))
+        }
+    }
+    context.info(f"Анализ ритма {rhythm_name} завершен!")
+    return result
 
 
 class SerialRecordingThread(QThread):
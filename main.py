@@ -1,17 +1,36 @@
 import sys
 
+from utils.startup import startup_timer
+
+from PyQt5.QtCore import QTimer
 from PyQt5.QtWidgets import QApplication
 
+startup_timer.mark("Импорт PyQt5")
+
 from app.eeg_app import EEGAnalyzerApp
 from gui.panels import _base_stylesheet
 
+startup_timer.mark("Импорт модулей приложения")
+
+
+def on_first_frame():
+    startup_timer.mark("Первая отрисовка окна")
+    if '--startup-report' in sys.argv:
+        print(startup_timer.report())
+
 
 def main():
     app = QApplication(sys.argv)
     app.setStyle('Fusion')
     app.setStyleSheet(_base_stylesheet())
+    startup_timer.mark("Создание QApplication")
+
     window = EEGAnalyzerApp()
+    startup_timer.mark("Создание главного окна")
     window.show()
+
+    # Срабатывает после обработки первых событий отрисовки
+    QTimer.singleShot(0, on_first_frame)
     sys.exit(app.exec_())
 
 
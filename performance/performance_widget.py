@@ -50,8 +50,5 @@ class PerformanceWidget(QWidget):
         self.memory_label.setText(f"{memory_mb:.1f} MB")
 
         # Общее время обработки всех операций
-        total_time = sum(
-            sum(m['time'] for m in measurements)
-            for measurements in self.performance_monitor.measurements.values()
-        )
+        total_time = self.performance_monitor.get_total_time()
         self.processing_time_label.setText(f"{total_time:.2f} сек")
@@ -1,46 +1,118 @@
+import hashlib
+
 import numpy as np
-import pywt
-from scipy import signal
-from scipy.signal import butter, filtfilt, iirnotch
 
-from utils.filter_validation import FilterValidator
+from utils.filter_design import filter_design_cache
+from utils.lazy_import import lazy_import
+from utils.parallel import ChannelExecutor, default_executor
 from utils.performance import PerformanceMonitor
 
+pywt = lazy_import('pywt')
+signal = lazy_import('scipy.signal')
+stats = lazy_import('scipy.stats')
+
+# Коэффициент перевода MAD в оценку стандартного отклонения для нормального распределения
+MAD_TO_SIGMA = 1.4826
+
+# Параметры обучения ICA: ФВЧ и целевая частота децимированной копии
+ICA_HIGHPASS_HZ = 1.0
+ICA_FIT_RATE_HZ = 128.0
+ICA_CACHE_SIZE = 4
+
+# Параметры обработки по умолчанию (панель обработки приложения, отчеты без GUI)
+DEFAULT_PROCESSING_PARAMS = {
+    'low_freq': 1.0,
+    'high_freq': 40.0,
+    'notch_freq': 50.0,
+    'detrend': True,
+    'remove_dc': True,
+    'remove_artifacts': True,
+    'artifact_threshold': 3.0,
+    'ica': False,
+    'wavelet_denoise': False,
+    'wavelet_method': 'universal',
+    'wavelet_level': 4
+}
+
+# Начиная с этого числа отсчетов (каналы * время) вейвлет-денойзинг идет блоками каналов параллельно
+WAVELET_PARALLEL_MIN_SIZE = 2_000_000
+
 
 class EEGPreprocessor:
 
-    def __init__(self):
+    def __init__(self, executor=None):
         self.performance_monitor = PerformanceMonitor()
+        # Исполнитель поканальных блоков (serial / thread / process)
+        self.executor = executor or default_executor
+        # Матрицы разложения ICA по записям, чтобы не переобучать при смене остальных параметров
+        self._ica_cache = {}
+
+    def process(self, data, sampling_rate, processing_params=None, info_callback=None, progress_callback=None):
+        """Полная цепочка обработки по параметрам панели обработки.
+
+        progress_callback получает процент выполненных этапов (0-100).
+        Возвращает (обработанные данные, маска артефактов или None).
+        """
+        params = dict(DEFAULT_PROCESSING_PARAMS, **(processing_params or {}))
+        info = info_callback or (lambda message: None)
+        progress = progress_callback or (lambda value: None)
+        artifact_mask = None
+
+        # Фильтрация выполняется всегда, остальные этапы - по флагам
+        n_steps = 1 + sum(bool(params.get(flag)) for flag in
+                          ('ica', 'detrend', 'remove_dc', 'wavelet_denoise', 'remove_artifacts'))
+        completed = [0]
+
+        def step_done():
+            completed[0] += 1
+            progress(100 * completed[0] // n_steps)
+
+        progress(0)
+        processed_data = data
+        if params.get('ica'):
+            info("ICA: удаление глазных и мышечных компонент...")
+            processed_data, excluded = self.ica_artifact_removal(
+                processed_data, sampling_rate, return_excluded=True)
+            info(f"ICA: исключено компонент - {len(excluded)}")
+            step_done()
+        processed_data = self.apply_filters(processed_data, sampling_rate,
+                                            params['low_freq'], params['high_freq'], params['notch_freq'])
+        step_done()
+        if params['detrend']:
+            info("Удаление тренда...")
+            processed_data = self.detrend_signal(processed_data)
+            step_done()
+        if params['remove_dc']:
+            info("Удаление постоянной составляющей...")
+            processed_data = self.remove_dc_offset(processed_data)
+            step_done()
+        if params.get('wavelet_denoise'):
+            info("Вейвлет-денойзинг...")
+            processed_data = self.wavelet_denoising(
+                processed_data,
+                level=params.get('wavelet_level', 4),
+                threshold_method=params.get('wavelet_method', 'universal'))
+            step_done()
+        if params['remove_artifacts']:
+            info("Удаление артефактов...")
+            processed_data, artifact_mask = self.remove_artifacts(
+                processed_data, params['artifact_threshold'], return_mask=True)
+            step_done()
+
+        return processed_data, artifact_mask
 
     def apply_filters(self, data, sampling_rate, low_freq=1.0, high_freq=40.0, notch_freq=50.0):
         with self.performance_monitor.measure("Фильтрация"):
-            # Валидация и автокоррекция параметров фильтра
-            validator = FilterValidator()
-
-            # Проверка и коррекция параметров полосового фильтра
-            corrected_low, corrected_high, bp_warnings = validator.validate_bandpass_params(
-                low_freq, high_freq, sampling_rate
-            )
-
-            # Проверка и коррекция параметров notch фильтра
-            corrected_notch, notch_warnings = validator.validate_notch_params(
-                notch_freq, sampling_rate
-            )
-
-            # Вывод предупреждений если параметры были скорректированы
-            all_warnings = bp_warnings + notch_warnings
-            if all_warnings:
-                print("⚠️  АВТОКОРРЕКЦИЯ ПАРАМЕТРОВ ФИЛЬТРА:")
-                for warning in all_warnings:
-                    print(f"   • {warning}")
-                print()
+            # Валидация, автокоррекция и расчет коэффициентов - один раз на набор параметров
+            bandpass = filter_design_cache.get_design('bandpass', (low_freq, high_freq), sampling_rate, 4)
+            notch = filter_design_cache.get_design('notch', notch_freq, sampling_rate, 30)
 
             # Полосовой фильтр с скорректированными параметрами
-            data = self.bandpass_filter(data, sampling_rate, corrected_low, corrected_high)
+            data = self._apply_sos(bandpass.sos, data, "Ошибка применения фильтра")
 
             # Notch фильтр для сети
-            if corrected_notch > 0:
-                data = self.notch_filter(data, sampling_rate, corrected_notch)
+            if notch.params[0] > 0:
+                data = self._apply_sos(notch.sos, data, "Ошибка применения notch фильтра")
 
             return data
 
@@ -57,40 +129,12 @@ class EEGPreprocessor:
         if low_freq >= high_freq:
             raise ValueError(f"Нижняя частота ({low_freq} Гц) должна быть меньше верхней ({high_freq} Гц)")
 
-        # Нормализация частот
-        low = low_freq / nyquist
-        high = high_freq / nyquist
-
-        # Дополнительная проверка нормализованных частот
-        if low <= 0 or low >= 1:
-            raise ValueError(f"Нормализованная нижняя частота {low:.4f} вне допустимого диапазона (0, 1)")
-
-        if high <= 0 or high >= 1:
-            raise ValueError(f"Нормализованная верхняя частота {high:.4f} вне допустимого диапазона (0, 1)")
-
-        # Убеждаемся, что частоты не слишком близки к границам
-        if low < 0.001:
-            low = 0.001
-            print(f"Предупреждение: нижняя частота слишком мала, установлена в {low * nyquist:.2f} Гц")
-
-        if high > 0.999:
-            high = 0.999
-            print(f"Предупреждение: верхняя частота слишком велика, установлена в {high * nyquist:.2f} Гц")
-
-        try:
-            b, a = butter(4, [low, high], btype='band')
-        except Exception as e:
-            raise ValueError(f"Ошибка создания фильтра: {e}. Частоты: low={low:.4f}, high={high:.4f}")
-
-        # Применяем фильтр к каждому каналу
-        filtered_data = np.zeros_like(data)
-        for i in range(data.shape[0]):
-            try:
-                filtered_data[i] = filtfilt(b, a, data[i])
-            except Exception as e:
-                raise ValueError(f"Ошибка применения фильтра к каналу {i}: {e}")
+        # Полосу у границ диапазона корректирует кеш фильтров (скорректированная - в design.params),
+        # предупреждение выводится один раз на набор параметров
+        sos = filter_design_cache.get_sos('bandpass', (low_freq, high_freq), sampling_rate, 4)
 
-        return filtered_data
+        # Применяем фильтр сразу ко всем каналам
+        return self._apply_sos(sos, data, "Ошибка применения фильтра")
 
     def notch_filter(self, data, sampling_rate, notch_freq, quality=30):
         nyquist = sampling_rate / 2
@@ -103,101 +147,259 @@ class EEGPreprocessor:
             raise ValueError(
                 f"Частота notch фильтра ({notch_freq} Гц) должна быть меньше частоты Найквиста ({nyquist} Гц)")
 
-        # Нормализация частоты
-        freq = notch_freq / nyquist
+        # Коррекция частоты у границ диапазона - в кеше фильтров, предупреждение один раз на ключ
+        sos = filter_design_cache.get_sos('notch', notch_freq, sampling_rate, quality)
 
-        # Проверка нормализованной частоты
-        if freq <= 0 or freq >= 1:
-            raise ValueError(f"Нормализованная частота notch фильтра {freq:.4f} вне допустимого диапазона (0, 1)")
-
-        # Убеждаемся, что частота не слишком близка к границам
-        if freq < 0.001:
-            freq = 0.001
-            print(f"Предупреждение: частота notch фильтра слишком мала, установлена в {freq * nyquist:.2f} Гц")
-
-        if freq > 0.999:
-            freq = 0.999
-            print(f"Предупреждение: частота notch фильтра слишком велика, установлена в {freq * nyquist:.2f} Гц")
+        return self._apply_sos(sos, data, "Ошибка применения notch фильтра")
 
+    def _apply_sos(self, sos, data, error_message):
         try:
-            b, a = iirnotch(freq, quality)
+            return self.executor.map_blocks(self._sosfiltfilt_block, data, sos)
         except Exception as e:
-            raise ValueError(f"Ошибка создания notch фильтра: {e}. Частота: {freq:.4f}")
-
-        filtered_data = np.zeros_like(data)
-        for i in range(data.shape[0]):
-            try:
-                filtered_data[i] = filtfilt(b, a, data[i])
-            except Exception as e:
-                raise ValueError(f"Ошибка применения notch фильтра к каналу {i}: {e}")
+            raise ValueError(f"{error_message}: {e}")
 
-        return filtered_data
+    @staticmethod
+    def _sosfiltfilt_block(data, sos):
+        return signal.sosfiltfilt(sos, data, axis=-1)
 
     def detrend_signal(self, data):
         with self.performance_monitor.measure("Детрендирование"):
-            detrended_data = np.zeros_like(data)
-            for i in range(data.shape[0]):
-                detrended_data[i] = signal.detrend(data[i])
-
-            return detrended_data
+            # Линейный тренд удаляется для блока каналов одним вызовом
+            return self.executor.map_blocks(signal.detrend, data, axis=-1)
 
     def remove_dc_offset(self, data):
         return data - np.mean(data, axis=1, keepdims=True)
 
-    def remove_artifacts(self, data, threshold=3.0):
+    def remove_artifacts(self, data, threshold=3.0, return_mask=False):
         with self.performance_monitor.measure("Удаление артефактов"):
-            cleaned_data = data.copy()
+            data = np.asarray(data, dtype=float)
+            squeeze = data.ndim == 1
+            if squeeze:
+                data = data[np.newaxis, :]
 
-            for i in range(data.shape[0]):
-                channel_data = data[i]
-                std = np.std(channel_data)
-                mean = np.mean(channel_data)
+            # Робастные статистики сразу для всех каналов (медиана / MAD)
+            median = np.median(data, axis=1, keepdims=True)
+            deviation = np.abs(data - median)
+            scale = MAD_TO_SIGMA * np.median(deviation, axis=1, keepdims=True)
 
-                # Находим выбросы
-                outliers = np.abs(channel_data - mean) > threshold * std
+            # Для каналов с вырожденным MAD (константные участки) используем std
+            degenerate = scale[:, 0] <= 0
+            if np.any(degenerate):
+                scale[degenerate] = np.std(data[degenerate], axis=1, keepdims=True)
 
-                # Заменяем выбросы интерполированными значениями
-                if np.any(outliers):
-                    indices = np.arange(len(channel_data))
-                    cleaned_data[i] = np.interp(indices,
-                                                indices[~outliers],
-                                                channel_data[~outliers])
+            # Маска выбросов для всех каналов одним массивом
+            artifact_mask = (deviation > threshold * scale) & (scale > 0)
 
-            return cleaned_data
-
-    def wavelet_denoising(self, data, wavelet='db4', level=1):
-        with self.performance_monitor.measure("Вейвлет-денизинг"):
-            denoised_data = np.zeros_like(data)
-
-            for i in range(data.shape[0]):
-                # Вейвлет-разложение
-                coeffs = pywt.wavedec(data[i], wavelet, level=level)
+            cleaned_data = data.copy()
+            if np.any(artifact_mask):
+                self._interpolate_masked_segments(cleaned_data, artifact_mask)
 
-                # Пороговая обработка коэффициентов
-                sigma = np.median(np.abs(coeffs[-level])) / 0.6745
-                uthresh = sigma * np.sqrt(2 * np.log(len(data[i])))
-                coeffs = [pywt.threshold(c, uthresh, 'soft') for c in coeffs]
+            if squeeze:
+                cleaned_data = cleaned_data[0]
+                artifact_mask = artifact_mask[0]
 
-                # Обратное вейвлет-преобразование
-                denoised_data[i] = pywt.waverec(coeffs, wavelet)
+            if return_mask:
+                return cleaned_data, artifact_mask
+            return cleaned_data
 
-            return denoised_data
+    @staticmethod
+    def _interpolate_masked_segments(data, mask):
+        n_samples = data.shape[1]
+
+        # Границы непрерывных участков маски (конец - исключительно)
+        padded = np.zeros((mask.shape[0], n_samples + 2), dtype=np.int8)
+        padded[:, 1:-1] = mask
+        edges = np.diff(padded, axis=1)
+        rows, starts = np.nonzero(edges == 1)
+        _, ends = np.nonzero(edges == -1)
+
+        left = starts - 1
+        right = ends
+        has_left = left >= 0
+        has_right = right < n_samples
+
+        # Канал, целиком помеченный как артефакт, оставляем без изменений
+        keep = has_left | has_right
+        rows, starts, ends = rows[keep], starts[keep], ends[keep]
+        left, right = left[keep], right[keep]
+        has_left, has_right = has_left[keep], has_right[keep]
+        if rows.size == 0:
+            return
+
+        left_values = np.where(has_left, data[rows, np.clip(left, 0, None)], 0.0)
+        right_values = np.where(has_right, data[rows, np.clip(right, None, n_samples - 1)], 0.0)
+        # На краях записи удерживаем ближайшее корректное значение (как np.interp)
+        left_values = np.where(has_left, left_values, right_values)
+        right_values = np.where(has_right, right_values, left_values)
+
+        # Линейная интерполяция только по отсчетам внутри участков
+        lengths = ends - starts
+        segment_ids = np.repeat(np.arange(lengths.size), lengths)
+        segment_offsets = np.cumsum(lengths) - lengths
+        offsets = np.arange(segment_ids.size) - segment_offsets[segment_ids]
+        weights = (offsets + 1) / (lengths[segment_ids] + 1)
+
+        data[rows[segment_ids], starts[segment_ids] + offsets] = (
+                left_values[segment_ids]
+                + (right_values[segment_ids] - left_values[segment_ids]) * weights
+        )
+
+    def wavelet_denoising(self, data, wavelet='db4', level=1, threshold_method='universal', max_workers=None):
+        with self.performance_monitor.measure("Вейвлет-денойзинг"):
+            if threshold_method not in ('universal', 'sure'):
+                raise ValueError(f"Неизвестный метод порога: {threshold_method}. Доступны: universal, sure")
+
+            data = np.asarray(data, dtype=float)
+            squeeze = data.ndim == 1
+            if squeeze:
+                data = data[np.newaxis, :]
+
+            max_level = pywt.dwt_max_level(data.shape[1], pywt.Wavelet(wavelet).dec_len)
+            level = max(1, min(level, max_level))
+
+            # Длинные записи - блоки каналов через исполнитель (при последовательном - временный пул потоков),
+            # иначе весь массив за один вызов
+            if data.size >= WAVELET_PARALLEL_MIN_SIZE and data.shape[0] > 1:
+                if self.executor.is_parallel and max_workers is None:
+                    denoised_data = self.executor.map_blocks(
+                        self._wavelet_denoise_block, data, wavelet, level, threshold_method
+                    )
+                else:
+                    with ChannelExecutor('thread', max_workers) as executor:
+                        denoised_data = executor.map_blocks(
+                            self._wavelet_denoise_block, data, wavelet, level, threshold_method
+                        )
+            else:
+                denoised_data = self._wavelet_denoise_block(data, wavelet, level, threshold_method)
+
+            return denoised_data[0] if squeeze else denoised_data
+
+    @staticmethod
+    def _wavelet_denoise_block(data, wavelet, level, threshold_method):
+        n_samples = data.shape[1]
+
+        # Вейвлет-разложение сразу всех каналов вдоль оси времени
+        coeffs = pywt.wavedec(data, wavelet, level=level, axis=-1)
+
+        # Оценка шума по самому детальному уровню (MAD), отдельно для каждого канала
+        sigma = np.median(np.abs(coeffs[-1]), axis=-1, keepdims=True) / 0.6745
+        sigma[sigma == 0] = 1e-12
+
+        # Аппроксимацию не трогаем, пороги считаются для каждого уровня деталей
+        for i in range(1, len(coeffs)):
+            if threshold_method == 'sure':
+                threshold = EEGPreprocessor._sure_threshold(coeffs[i] / sigma) * sigma
+            else:
+                threshold = sigma * np.sqrt(2 * np.log(coeffs[i].shape[-1]))
+            coeffs[i] = pywt.threshold(coeffs[i], threshold, 'soft')
+
+        # Обратное вейвлет-преобразование (для нечетной длины waverec дает лишний отсчет)
+        return pywt.waverec(coeffs, wavelet, axis=-1)[:, :n_samples]
+
+    @staticmethod
+    def _sure_threshold(coeffs):
+        # Порог Штейна (SURE) для коэффициентов с единичной дисперсией шума, по строкам
+        n = coeffs.shape[-1]
+        squared = np.sort(coeffs ** 2, axis=-1)
+        k = np.arange(n)
+        risks = (n - 2 * (k + 1) + np.cumsum(squared, axis=-1) + (n - k - 1) * squared) / n
+        best = np.take_along_axis(squared, np.argmin(risks, axis=-1)[:, np.newaxis], axis=-1)
+
+        # Не выше универсального порога
+        return np.minimum(np.sqrt(best), np.sqrt(2 * np.log(n)))
+
+    def ica_artifact_removal(self, data, sampling_rate, n_components=None, kurtosis_threshold=5.0,
+                             ocular_ratio=0.8, muscle_ratio=0.6, return_excluded=False):
+        with self.performance_monitor.measure("ICA"):
+            try:
+                from sklearn.decomposition import FastICA
+            except ImportError:
+                print("scikit-learn не установлен. Пропускаем ICA.")
+                return (data, []) if return_excluded else data
 
-    def ica_artifact_removal(self, data, n_components=None):
-        try:
-            from sklearn.decomposition import FastICA
+            if data.ndim != 2 or data.shape[0] < 2:
+                raise ValueError("Для ICA нужны многоканальные данные (минимум 2 канала)")
 
             if n_components is None:
                 n_components = min(data.shape[0], 10)
 
-            ica = FastICA(n_components=n_components, random_state=42)
-            components = ica.fit_transform(data.T)
-
-            return data
+            key = (self._recording_fingerprint(data, sampling_rate), n_components)
+            model = self._ica_cache.get(key)
+
+            if model is None:
+                # Обучение на децимированной копии после ФВЧ - быстрее и устойчивее к дрейфу
+                fit_data, fit_rate = self._prepare_ica_fit_data(data, sampling_rate)
+
+                ica = FastICA(n_components=n_components, whiten='unit-variance',
+                              max_iter=500, random_state=42)
+                sources = ica.fit_transform(fit_data.T).T
+
+                model = {
+                    'unmixing': ica.components_,
+                    'mixing': ica.mixing_,
+                    'features': self._ica_component_features(sources, fit_rate)
+                }
+
+                if len(self._ica_cache) >= ICA_CACHE_SIZE:
+                    self._ica_cache.pop(next(iter(self._ica_cache)))
+                self._ica_cache[key] = model
+
+            # Классификация по закешированным признакам - без повторного обучения
+            features = model['features']
+            excluded = np.flatnonzero(
+                (features['kurtosis'] > kurtosis_threshold)
+                | (features['low_ratio'] > ocular_ratio)
+                | (features['high_ratio'] > muscle_ratio)
+            ).tolist()
+
+            cleaned_data = np.array(data, dtype=float)
+            if excluded:
+                # Вычитаем вклад только отбракованных компонент, остальной сигнал (в т.ч. DC) не трогаем
+                centered = cleaned_data - np.mean(cleaned_data, axis=1, keepdims=True)
+                sources = model['unmixing'][excluded] @ centered
+                cleaned_data -= model['mixing'][:, excluded] @ sources
+
+            if return_excluded:
+                return cleaned_data, excluded
+            return cleaned_data
 
-        except ImportError:
-            print("scikit-learn не установлен. Пропускаем ICA.")
-            return data
+    def clear_ica_cache(self):
+        self._ica_cache.clear()
+
+    @staticmethod
+    def _recording_fingerprint(data, sampling_rate):
+        contiguous = np.ascontiguousarray(data)
+        digest = hashlib.blake2b(contiguous.view(np.uint8), digest_size=16)
+        digest.update(repr((contiguous.shape, contiguous.dtype.str, float(sampling_rate))).encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _prepare_ica_fit_data(data, sampling_rate):
+        sos = signal.butter(4, ICA_HIGHPASS_HZ, btype='highpass', fs=sampling_rate, output='sos')
+        fit_data = signal.sosfiltfilt(sos, data, axis=1)
+
+        factor = int(sampling_rate // ICA_FIT_RATE_HZ)
+        if factor > 1:
+            fit_data = signal.decimate(fit_data, factor, axis=1, zero_phase=True)
+            return fit_data, sampling_rate / factor
+
+        return fit_data, sampling_rate
+
+    @staticmethod
+    def _ica_component_features(sources, sampling_rate):
+        freqs, psd = signal.welch(sources, fs=sampling_rate,
+                                  nperseg=min(sources.shape[1], int(2 * sampling_rate)), axis=1)
+        total = np.sum(psd, axis=1)
+        total[total == 0] = 1.0
+
+        return {
+            # Моргания дают редкие большие выбросы - высокий эксцесс
+            'kurtosis': stats.kurtosis(sources, axis=1),
+            # Движения глаз - доминирование мощности ниже 4 Гц
+            'low_ratio': np.sum(psd[:, freqs < 4.0], axis=1) / total,
+            # Мышечная активность - широкополосная мощность выше 20 Гц
+            'high_ratio': np.sum(psd[:, freqs > 20.0], axis=1) / total
+        }
 
     def normalize_data(self, data, method='zscore'):
         if method == 'zscore':
@@ -5,6 +5,7 @@ from typing import Optional
 from PyQt5.QtCore import QObject, pyqtSignal, QTimer
 
 from realtime_work.realtime_driver import EEGAcquisitionDriver, EEGSample, EEGSampleBatch
+from realtime_work.realtime_latency import RealtimeLatencyMonitor
 
 
 class RealtimeEEGController(QObject):
@@ -25,10 +26,14 @@ class RealtimeEEGController(QObject):
         self.timer = QTimer()
         self.timer.timeout.connect(self._process_queue)
         self.timer_interval = 20  # мс
+        self.max_batches_per_cycle = 5  # Ограничиваем количество пакетов за цикл
 
         # Статистика
         self.samples_received = 0
         self.batches_processed = 0
+        self.batches_dropped = 0
+        self.max_queue_size = 0
+        self.latency_monitor = RealtimeLatencyMonitor()
 
     def start(self) -> None:
         if self._thread is not None and self._thread.is_alive():
@@ -75,15 +80,19 @@ class RealtimeEEGController(QObject):
 
                 # Отправка пакета когда он заполнен
                 if len(batch) >= self.batch_size:
+                    sample_batch = EEGSampleBatch(samples=batch.copy())
+                    self.latency_monitor.on_batch_enqueued(sample_batch)
                     try:
-                        self.queue.put_nowait(EEGSampleBatch(samples=batch.copy()))
+                        self.queue.put_nowait(sample_batch)
                         batch.clear()
                         self.batches_processed += 1
+                        self.max_queue_size = max(self.max_queue_size, self.queue.qsize())
                     except queue.Full:
                         # Если очередь переполнена, удаляем старые данные
                         try:
                             self.queue.get_nowait()
-                            self.queue.put_nowait(EEGSampleBatch(samples=batch.copy()))
+                            self.batches_dropped += 1
+                            self.queue.put_nowait(sample_batch)
                             batch.clear()
                         except queue.Empty:
                             pass
@@ -98,11 +107,11 @@ class RealtimeEEGController(QObject):
 
     def _process_queue(self) -> None:
         processed_batches = 0
-        max_batches_per_cycle = 5  # Ограничиваем количество пакетов за цикл
 
-        while processed_batches < max_batches_per_cycle:
+        while processed_batches < self.max_batches_per_cycle:
             try:
                 batch = self.queue.get_nowait()
+                self.latency_monitor.on_batch_dequeued(batch)
                 self.data_received.emit(batch)
                 processed_batches += 1
             except queue.Empty:
@@ -112,13 +121,21 @@ class RealtimeEEGController(QObject):
         return {
             'samples_received': self.samples_received,
             'batches_processed': self.batches_processed,
+            'batches_dropped': self.batches_dropped,
             'queue_size': self.queue.qsize(),
+            'max_queue_size': self.max_queue_size,
             'is_running': self._running.is_set()
         }
 
+    def get_latency_statistics(self) -> dict:
+        return self.latency_monitor.get_statistics()
+
     def clear_statistics(self) -> None:
         self.samples_received = 0
         self.batches_processed = 0
+        self.batches_dropped = 0
+        self.max_queue_size = 0
+        self.latency_monitor.reset()
 
 
 class RealtimeDataBuffer:
@@ -4,19 +4,25 @@ from dataclasses import dataclass
 from typing import Iterable, Optional
 
 import numpy as np
-import serial
-from serial.tools import list_ports
+
+from utils.lazy_import import lazy_import
+
+# pyserial нужен только при подключении к устройству, а модуль импортируется при запуске приложения
+serial = lazy_import('serial')
 
 
 @dataclass
 class EEGSample:
     timestamp: float  # время в секундах с начала сессии
     amplitudes: list[float]  # амплитуды по каналам
+    received_ns: int = 0  # perf_counter_ns в момент получения отсчета хостом
 
 
 @dataclass
 class EEGSampleBatch:
     samples: list[EEGSample]
+    enqueued_ns: int = 0  # perf_counter_ns постановки в очередь контроллера
+    dequeued_ns: int = 0  # perf_counter_ns извлечения из очереди в главном потоке
 
 
 class EEGAcquisitionDriver(ABC):
@@ -54,6 +60,7 @@ class SerialEEGDriver(EEGAcquisitionDriver):
 
     def open(self) -> None:
         try:
+            from serial.tools import list_ports
             print("Доступные порты:", [(port.device, port.description) for port in list_ports.comports()])
 
             self.ser = serial.Serial(
@@ -97,6 +104,7 @@ class SerialEEGDriver(EEGAcquisitionDriver):
                         line, buffer = buffer.split(b'\n', 1)
                         sample = self._parse_line(line.strip())
                         if sample:
+                            sample.received_ns = time.perf_counter_ns()
                             yield sample
 
                 # Контроль скорости чтения для приближения к sample rate
@@ -165,6 +173,7 @@ class SerialEEGDriver(EEGAcquisitionDriver):
 
     @staticmethod
     def list_available_ports():
+        from serial.tools import list_ports
         return [(port.device, port.description) for port in list_ports.comports()]
 
 
@@ -204,7 +213,7 @@ class SyntheticEEGDriver(EEGAcquisitionDriver):
 
             total_signal = alpha_signal + beta_signal + noise + artifact
 
-            yield EEGSample(timestamp=timestamp, amplitudes=[total_signal])
+            yield EEGSample(timestamp=timestamp, amplitudes=[total_signal], received_ns=time.perf_counter_ns())
 
             sample_count += 1
             time.sleep(self.dt)
@@ -212,3 +221,73 @@ class SyntheticEEGDriver(EEGAcquisitionDriver):
     def close(self) -> None:
         self._running = False
         print("Синтетический драйвер остановлен")
+
+
+class SyntheticBlockEEGDriver(EEGAcquisitionDriver):
+    """Векторизованный синтетический драйвер: блоки отсчетов сразу для N каналов.
+
+    В режиме realtime блоки выдаются по расписанию частоты дискретизации,
+    при realtime=False - без задержек, с максимальной скоростью.
+    """
+
+    def __init__(self, sample_rate_hz: float = 250.0, n_channels: int = 1,
+                 block_size: Optional[int] = None, realtime: bool = True, seed: Optional[int] = None):
+        if sample_rate_hz <= 0:
+            raise ValueError(f"Частота дискретизации должна быть больше 0, получено: {sample_rate_hz} Гц")
+        if n_channels < 1:
+            raise ValueError(f"Число каналов должно быть не меньше 1, получено: {n_channels}")
+
+        self.fs = sample_rate_hz
+        self.n_channels = n_channels
+        # По умолчанию блок ~10 мс, чтобы расписание не зависело от точности sleep
+        self.block_size = block_size or max(1, int(round(sample_rate_hz / 100)))
+        self.realtime = realtime
+        self._rng = np.random.default_rng(seed)
+        self._running = False
+        self._start_time = None
+
+        # Параметры каналов: альфа и бета с разными частотами и фазами
+        self._alpha_freq = self._rng.uniform(8.0, 12.0, size=(n_channels, 1))
+        self._beta_freq = self._rng.uniform(15.0, 25.0, size=(n_channels, 1))
+        self._phase = self._rng.uniform(0, 2 * np.pi, size=(n_channels, 1))
+
+    def open(self) -> None:
+        self._running = True
+        self._start_time = time.time()
+        mode = "реальное время" if self.realtime else "максимальная скорость"
+        print(f"Блочный синтетический драйвер запущен: {self.n_channels} каналов, {self.fs:g} Гц ({mode})")
+
+    def iter_blocks(self) -> Iterable[tuple]:
+        sample_count = 0
+        start = time.perf_counter()
+        offsets = np.arange(self.block_size)
+
+        while self._running:
+            if self.realtime:
+                # Ждем момента, когда последний отсчет блока "будет измерен"
+                due = start + (sample_count + self.block_size) / self.fs
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+            timestamps = (sample_count + offsets) / self.fs
+            phase = 2 * np.pi * timestamps + self._phase
+            block = (
+                50 * np.sin(self._alpha_freq * phase)
+                + 20 * np.sin(self._beta_freq * phase)
+                + 5 * self._rng.standard_normal((self.n_channels, self.block_size))
+            )
+
+            yield timestamps, block
+
+            sample_count += self.block_size
+
+    def iter_samples(self) -> Iterable[EEGSample]:
+        for timestamps, block in self.iter_blocks():
+            received_ns = time.perf_counter_ns()
+            for timestamp, amplitudes in zip(timestamps.tolist(), block.T.tolist()):
+                yield EEGSample(timestamp=timestamp, amplitudes=amplitudes, received_ns=received_ns)
+
+    def close(self) -> None:
+        self._running = False
+        print("Блочный синтетический драйвер остановлен")
@@ -0,0 +1,137 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from utils.performance import OperationStats
+
+NS_PER_MS = 1e6
+
+# Сколько пакетов, еще не выведенных на экран, помнить (пока вкладка скрыта, кадры не рисуются)
+MAX_PENDING_BATCHES = 256
+
+
+class RealtimeLatencyMonitor:
+    """Задержки real-time тракта: драйвер -> очередь -> буфер -> отрисовка.
+
+    Время каждого участка хранится в скользящих гистограммах (OperationStats),
+    джиттер - стандартное отклонение задержки по последним пакетам.
+    """
+
+    HOPS = {
+        'batching': "Сборка пакета",
+        'queue_wait': "Ожидание в очереди",
+        'buffer_add': "Запись в буфер",
+        'render': "Отрисовка",
+        'sample_to_pixel': "Отсчет -> экран"
+    }
+
+    def __init__(self, window_seconds: float = 5.0):
+        self.window_ns = int(window_seconds * 1e9)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.hops = {hop: OperationStats() for hop in self.HOPS}
+            self._sample_arrivals = deque()  # (время, число отсчетов)
+            self._frame_times = deque()
+            # Время получения отсчетов, еще не выведенных на экран
+            self._pending_pixel_ns = deque(maxlen=MAX_PENDING_BATCHES)
+            self._render_requested_ns = None
+
+    def on_batch_enqueued(self, batch) -> None:
+        # Поток получения данных: пакет собран и помещен в очередь
+        now = time.perf_counter_ns()
+        batch.enqueued_ns = now
+
+        first_received = batch.samples[0].received_ns if batch.samples else 0
+        with self._lock:
+            if first_received:
+                self.hops['batching'].add(now - first_received)
+            self._sample_arrivals.append((now, len(batch.samples)))
+            self._trim(self._sample_arrivals, now, key=lambda item: item[0])
+
+    def on_batch_dequeued(self, batch) -> None:
+        now = time.perf_counter_ns()
+        batch.dequeued_ns = now
+        if batch.enqueued_ns:
+            with self._lock:
+                self.hops['queue_wait'].add(now - batch.enqueued_ns)
+
+    def on_batch_buffered(self, batch) -> None:
+        now = time.perf_counter_ns()
+        with self._lock:
+            if batch.dequeued_ns:
+                self.hops['buffer_add'].add(now - batch.dequeued_ns)
+            # До экрана считаем задержку самого свежего отсчета пакета
+            if batch.samples and batch.samples[-1].received_ns:
+                self._pending_pixel_ns.append(batch.samples[-1].received_ns)
+                self._trim(self._pending_pixel_ns, now)
+
+    def on_render_requested(self) -> None:
+        with self._lock:
+            if self._render_requested_ns is None:
+                self._render_requested_ns = time.perf_counter_ns()
+
+    def on_frame_drawn(self) -> None:
+        now = time.perf_counter_ns()
+        with self._lock:
+            if self._render_requested_ns is not None:
+                self.hops['render'].add(now - self._render_requested_ns)
+                self._render_requested_ns = None
+
+            # Отсчеты старше окна пришли, пока график не рисовался (вкладка скрыта) - это не задержка тракта
+            self._trim(self._pending_pixel_ns, now)
+            for received_ns in self._pending_pixel_ns:
+                self.hops['sample_to_pixel'].add(now - received_ns)
+            self._pending_pixel_ns.clear()
+
+            self._frame_times.append(now)
+            self._trim(self._frame_times, now)
+
+    def _trim(self, events, now, key=lambda item: item):
+        while events and now - key(events[0]) > self.window_ns:
+            events.popleft()
+
+    def get_statistics(self) -> dict:
+        now = time.perf_counter_ns()
+        with self._lock:
+            self._trim(self._sample_arrivals, now, key=lambda item: item[0])
+            self._trim(self._frame_times, now)
+
+            hops = {}
+            for hop, stats in self.hops.items():
+                recent_ms = stats.recent_durations() * 1000
+                hops[hop] = {
+                    'count': stats.count,
+                    **{name: value * 1000 for name, value in stats.percentiles().items()},
+                    'jitter': float(np.std(recent_ms)) if recent_ms.size else 0.0
+                }
+
+            return {
+                'hops': hops,
+                'sample_rate': self._rate(self._sample_arrivals, now,
+                                          sum(count for _, count in self._sample_arrivals)),
+                'frame_rate': self._rate(self._frame_times, now, len(self._frame_times))
+            }
+
+    def _rate(self, events, now, count):
+        if not events:
+            return 0.0
+        start = events[0][0] if isinstance(events[0], tuple) else events[0]
+        span_ns = max(now - start, 1)
+        return count * 1e9 / min(span_ns, self.window_ns)
+
+    def format_overlay(self) -> str:
+        stats = self.get_statistics()
+        parts = [f"Fs: {stats['sample_rate']:.0f} Гц", f"FPS: {stats['frame_rate']:.1f}"]
+
+        for hop, label in self.HOPS.items():
+            hop_stats = stats['hops'][hop]
+            if hop_stats['count']:
+                parts.append(f"{label}: p50 {hop_stats['p50']:.1f} / p95 {hop_stats['p95']:.1f} / "
+                             f"p99 {hop_stats['p99']:.1f} мс (±{hop_stats['jitter']:.1f})")
+
+        return " | ".join(parts)
@@ -39,6 +39,10 @@ class RealtimeEEGPlot(FigureCanvas):
         self.update_interval = 50
         self.last_update = time.time()
 
+        # Монитор задержек: кадр считается выведенным по событию отрисовки canvas
+        self.latency_monitor = None
+        self.mpl_connect('draw_event', self._on_draw)
+
     def _setup_dark_theme(self):
         self.fig.patch.set_facecolor('#121212')
 
@@ -72,6 +76,10 @@ class RealtimeEEGPlot(FigureCanvas):
         self.buffer = buffer
         self._update_line()
 
+    def _on_draw(self, event):
+        if self.latency_monitor is not None:
+            self.latency_monitor.on_frame_drawn()
+
     def _update_line(self):
         # Удаляем старую линию
         if self.line is not None:
@@ -122,6 +130,8 @@ class RealtimeEEGPlot(FigureCanvas):
                     self.ax.set_ylim(y_min - 10, y_max + 10)
 
         # Обновляем canvas
+        if self.latency_monitor is not None:
+            self.latency_monitor.on_render_requested()
         self.draw_idle()
 
     def set_window_seconds(self, seconds: float):
@@ -153,6 +163,7 @@ class RealtimeEEGWidget(QWidget):
 
         # Буфер данных
         self.buffer = None
+        self.latency_monitor = None
 
     def setup_ui(self):
         layout = QVBoxLayout()
@@ -218,12 +229,18 @@ class RealtimeEEGWidget(QWidget):
 
     def _create_stats_panel(self):
         widget = QWidget()
-        layout = QHBoxLayout()
+        layout = QVBoxLayout()
 
         self.stats_label = QLabel("Статистика: готов к работе")
         self.stats_label.setStyleSheet("font-family: menlo; font-size: 10px;")
         layout.addWidget(self.stats_label)
 
+        # Задержки тракта отсчет -> экран
+        self.latency_label = QLabel("")
+        self.latency_label.setStyleSheet("font-family: menlo; font-size: 10px; color: #9ca3af;")
+        self.latency_label.setWordWrap(True)
+        layout.addWidget(self.latency_label)
+
         widget.setLayout(layout)
         return widget
 
@@ -252,6 +269,10 @@ class RealtimeEEGWidget(QWidget):
         self.buffer = buffer
         self.plot_widget.set_buffer(buffer)
 
+    def set_latency_monitor(self, latency_monitor):
+        self.latency_monitor = latency_monitor
+        self.plot_widget.latency_monitor = latency_monitor
+
     def update_plot(self):
         self.plot_widget.update_plot()
         self._update_statistics()
@@ -279,8 +300,14 @@ class RealtimeEEGWidget(QWidget):
 
         self.stats_label.setText(stats_text)
 
+        if self.latency_monitor is not None:
+            self.latency_label.setText(self.latency_monitor.format_overlay())
+
     def clear_plot(self):
         if self.buffer:
             self.buffer.clear()
         self.plot_widget.clear_plot()
         self.stats_label.setText("Статистика: очищено")
+        if self.latency_monitor is not None:
+            self.latency_monitor.reset()
+            self.latency_label.setText("")
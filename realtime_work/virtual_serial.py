@@ -0,0 +1,199 @@
+import errno
+import os
+import threading
+import time
+from typing import Iterator, Optional
+
+import numpy as np
+
+# Параметры АЦП Arduino (10 бит, опорное 5 В), как в arduino_sketch/eeg_reader.ino
+ADC_MAX = 1023
+ADC_REFERENCE_V = 5.0
+
+# Строки отправляются пачками примерно раз в 10 мс (как USB-CDC буферизация)
+CHUNK_INTERVAL_S = 0.01
+
+
+def emotion_source(file_path: str, column: int = 1, loop: bool = True) -> Iterator[int]:
+    """Отсчеты АЦП из записи emotion_6 (значения в вольтах переводятся обратно в 0-1023)."""
+    import pandas as pd
+
+    volts = pd.read_csv(file_path).iloc[:, column].to_numpy(dtype=float)
+    adc = np.clip(np.round(volts / ADC_REFERENCE_V * ADC_MAX), 0, ADC_MAX).astype(int).tolist()
+
+    while True:
+        yield from adc
+        if not loop:
+            return
+
+
+def synthetic_source(sample_rate_hz: float = 250.0, seed: Optional[int] = None,
+                     block_size: int = 1024) -> Iterator[int]:
+    """Синтетический сигнал вокруг середины шкалы АЦП: альфа-ритм, бета-ритм и шум."""
+    rng = np.random.default_rng(seed)
+    sample_count = 0
+
+    while True:
+        t = (sample_count + np.arange(block_size)) / sample_rate_hz
+        volts = 2.5 + 0.5 * np.sin(2 * np.pi * 10 * t) + 0.2 * np.sin(2 * np.pi * 20 * t) \
+            + 0.05 * rng.standard_normal(block_size)
+        yield from np.clip(np.round(volts / ADC_REFERENCE_V * ADC_MAX), 0, ADC_MAX).astype(int).tolist()
+        sample_count += block_size
+
+
+class VirtualSerialPort:
+    """Виртуальный serial порт на pty, воспроизводящий поток скетча eeg_reader.ino.
+
+    Ведомый конец pty (port_name) открывается SerialEEGDriver как обычный порт.
+    Строки имеют формат скетча: "секунды(3 знака),значение\\r\\n". Можно добавить
+    джиттер отправки, порчу строк и пачечную выдачу (задержка, затем сброс накопленного).
+    """
+
+    def __init__(self, source: Optional[Iterator[int]] = None, sample_rate_hz: float = 250.0,
+                 jitter_ms: float = 0.0, corruption_rate: float = 0.0,
+                 burst_probability: float = 0.0, burst_duration_ms: float = 100.0,
+                 seed: Optional[int] = None):
+        if os.name != 'posix':
+            raise RuntimeError("Виртуальный serial порт поддерживается только на POSIX системах (pty)")
+        if sample_rate_hz <= 0:
+            raise ValueError(f"Частота дискретизации должна быть больше 0, получено: {sample_rate_hz} Гц")
+
+        self.source = source if source is not None else synthetic_source(sample_rate_hz, seed)
+        self.fs = sample_rate_hz
+        self.jitter_ms = jitter_ms
+        self.corruption_rate = corruption_rate
+        self.burst_probability = burst_probability
+        self.burst_duration_ms = burst_duration_ms
+        self._rng = np.random.default_rng(seed)
+
+        self._master_fd = None
+        self._slave_fd = None
+        self._thread = None
+        self._running = threading.Event()
+
+        # Статистика
+        self.lines_sent = 0
+        self.lines_corrupted = 0
+        self.lines_dropped = 0
+        self.bursts = 0
+
+    @property
+    def port_name(self) -> str:
+        if self._slave_fd is None:
+            raise RuntimeError("Порт не запущен. Вызовите start() сначала.")
+        return os.ttyname(self._slave_fd)
+
+    def start(self) -> str:
+        import tty
+
+        self._master_fd, self._slave_fd = os.openpty()
+        # Без эха и построчной обработки - байты идут как по настоящему UART
+        tty.setraw(self._slave_fd)
+        os.set_blocking(self._master_fd, False)
+
+        self._running.set()
+        self._thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._thread.start()
+        return self.port_name
+
+    def stop(self) -> None:
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+        for fd in (self._master_fd, self._slave_fd):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._master_fd = self._slave_fd = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def get_statistics(self) -> dict:
+        return {
+            'lines_sent': self.lines_sent,
+            'lines_corrupted': self.lines_corrupted,
+            'lines_dropped': self.lines_dropped,
+            'bursts': self.bursts
+        }
+
+    def _format_line(self, sample_index: int, value: int) -> bytes:
+        # Как в скетче: Serial.print(millis() / 1000.0, 3); Serial.print(","); Serial.println(val);
+        line = f"{sample_index / self.fs:.3f},{value}\r\n".encode('ascii')
+
+        if self.corruption_rate > 0 and self._rng.random() < self.corruption_rate:
+            self.lines_corrupted += 1
+            kind = self._rng.integers(3)
+            if kind == 0:
+                # Обрыв строки (потеря части байтов)
+                line = line[:int(self._rng.integers(1, len(line) - 2))] + b"\r\n"
+            elif kind == 1:
+                # Мусорные байты (помехи на линии)
+                line = bytes(self._rng.integers(0, 256, size=int(self._rng.integers(1, 8)), dtype=np.uint8)) + line
+            else:
+                # Потерян перевод строки - две строки склеиваются
+                line = line.rstrip(b"\r\n")
+
+        return line
+
+    def _writer_loop(self) -> None:
+        samples_per_chunk = max(1, int(round(self.fs * CHUNK_INTERVAL_S)))
+        sample_index = 0
+        start = time.perf_counter()
+        burst_until = 0.0
+        pending = b""
+
+        while self._running.is_set():
+            # Время, к которому устройство "измерит" последний отсчет пачки
+            due = start + (sample_index + samples_per_chunk) / self.fs
+            if self.jitter_ms > 0:
+                due += abs(self._rng.normal(0, self.jitter_ms / 1000.0))
+
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+            chunk = []
+            for _ in range(samples_per_chunk):
+                try:
+                    value = next(self.source)
+                except StopIteration:
+                    self._running.clear()
+                    break
+                chunk.append(self._format_line(sample_index, value))
+                sample_index += 1
+            pending += b"".join(chunk)
+            self.lines_sent += len(chunk)
+
+            # Пачечная выдача: данные копятся и уходят разом по окончании паузы
+            now = time.perf_counter()
+            if now < burst_until:
+                continue
+            if self.burst_probability > 0 and self._rng.random() < self.burst_probability:
+                self.bursts += 1
+                burst_until = now + self.burst_duration_ms / 1000.0
+                continue
+
+            pending = self._write(pending)
+
+    def _write(self, data: bytes) -> bytes:
+        try:
+            written = os.write(self._master_fd, data)
+            return data[written:]
+        except BlockingIOError:
+            # Буфер pty переполнен (читатель не успевает) - как у UART, данные теряются
+            self.lines_dropped += data.count(b"\n")
+            return b""
+        except OSError as e:
+            if e.errno in (errno.EIO, errno.EBADF):
+                self._running.clear()
+                return b""
+            raise
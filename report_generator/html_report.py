@@ -0,0 +1,357 @@
+"""
+Легкий отчет в HTML/JSON: результаты анализа, прореженные сигналы и PNG-миниатюры в одном файле.
+
+HTML-файл самодостаточен: миниатюры встроены как data URI, полные данные отчета лежат
+в блоке <script type="application/json" id="eeg-report-data">. Сигналы хранятся как огибающая
+min/max фиксированной ширины (float32, zlib, base64), поэтому размер файла и время сборки
+не зависят от длины записи. Модуль не зависит от Qt и используется и приложением, и сервисом отчетов.
+"""
+
+import base64
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.ticker import NullFormatter
+
+from utils.decimation import minmax_envelope
+
+REPORT_FORMAT = 'eeg-report'
+REPORT_VERSION = 1
+
+# Число интервалов огибающей сигнала на канал (ширина превью в точках)
+TRACE_BUCKETS = 600
+
+# Спектр в отчете обрезается до этой частоты (как на странице спектрального анализа PDF)
+SPECTRUM_MAX_FREQUENCY = 40.0
+
+# Размер и разрешение миниатюр
+THUMBNAIL_SIZE = (7.0, 2.6)
+THUMBNAIL_DPI = 80
+
+REPORT_CSS = """
+  body {
+    background:#0b1220; color:#e5e7eb;
+    font-family: Helvetica, Arial;
+    font-size:13px; line-height:1.55; margin:0; padding:14px;
+  }
+  .title { font-size:15px; font-weight:900; margin:0 0 12px 0; }
+  .grid { display:block; }
+  .card {
+    background:rgba(255,255,255,0.04);
+    border:1px solid #243244;
+    border-radius:12px;
+    padding:12px;
+    margin:10px 0;
+  }
+  .card h3 {
+    margin:0 0 8px 0;
+    font-size:12px;
+    font-weight:900;
+    letter-spacing:.4px;
+    color:#cbd5e1;
+    text-transform:uppercase;
+  }
+  .row {
+    display:flex; justify-content:space-between; gap:10px;
+    padding:6px 0; border-bottom:1px solid rgba(36,50,68,.55);
+  }
+  .row:last-child { border-bottom:none; }
+  .k { color:#9ca3af; }
+  .v { color:#e5e7eb; font-weight:800; }
+  .muted { color:#94a3b8; }
+  .badge {
+    display:inline-block; padding:2px 8px; border-radius:999px;
+    border:1px solid #243244; font-size:11px; font-weight:900;
+    margin-left:6px;
+  }
+  .ok { background:rgba(34,197,94,.14); color:#86efac; }
+  .warn { background:rgba(245,158,11,.14); color:#fcd34d; }
+  .bad { background:rgba(239,68,68,.14); color:#fca5a5; }
+  .accent { background:rgba(59,130,246,.14); color:#93c5fd; }
+  table { width:100%; border-collapse:collapse; margin-top:6px; border-radius:10px; overflow:hidden; }
+  th,td { border:1px solid rgba(36,50,68,.7); padding:8px 10px; text-align:left; }
+  th { background:rgba(255,255,255,.05); color:#cbd5e1; font-weight:900; font-size:12px; }
+  ul { margin:8px 0 0 18px; padding:0; }
+  li { margin:6px 0; }
+  img { max-width:100%; border-radius:8px; }
+  pre {
+    margin:0; white-space:pre-wrap; word-break:break-word;
+    color:#cbd5e1;
+    font-family: Menlo, Monaco, "Courier New";
+    font-size:12px;
+  }
+"""
+
+
+def safe_html(s) -> str:
+    if s is None:
+        return ""
+    return (str(s)
+            .replace("&", "&amp;")
+            .replace("<", "&lt;")
+            .replace(">", "&gt;")
+            .replace('"', "&quot;"))
+
+
+def html_page(title, body_html, head_html: str = "") -> str:
+    """HTML-страница в оформлении приложения (темная тема, карточки, бейджи)"""
+    return f"""
+        <html><head><meta charset="utf-8">
+        <title>{safe_html(title)}</title>
+        <style>{REPORT_CSS}</style>{head_html}</head>
+        <body>
+          <div class="title">{safe_html(title)}</div>
+          <div class="grid">{body_html}</div>
+        </body></html>
+        """
+
+
+def badge(text, level="accent") -> str:
+    cls = "badge " + (
+        "ok" if level == "ok" else "warn" if level == "warn" else "bad" if level == "bad" else "accent")
+    return f'<span class="{cls}">{safe_html(text)}</span>'
+
+
+def state_level(state) -> str:
+    """Уровень бейджа по текстовому состоянию ритма"""
+    s_low = str(state).lower()
+    if "аном" in s_low or "патолог" in s_low:
+        return "bad"
+    if "стресс" in s_low or "высок" in s_low:
+        return "warn"
+    return "accent"
+
+
+def encode_array(values) -> Dict[str, Any]:
+    """Сжатое представление массива для JSON: float32 -> zlib -> base64"""
+    values = np.ascontiguousarray(values, dtype='<f4')
+    return {
+        'dtype': 'float32',
+        'shape': list(values.shape),
+        'encoding': 'zlib+base64',
+        'data': base64.b64encode(zlib.compress(values.tobytes(), 6)).decode('ascii')
+    }
+
+
+def decode_array(encoded: Dict[str, Any]) -> np.ndarray:
+    if encoded.get('encoding') != 'zlib+base64' or encoded.get('dtype') != 'float32':
+        raise ValueError(f"Неподдерживаемое представление массива: {encoded.get('encoding')}, {encoded.get('dtype')}")
+    raw = zlib.decompress(base64.b64decode(encoded['data']))
+    return np.frombuffer(raw, dtype='<f4').reshape(encoded['shape'])
+
+
+def to_json_value(value):
+    """Приведение результатов анализа (numpy, datetime) к типам JSON"""
+    if isinstance(value, dict):
+        return {str(key): to_json_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json_value(item) for item in value]
+    if isinstance(value, np.ndarray):
+        return to_json_value(value.tolist())
+    if isinstance(value, np.generic):
+        return to_json_value(value.item())
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat(timespec='seconds')
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def build_payload(report_data: Dict[str, Any], channel_indices: list,
+                  patient_info: Optional[Dict] = None, trace_buckets: int = TRACE_BUCKETS) -> Dict[str, Any]:
+    """Данные легкого отчета: сводка анализа, обрезанный спектр и огибающие выбранных каналов"""
+    sampling_rate = report_data['sampling_rate']
+    raw_data = np.atleast_2d(report_data['raw_data'])
+    processed_data = np.atleast_2d(report_data['processed_data'])
+    channel_names = list(report_data['channel_names'])
+    analysis = report_data['analysis_results']
+
+    summary_keys = ('dominant_rhythm', 'spectral_entropy', 'peak_frequency', 'total_power',
+                    'rhythm_power', 'relative_power', 'rhythm_analysis')
+
+    payload = {
+        'format': REPORT_FORMAT,
+        'version': REPORT_VERSION,
+        'created': report_data.get('timestamp', datetime.now()),
+        'patient_info': dict(patient_info or {}),
+        'recording': {
+            'sampling_rate': sampling_rate,
+            'n_samples': raw_data.shape[1],
+            'duration': raw_data.shape[1] / sampling_rate,
+            'channel_names': [channel_names[i] for i in channel_indices]
+        },
+        'processing_params': report_data.get('processing_params', {}),
+        'analysis': {key: analysis[key] for key in summary_keys if key in analysis},
+        'recommendations': report_data.get('recommendations', {})
+    }
+
+    if 'frequencies' in analysis and 'power_spectrum' in analysis:
+        frequencies = np.asarray(analysis['frequencies'])
+        band = frequencies <= SPECTRUM_MAX_FREQUENCY
+        payload['spectrum'] = {
+            'frequencies': encode_array(frequencies[band]),
+            'power': encode_array(np.asarray(analysis['power_spectrum'])[band])
+        }
+
+    x, raw_envelope = minmax_envelope(raw_data[channel_indices], trace_buckets)
+    _, processed_envelope = minmax_envelope(processed_data[channel_indices], trace_buckets)
+    payload['traces'] = {
+        'time': encode_array(x / sampling_rate),
+        'raw': encode_array(raw_envelope),
+        'processed': encode_array(processed_envelope)
+    }
+
+    return to_json_value(payload)
+
+
+def payload_to_json(payload: Dict[str, Any], indent: Optional[int] = None) -> str:
+    separators = None if indent else (',', ':')
+    return json.dumps(payload, ensure_ascii=False, indent=indent, separators=separators)
+
+
+def render_thumbnails(payload: Dict[str, Any]) -> Dict[str, bytes]:
+    """PNG-миниатюры по данным отчета: сигналы (исходные и обработанные) и спектр"""
+    thumbnails = {}
+    traces = payload.get('traces')
+    names = payload['recording']['channel_names']
+
+    if traces and names:
+        time = decode_array(traces['time'])
+        for key, title, color in (('raw', 'Исходные сигналы', '#1f77b4'),
+                                  ('processed', 'Обработанные сигналы', '#2ca02c')):
+            signals = decode_array(traces[key])
+            fig = Figure(figsize=(THUMBNAIL_SIZE[0], max(THUMBNAIL_SIZE[1], 0.5 * len(names))))
+            ax = fig.add_subplot(111)
+
+            # Каналы друг под другом со сдвигом на размах сигнала
+            spread = np.ptp(signals, axis=1)
+            step = float(np.max(spread)) if spread.size and np.max(spread) > 0 else 1.0
+            offsets = -step * np.arange(len(names))
+            ax.plot(time, (signals + offsets[:, np.newaxis]).T, color=color, linewidth=0.6)
+            ax.set_yticks(offsets + np.mean(signals, axis=1))
+            ax.set_yticklabels(names, fontsize=7)
+            ax.set_xlim(0, payload['recording']['duration'])
+            ax.set_xlabel('Время (с)', fontsize=8)
+            ax.set_title(title, fontsize=10, fontweight='bold')
+            ax.tick_params(axis='x', labelsize=7)
+            ax.grid(True, alpha=0.3, linestyle='--')
+            thumbnails[key] = _figure_png(fig)
+
+    spectrum = payload.get('spectrum')
+    if spectrum:
+        fig = Figure(figsize=THUMBNAIL_SIZE)
+        ax = fig.add_subplot(111)
+        frequencies = decode_array(spectrum['frequencies'])
+        power = decode_array(spectrum['power'])
+        ax.semilogy(frequencies, np.maximum(power, np.finfo(np.float32).tiny), 'r', linewidth=1.0)
+        ax.set_xlim(0, SPECTRUM_MAX_FREQUENCY)
+        # Подписи промежуточных делений логарифмической оси - основная часть времени отрисовки
+        ax.yaxis.set_minor_formatter(NullFormatter())
+        ax.set_xlabel('Частота (Гц)', fontsize=8)
+        ax.set_title('Спектр мощности', fontsize=10, fontweight='bold')
+        ax.tick_params(axis='both', labelsize=7)
+        ax.grid(True, alpha=0.3, linestyle='--')
+        thumbnails['spectrum'] = _figure_png(fig)
+
+    return thumbnails
+
+
+def _figure_png(fig: Figure) -> bytes:
+    buffer = io.BytesIO()
+    # Поля заданы вручную: bbox_inches='tight' отрисовывает фигуру дважды
+    fig.subplots_adjust(left=0.1, right=0.98, bottom=0.16, top=0.88)
+    fig.savefig(buffer, format='png', dpi=THUMBNAIL_DPI, facecolor='white')
+    return buffer.getvalue()
+
+
+def render_html(payload: Dict[str, Any], thumbnails: Optional[Dict[str, bytes]] = None) -> str:
+    """Самодостаточная HTML-страница отчета с встроенными миниатюрами и данными"""
+    if thumbnails is None:
+        thumbnails = render_thumbnails(payload)
+
+    recording = payload['recording']
+    analysis = payload.get('analysis', {})
+    recommendations = payload.get('recommendations') or {}
+
+    body = ""
+
+    if payload.get('patient_info'):
+        rows = "".join(f'<div class="row"><div class="k">{safe_html(key)}</div>'
+                       f'<div class="v">{safe_html(value)}</div></div>'
+                       for key, value in payload['patient_info'].items() if value)
+        body += f'<div class="card"><h3>Данные пациента</h3>{rows}</div>'
+
+    body += f"""
+    <div class="card">
+      <h3>Параметры записи</h3>
+      <div class="row"><div class="k">Дата</div><div class="v">{safe_html(payload.get('created', ''))}</div></div>
+      <div class="row"><div class="k">Частота дискретизации</div><div class="v">{recording['sampling_rate']:.0f} Гц</div></div>
+      <div class="row"><div class="k">Длительность</div><div class="v">{recording['duration']:.1f} с</div></div>
+      <div class="row"><div class="k">Каналы</div><div class="v">{safe_html(', '.join(recording['channel_names']))}</div></div>
+    </div>
+    """
+
+    general = recommendations.get('general', {}) if isinstance(recommendations, dict) else {}
+    dominant = str(general.get('dominant_rhythm', analysis.get('dominant_rhythm', '—'))).upper()
+    entropy = analysis.get('spectral_entropy')
+    body += f"""
+    <div class="card">
+      <h3>Общее состояние</h3>
+      <div class="row"><div class="k">Итог</div><div class="v">{safe_html(general.get('summary', '—'))}</div></div>
+      <div class="row"><div class="k">Доминирующий ритм</div><div class="v">{badge(dominant, "accent")}</div></div>
+      <div class="row"><div class="k">Расслабление</div><div class="v">{safe_html(general.get('relaxation_level', '—'))}</div></div>
+      <div class="row"><div class="k">Спектральная энтропия</div><div class="v">{'—' if entropy is None else f'{entropy:.3f}'}</div></div>
+    </div>
+    """
+
+    details = recommendations.get('rhythm_details', {}) if isinstance(recommendations, dict) else {}
+    relative_power = analysis.get('relative_power', {})
+    if relative_power:
+        rows = ""
+        for rhythm, power in relative_power.items():
+            state = details.get(rhythm, {}).get('state', '—')
+            rows += (f"<tr><td>{safe_html(str(rhythm).upper())}</td><td>{power * 100:.1f}%</td>"
+                     f"<td>{badge(state, state_level(state))}</td>"
+                     f"<td>{safe_html(details.get(rhythm, {}).get('recommendation', ''))}</td></tr>")
+        body += f"""
+        <div class="card">
+          <h3>Ритмы</h3>
+          <table><tr><th>Ритм</th><th>Мощность</th><th>Состояние</th><th>Рекомендация</th></tr>{rows}</table>
+        </div>
+        """
+
+    for key, title in (('raw', 'Исходные сигналы'), ('processed', 'Обработанные сигналы'),
+                       ('spectrum', 'Спектральный анализ')):
+        if key in thumbnails:
+            image = base64.b64encode(thumbnails[key]).decode('ascii')
+            body += (f'<div class="card"><h3>{title}</h3>'
+                     f'<img alt="{title}" src="data:image/png;base64,{image}"></div>')
+
+    specific = recommendations.get('specific_recommendations') if isinstance(recommendations, dict) else None
+    if specific:
+        items = "".join(f"<li>{safe_html(rec)}</li>" for rec in specific)
+        body += f'<div class="card"><h3>Специальные рекомендации</h3><ul>{items}</ul></div>'
+
+    # Данные отчета для повторного использования (закрывающий тег экранирован)
+    data_json = payload_to_json(payload).replace('</', '<\\/')
+    head = f'\n<script type="application/json" id="eeg-report-data">{data_json}</script>'
+
+    return html_page("Отчет по анализу ЭЭГ", body, head_html=head)
+
+
+def extract_payload(html: str) -> Dict[str, Any]:
+    """Данные отчета из HTML-файла, созданного render_html"""
+    marker = '<script type="application/json" id="eeg-report-data">'
+    start = html.find(marker)
+    if start < 0:
+        raise ValueError("В HTML нет данных отчета ЭЭГ")
+    start += len(marker)
+    end = html.index('</script>', start)
+    return json.loads(html[start:end])
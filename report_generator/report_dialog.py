@@ -2,16 +2,24 @@ from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QFormLayout,
                              QPushButton, QLineEdit, QTextEdit, QLabel, 
                              QGroupBox, QCheckBox, QFileDialog, QMessageBox,
                              QDateEdit, QSpinBox, QComboBox)
-from PyQt5.QtCore import Qt, QDate
-from PyQt5.QtGui import QFont
+from PyQt5.QtCore import Qt, QDate, QUrl
+from PyQt5.QtGui import QFont, QDesktopServices
 import os
+import tempfile
 from datetime import datetime
 
 
 class ReportConfigDialog(QDialog):
     """Диалог настройки PDF-отчета"""
     
-    def __init__(self, parent=None):
+    # Форматы отчета: (подпись, формат, фильтр диалога сохранения)
+    REPORT_FORMATS = [
+        ("PDF (полный отчет)", 'pdf', "PDF файлы (*.pdf)"),
+        ("HTML (легкий отчет с миниатюрами)", 'html', "HTML файлы (*.html)"),
+        ("JSON (результаты анализа)", 'json', "JSON файлы (*.json)")
+    ]
+
+    def __init__(self, parent=None, report_generator=None):
         super().__init__(parent)
         self.setWindowTitle("Настройка PDF-отчета")
         self.setModal(True)
@@ -20,6 +28,8 @@ class ReportConfigDialog(QDialog):
         # Данные для отчета
         self.patient_info = {}
         self.output_path = ""
+        # Генератор с данными анализа - для предпросмотра в HTML
+        self.report_generator = report_generator
         
         self.init_ui()
         
@@ -91,6 +101,21 @@ class ReportConfigDialog(QDialog):
         sections_layout.addWidget(self.include_recommendations)
         
         report_layout.addLayout(sections_layout)
+
+        # Качество растровых элементов отчета
+        quality_layout = QFormLayout()
+        self.quality_combo = QComboBox()
+        self.quality_combo.addItem("Печать (300 dpi)", 'print')
+        self.quality_combo.addItem("Стандарт (200 dpi)", 'standard')
+        self.quality_combo.addItem("Черновик (100 dpi)", 'draft')
+        quality_layout.addRow("Качество:", self.quality_combo)
+
+        self.format_combo = QComboBox()
+        for label, report_format, _ in self.REPORT_FORMATS:
+            self.format_combo.addItem(label, report_format)
+        self.format_combo.currentIndexChanged.connect(self.on_format_changed)
+        quality_layout.addRow("Формат:", self.format_combo)
+        report_layout.addLayout(quality_layout)
         
         report_group.setLayout(report_layout)
         layout.addWidget(report_group)
@@ -164,14 +189,15 @@ class ReportConfigDialog(QDialog):
         """Выбор файла для сохранения"""
         filename, _ = QFileDialog.getSaveFileName(
             self,
-            "Сохранить PDF-отчет",
+            "Сохранить отчет",
             self.get_default_filename(),
-            "PDF файлы (*.pdf);;Все файлы (*)"
+            f"{self._format_filter()};;Все файлы (*)"
         )
         
         if filename:
-            if not filename.endswith('.pdf'):
-                filename += '.pdf'
+            extension = f'.{self.format_combo.currentData()}'
+            if not filename.endswith(extension):
+                filename += extension
             self.file_path_edit.setText(filename)
             self.output_path = filename
     
@@ -184,9 +210,9 @@ class ReportConfigDialog(QDialog):
             # Очищаем имя от недопустимых символов
             safe_name = "".join(c for c in patient_name if c.isalnum() or c in (' ', '-', '_')).strip()
             safe_name = safe_name.replace(' ', '_')
-            filename = f"EEG_Report_{safe_name}_{timestamp}.pdf"
+            filename = f"EEG_Report_{safe_name}_{timestamp}.{self.format_combo.currentData()}"
         else:
-            filename = f"EEG_Report_{timestamp}.pdf"
+            filename = f"EEG_Report_{timestamp}.{self.format_combo.currentData()}"
         
         # Пробуем найти доступную папку для сохранения
         possible_paths = [
@@ -222,7 +248,18 @@ class ReportConfigDialog(QDialog):
             return self.output_path
         
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        return f"EEG_Report_{timestamp}.pdf"
+        return f"EEG_Report_{timestamp}.{self.format_combo.currentData()}"
+    
+    def _format_filter(self):
+        return self.REPORT_FORMATS[self.format_combo.currentIndex()][2]
+
+    def on_format_changed(self):
+        """Смена формата: меняем расширение файла"""
+        path = self.file_path_edit.text()
+        if path:
+            path = f"{os.path.splitext(path)[0]}.{self.format_combo.currentData()}"
+            self.file_path_edit.setText(path)
+            self.output_path = path
     
     def on_auto_name_changed(self):
         """Обработка изменения автоматического имени"""
@@ -230,8 +267,14 @@ class ReportConfigDialog(QDialog):
             self.generate_filename()
     
     def preview_report(self):
-        """Предварительный просмотр настроек отчета"""
+        """Предварительный просмотр: легкий HTML-отчет в браузере или сводка настроек"""
         info = self.get_report_info()
+
+        if self.report_generator is not None:
+            preview_path = os.path.join(tempfile.gettempdir(), "EEG_Report_preview.html")
+            if (self.report_generator.generate_html_report(preview_path, info['patient_info'])
+                    and QDesktopServices.openUrl(QUrl.fromLocalFile(preview_path))):
+                return
         
         preview_text = f"""
 ПРЕДВАРИТЕЛЬНЫЙ ПРОСМОТР ОТЧЕТА
@@ -289,6 +332,8 @@ class ReportConfigDialog(QDialog):
             'include_spectral_analysis': self.include_spectral_analysis.isChecked(),
             'include_rhythm_analysis': self.include_rhythm_analysis.isChecked(),
             'include_recommendations': self.include_recommendations.isChecked(),
+            'quality': self.quality_combo.currentData(),
+            'format': self.format_combo.currentData(),
             'comments': '',  # Комментарии не используются
             'output_path': self.file_path_edit.text()
         }
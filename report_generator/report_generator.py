@@ -1,28 +1,86 @@
+import hashlib
+import io
 import os
+import pickle
+from collections import OrderedDict
 import numpy as np
-import matplotlib.pyplot as plt
 from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
 from matplotlib.gridspec import GridSpec
 from datetime import datetime
 import pandas as pd
 from typing import Dict, Any, Optional, Tuple
 import matplotlib
 import warnings
+from report_generator.html_report import (THUMBNAIL_DPI, build_payload, payload_to_json,
+                                          render_html, render_thumbnails)
+from utils.decimation import minmax_envelope
 matplotlib.use('Agg')  # Используем backend без GUI для лучшего качества PDF
 warnings.filterwarnings('ignore', message='This figure includes Axes that are not compatible with tight_layout')
 
+# Размер страницы A4 в дюймах
+PAGE_SIZE = (8.27, 11.69)
+
+# Разрешение растровых элементов: черновик для предпросмотра, стандарт и печать (как раньше, 300 dpi)
+DPI_PRESETS = {
+    'draft': 100,
+    'standard': 200,
+    'print': 300
+}
+
+# Страницы отчета в порядке следования и методы, которые их строят
+PAGE_BUILDERS = OrderedDict([
+    ('title', '_create_title_page'),
+    ('raw_signals', '_create_signals_page'),
+    ('processed_signals', '_create_signals_page'),
+    ('spectral_analysis', '_create_spectral_analysis_page'),
+    ('recommendations', '_create_recommendations_page')
+])
+
+# Ширина области графика сигнала на странице (дюймы) - по ней выбирается прореживание
+SIGNAL_PLOT_WIDTH = 7.0
+
+# Максимум каналов на одной странице сигналов, остальные переносятся на следующие страницы
+CHANNELS_PER_PAGE = 8
+
+# Сколько отрисованных страниц хранить в памяти генератора
+PAGE_CACHE_SIZE = 32
+
+# Форматы отчета: полный PDF и легкие HTML (с миниатюрами) / JSON для предпросмотра и обмена
+REPORT_FORMATS = ('pdf', 'html', 'json')
+
 
 class EEGReportGenerator:
-    """Генератор PDF-отчетов для анализа ЭЭГ"""
-    
-    def __init__(self):
+    """Генератор PDF-отчетов для анализа ЭЭГ.
+
+    Каждая страница строится только из своей части данных ("содержимого"), отрисовывается
+    в одностраничный PDF и кешируется по хешу содержимого и разрешения. Страницы независимы:
+    переданный executor (например, пул процессов в пакетной службе) рисует их параллельно.
+    При повторной генерации с другими данными пациента или рекомендациями перерисовываются
+    только изменившиеся страницы. Страницы склеиваются через pypdf (если он установлен).
+    """
+
+    def __init__(self, executor=None, cache_dir=None, rasterize_signals=False):
         self.report_data = {}
         self.figures = []
-        
-    def set_data(self, raw_data: np.ndarray, processed_data: np.ndarray, 
+        # Растеризовать линии сигналов с разрешением пресета качества. Огибающая и так
+        # ограничивает число точек, а растр каждого графика в PDF заметно дороже вектора
+        self.rasterize_signals = rasterize_signals
+        # Исполнитель отрисовки страниц; по умолчанию - последовательно в текущем процессе:
+        # fork многопоточного GUI-приложения для пула процессов небезопасен
+        self.executor = executor
+        # Каталог для кеша страниц между сеансами (необязательно)
+        self.cache_dir = cache_dir
+        self._page_cache = OrderedDict()
+        # Миниатюры последнего HTML-отчета: (ключ, миниатюры) - не зависят от данных пациента
+        self._thumbnails = (None, None)
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def set_data(self, raw_data: np.ndarray, processed_data: np.ndarray,
                  analysis_results: Dict[str, Any], sampling_rate: float,
                  channel_names: list, recommendations: Dict[str, Any],
-                 performance_data: Optional[Dict] = None, 
+                 performance_data: Optional[Dict] = None,
                  processing_params: Optional[Dict] = None):
         """Установка данных для отчета"""
         self.report_data = {
@@ -36,273 +94,435 @@ class EEGReportGenerator:
             'processing_params': processing_params or {},
             'timestamp': datetime.now()
         }
-        
-    def generate_report(self, output_path: str, patient_info: Optional[Dict] = None) -> bool:
-        """Генерация полного PDF-отчета"""
+
+    def generate_report(self, output_path: str, patient_info: Optional[Dict] = None,
+                        quality: str = 'print', channels: Optional[list] = None,
+                        raise_errors: bool = False) -> bool:
+        """Генерация полного PDF-отчета; raise_errors=True пробрасывает исключение вместо False"""
         try:
-            with PdfPages(output_path) as pdf:
-                # Титульная страница
-                self._create_title_page(pdf, patient_info)
-                
-                # Страница с исходными сигналами
-                self._create_raw_signals_page(pdf)
-                
-                # Страница с обработанными сигналами
-                self._create_processed_signals_page(pdf)
-                
-                # Страница со спектральным анализом
-                self._create_spectral_analysis_page(pdf)
-                
-                # Страница с рекомендациями и выводами
-                self._create_recommendations_page(pdf)
-                
-                # Метаданные PDF
-                d = pdf.infodict()
-                d['Title'] = 'EEG Analysis Report'
-                d['Author'] = 'EEG Analyzer'
-                d['Subject'] = 'Electroencephalogram Analysis'
-                d['Keywords'] = 'EEG, Brain Activity, Signal Processing'
-                d['CreationDate'] = datetime.now()
-                
+            dpi = self._resolve_dpi(quality)
+
+            try:
+                from pypdf import PdfWriter
+            except ImportError:
+                # Без pypdf страницы не склеить - рисуем последовательно прямо в PdfPages
+                self._write_pdf_pages(output_path, self._page_contents(patient_info, channels, dpi), dpi)
+                return True
+
+            writer = PdfWriter()
+            for _, page in self._render_pages(patient_info, 'pdf', dpi, channels):
+                writer.append(io.BytesIO(page))
+
+            # Метаданные PDF
+            writer.add_metadata(self._pdf_metadata(prefix='/'))
+            with open(output_path, 'wb') as f:
+                writer.write(f)
+
             return True
-            
+
         except Exception as e:
+            if raise_errors:
+                raise
             print(f"Ошибка при создании отчета: {e}")
             return False
-    
-    def _create_title_page(self, pdf: PdfPages, patient_info: Optional[Dict]):
+
+    def generate_html_report(self, output_path: str, patient_info: Optional[Dict] = None,
+                             channels: Optional[list] = None, raise_errors: bool = False) -> bool:
+        """Самодостаточный HTML-отчет: сводка анализа, миниатюры и сжатые данные сигналов"""
+        try:
+            payload = self.report_payload(patient_info, channels)
+            html = render_html(payload, self._report_thumbnails(payload))
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(html)
+            return True
+
+        except Exception as e:
+            if raise_errors:
+                raise
+            print(f"Ошибка при создании HTML-отчета: {e}")
+            return False
+
+    def generate_json_report(self, output_path: str, patient_info: Optional[Dict] = None,
+                             channels: Optional[list] = None, raise_errors: bool = False) -> bool:
+        """Результаты анализа и прореженные сигналы в JSON"""
+        try:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(payload_to_json(self.report_payload(patient_info, channels)))
+            return True
+
+        except Exception as e:
+            if raise_errors:
+                raise
+            print(f"Ошибка при создании JSON-отчета: {e}")
+            return False
+
+    def export_report(self, output_path: str, patient_info: Optional[Dict] = None,
+                      report_format: str = 'pdf', quality: str = 'print',
+                      channels: Optional[list] = None, raise_errors: bool = False) -> bool:
+        """Отчет в выбранном формате (pdf, html, json).
+
+        По умолчанию ошибка печатается и возвращается False; raise_errors=True пробрасывает
+        исключение (пакетной службе нужна причина, а не только факт ошибки).
+        """
+        if report_format == 'pdf':
+            return self.generate_report(output_path, patient_info, quality=quality, channels=channels,
+                                        raise_errors=raise_errors)
+        if report_format == 'html':
+            return self.generate_html_report(output_path, patient_info, channels, raise_errors)
+        if report_format == 'json':
+            return self.generate_json_report(output_path, patient_info, channels, raise_errors)
+        raise ValueError(f"Неизвестный формат отчета: {report_format}. Доступны: {', '.join(REPORT_FORMATS)}")
+
+    def report_payload(self, patient_info: Optional[Dict] = None, channels: Optional[list] = None) -> Dict[str, Any]:
+        """Данные легкого отчета (словарь, совместимый с JSON)"""
+        indices = self._select_channels(list(self.report_data['channel_names']), channels)
+        return build_payload(self.report_data, indices, patient_info)
+
+    def _report_thumbnails(self, payload: Dict[str, Any]) -> Dict[str, bytes]:
+        content = {key: payload.get(key) for key in ('recording', 'traces', 'spectrum')}
+        key = self._page_key('thumbnails', content, 'png', THUMBNAIL_DPI)
+        if self._thumbnails[0] == key:
+            self.cache_hits += 1
+            return self._thumbnails[1]
+
+        self.cache_misses += 1
+        thumbnails = render_thumbnails(payload)
+        self._thumbnails = (key, thumbnails)
+        return thumbnails
+
+    def render_pages(self, patient_info: Optional[Dict] = None, quality: str = 'draft',
+                     channels: Optional[list] = None) -> list:
+        """Страницы в PNG для предварительного просмотра: список (имя страницы, байты PNG)"""
+        return self._render_pages(patient_info, 'png', self._resolve_dpi(quality), channels)
+
+    def _render_pages(self, patient_info: Optional[Dict], fmt: str, dpi: int,
+                      channels: Optional[list] = None) -> list:
+        contents = self._page_contents(patient_info, channels, dpi)
+
+        keys = [self._page_key(name, content, fmt, dpi) for name, content in contents]
+        pages = [self._cached_page(key, fmt) for key in keys]
+
+        missing = [i for i, page in enumerate(pages) if page is None]
+        self.cache_hits += len(pages) - len(missing)
+        self.cache_misses += len(missing)
+
+        if missing:
+            tasks = [(contents[i][0], contents[i][1], fmt, dpi) for i in missing]
+            for i, page in zip(missing, self._render_tasks(tasks)):
+                pages[i] = page
+                self._store_page(keys[i], fmt, page)
+
+        return [(name, page) for (name, _), page in zip(contents, pages)]
+
+    def _write_pdf_pages(self, output_path: str, contents: list, dpi: int):
+        with PdfPages(output_path) as pdf:
+            for name, content in contents:
+                fig = self._build_page(name, content)
+                pdf.savefig(fig, bbox_inches='tight', dpi=dpi, facecolor='white')
+
+            # Метаданные PDF
+            pdf.infodict().update(self._pdf_metadata())
+
+    @staticmethod
+    def _pdf_metadata(prefix: str = '') -> Dict[str, Any]:
+        metadata = {
+            'Title': 'EEG Analysis Report',
+            'Author': 'EEG Analyzer',
+            'Subject': 'Electroencephalogram Analysis',
+            'Keywords': 'EEG, Brain Activity, Signal Processing',
+            'CreationDate': datetime.now()
+        }
+        if prefix:
+            # pypdf ожидает ключи вида /Title и дату в формате PDF
+            metadata['CreationDate'] = metadata['CreationDate'].strftime("D:%Y%m%d%H%M%S")
+        return {f'{prefix}{key}': value for key, value in metadata.items()}
+
+    def get_cache_statistics(self) -> Dict[str, int]:
+        return {
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'size': len(self._page_cache)
+        }
+
+    def clear_cache(self):
+        self._page_cache.clear()
+        self._thumbnails = (None, None)
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @staticmethod
+    def _resolve_dpi(quality) -> int:
+        if isinstance(quality, (int, float)):
+            return int(quality)
+        if quality not in DPI_PRESETS:
+            raise ValueError(f"Неизвестное качество отчета: {quality}. Доступны: {', '.join(DPI_PRESETS)}")
+        return DPI_PRESETS[quality]
+
+    def _page_contents(self, patient_info: Optional[Dict], channels: Optional[list] = None,
+                       dpi: int = DPI_PRESETS['print']) -> list:
+        """Данные каждой страницы - ровно то, от чего зависит ее изображение"""
+        data = self.report_data
+        channel_names = list(data['channel_names'])
+        indices = self._select_channels(channel_names, channels)
+
+        analysis = data['analysis_results']
+        spectral_keys = ('frequencies', 'power_spectrum', 'relative_power',
+                         'dominant_rhythm', 'spectral_entropy', 'peak_frequency')
+
+        contents = [
+            ('title', {
+                'patient_info': dict(patient_info or {}),
+                'date': data['timestamp'].strftime('%d.%m.%Y'),
+                'sampling_rate': data['sampling_rate'],
+                'channel_names': channel_names,
+                'duration': data['raw_data'].shape[1] / data['sampling_rate']
+            })
+        ]
+        contents += self._signal_pages('raw_signals', 'Исходные сигналы', 'b',
+                                       data['raw_data'], indices, channel_names, data['sampling_rate'], dpi,
+                                       self.rasterize_signals)
+        contents += self._signal_pages('processed_signals', 'ОБРАБОТАННЫЕ СИГНАЛЫ ЭЭГ', 'g',
+                                       data['processed_data'], indices, channel_names, data['sampling_rate'], dpi,
+                                       self.rasterize_signals)
+        contents += [
+            ('spectral_analysis', {key: analysis.get(key) for key in spectral_keys if key in analysis}),
+            ('recommendations', data['recommendations'])
+        ]
+        return contents
+
+    @staticmethod
+    def _signal_pages(name: str, title: str, color: str, signals: np.ndarray, indices: list,
+                      channel_names: list, sampling_rate: float, dpi: int, rasterized: bool = False) -> list:
+        """Страницы сигналов: огибающая min/max по ширине печати, не больше CHANNELS_PER_PAGE каналов на странице"""
+        signals = np.atleast_2d(signals)
+        n_pages = max(1, -(-len(indices) // CHANNELS_PER_PAGE))
+        n_buckets = int(SIGNAL_PLOT_WIDTH * dpi)
+
+        pages = []
+        for page in range(n_pages):
+            page_indices = indices[page * CHANNELS_PER_PAGE:(page + 1) * CHANNELS_PER_PAGE]
+            x, y = minmax_envelope(signals[page_indices], n_buckets)
+            pages.append((name, {
+                'title': title if n_pages == 1 else f'{title} ({page + 1}/{n_pages})',
+                'color': color,
+                'time': x / sampling_rate,
+                'data': y,
+                'duration': signals.shape[1] / sampling_rate,
+                'channel_names': [channel_names[i] for i in page_indices],
+                'rasterized': rasterized
+            }))
+        return pages
+
+    @staticmethod
+    def _select_channels(channel_names: list, channels: Optional[list] = None) -> list:
+        if channels is None:
+            # По умолчанию - все каналы, кроме служебных (время)
+            return [i for i, name in enumerate(channel_names)
+                    if 'Время' not in name and 'время' not in name]
+
+        selected = []
+        for channel in channels:
+            if isinstance(channel, (int, np.integer)):
+                if not 0 <= channel < len(channel_names):
+                    raise ValueError(f"Номер канала {channel} вне диапазона 0-{len(channel_names) - 1}")
+                selected.append(int(channel))
+            elif channel in channel_names:
+                selected.append(channel_names.index(channel))
+            else:
+                raise ValueError(f"Канал {channel} не найден. Доступны: {', '.join(channel_names)}")
+        return selected
+
+    @staticmethod
+    def _page_key(name: str, content: Any, fmt: str, dpi: int) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(pickle.dumps((name, content, fmt, dpi), protocol=4))
+        return digest.hexdigest()
+
+    def _cached_page(self, key: str, fmt: str) -> Optional[bytes]:
+        page = self._page_cache.get(key)
+        if page is not None:
+            self._page_cache.move_to_end(key)
+            return page
+
+        if self.cache_dir:
+            path = os.path.join(self.cache_dir, f'{key}.{fmt}')
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    page = f.read()
+                self._remember_page(key, page)
+        return page
+
+    def _store_page(self, key: str, fmt: str, page: bytes):
+        self._remember_page(key, page)
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(os.path.join(self.cache_dir, f'{key}.{fmt}'), 'wb') as f:
+                f.write(page)
+
+    def _remember_page(self, key: str, page: bytes):
+        self._page_cache[key] = page
+        self._page_cache.move_to_end(key)
+        while len(self._page_cache) > PAGE_CACHE_SIZE:
+            self._page_cache.popitem(last=False)
+
+    def _render_tasks(self, tasks: list) -> list:
+        if self.executor is not None:
+            return self.executor.map(self._render_page, tasks)
+        return [self._render_page(task) for task in tasks]
+
+    @staticmethod
+    def _build_page(name: str, content: Any) -> Figure:
+        return getattr(EEGReportGenerator, PAGE_BUILDERS[name])(content)
+
+    @staticmethod
+    def _render_page(task: Tuple[str, Any, str, int]) -> bytes:
+        """Отрисовка одной страницы в PDF или PNG (может выполняться в дочернем процессе)"""
+        name, content, fmt, dpi = task
+        fig = EEGReportGenerator._build_page(name, content)
+
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=fmt, bbox_inches='tight', dpi=dpi, facecolor='white')
+        return buffer.getvalue()
+
+    @staticmethod
+    def _create_title_page(content: Dict[str, Any]) -> Figure:
         """Создание титульной страницы"""
-        fig = plt.figure(figsize=(8.27, 11.69), dpi=300)
+        fig = Figure(figsize=PAGE_SIZE)
         fig.patch.set_facecolor('white')
-        
+
         # Очищаем фигуру от осей
         ax = fig.add_subplot(111)
         ax.axis('off')
-        
+
         # Заголовок
         ax.text(0.5, 0.90, 'Отчет по анализу ЭЭГ',
                 ha='center', va='center', fontsize=24, fontweight='bold',
                 transform=ax.transAxes)
-    
+
         y_pos = 0.75
-        if patient_info and patient_info:
+        patient_info = content['patient_info']
+        if patient_info:
             ax.text(0.5, y_pos, 'Данные пацианта',
                     ha='center', va='center', fontsize=16, fontweight='bold',
                     transform=ax.transAxes)
             y_pos -= 0.06
-            
+
             # Создаем таблицу для информации о пациенте
             patient_data = []
             for key, value in patient_info.items():
                 if value:  # Только если значение не пустое
                     patient_data.append([f'{key}:', str(value)])
-            
+
             if patient_data:
                 for label, value in patient_data:
-                    ax.text(0.25, y_pos, label, ha='left', va='center', 
+                    ax.text(0.25, y_pos, label, ha='left', va='center',
                            fontsize=12, fontweight='bold', transform=ax.transAxes)
-                    ax.text(0.75, y_pos, value, ha='right', va='center', 
+                    ax.text(0.75, y_pos, value, ha='right', va='center',
                            fontsize=12, transform=ax.transAxes)
                     y_pos -= 0.04
-        
+
         # Информация о записи
         y_pos -= 0.06
-        ax.text(0.5, y_pos, 'Параметры записи', 
+        ax.text(0.5, y_pos, 'Параметры записи',
                 ha='center', va='center', fontsize=16, fontweight='bold',
                 transform=ax.transAxes)
         y_pos -= 0.06
-        
+
         recording_info = [
-            ('Дата', self.report_data['timestamp'].strftime('%d.%m.%Y')),
-            ('Частота дискретизации', f"{self.report_data['sampling_rate']:.0f} Гц"),
-            ('Количество каналов', str(len(self.report_data['channel_names']))),
-            ('Длительность записи', f"{self.report_data['raw_data'].shape[1] / self.report_data['sampling_rate']:.1f} сек"),
-            ('Каналы', ', '.join(self.report_data['channel_names'][:6]))  # Первые 6 каналов
+            ('Дата', content['date']),
+            ('Частота дискретизации', f"{content['sampling_rate']:.0f} Гц"),
+            ('Количество каналов', str(len(content['channel_names']))),
+            ('Длительность записи', f"{content['duration']:.1f} сек"),
+            ('Каналы', ', '.join(content['channel_names'][:6]))  # Первые 6 каналов
         ]
-        
+
         for label, value in recording_info:
-            ax.text(0.25, y_pos, f'{label}:', ha='left', va='center', 
+            ax.text(0.25, y_pos, f'{label}:', ha='left', va='center',
                    fontsize=12, fontweight='bold', transform=ax.transAxes)
-            ax.text(0.75, y_pos, str(value), ha='right', va='center', 
+            ax.text(0.75, y_pos, str(value), ha='right', va='center',
                    fontsize=12, transform=ax.transAxes)
             y_pos -= 0.04
-        
+
         # Устанавливаем пределы для правильного отображения
         ax.set_xlim(0, 1)
         ax.set_ylim(0, 1)
-        
-        pdf.savefig(fig, bbox_inches='tight', dpi=300, facecolor='white')
-        plt.close(fig)
-    
-    def _create_raw_signals_page(self, pdf: PdfPages):
-        """Создание страницы с исходными сигналами"""
-        fig = plt.figure(figsize=(8.27, 11.69), dpi=300)
-        fig.patch.set_facecolor('white')
-        
-        raw_data = self.report_data['raw_data']
-        sampling_rate = self.report_data['sampling_rate']
-        channel_names = self.report_data['channel_names']
-        
-        # Выбираем только каналы A0 и A2, исключаем служебные каналы
-        selected_channels = []
-        selected_indices = []
-        for i, name in enumerate(channel_names):
-            # Исключаем каналы с "Время" в названии и выбираем только A0 и A2
-            if name in ['A0', 'A2'] and 'Время' not in name and 'время' not in name:
-                selected_channels.append(name)
-                selected_indices.append(i)
-        
-        n_channels = len(selected_channels)
-        if n_channels == 0:
-            # Если A0 и A2 не найдены, используем первые 2 канала (кроме "Время")
-            n_channels = 0
-            for i, name in enumerate(channel_names):
-                if 'Время' not in name and 'время' not in name and n_channels < 2:
-                    selected_indices.append(i)
-                    selected_channels.append(name)
-                    n_channels += 1
-        
-        # Создаем массив отсчетов (без времени)
-        samples = np.arange(raw_data.shape[1])
-        
-        # Создание субплотов (заголовок + каналы)
-        gs = GridSpec(n_channels + 1, 1, figure=fig, 
-                     height_ratios=[0.1] + [1] * n_channels,
-                     hspace=0.3)
-        
-        # Заголовок
-        title_ax = fig.add_subplot(gs[0, 0])
-        title_ax.text(0.5, 0.5, 'Исходные сигналы',
-                     ha='center', va='center', fontsize=16, fontweight='bold',
-                     transform=title_ax.transAxes)
-        title_ax.axis('off')
-        
-        # Графики сигналов
-        for idx, ch_idx in enumerate(selected_indices):
-            ax = fig.add_subplot(gs[idx + 1, 0])
-            
-            # Ограничиваем отображение первыми 5000 отсчетами для лучшей читаемости
-            max_samples = min(5000, len(samples))
-            display_samples = samples[:max_samples]
-            display_data = raw_data[ch_idx][:max_samples]
-            
-            ax.plot(display_samples, display_data, 'b', linewidth=0.8, alpha=0.9)
-            ax.set_ylabel(f'{selected_channels[idx]}', rotation=0, ha='right', va='center', 
-                         fontsize=10, fontweight='bold')
-            ax.grid(True, alpha=0.3, linestyle='--')
-            ax.set_xlim(0, max_samples)
-            ax.set_xlabel('Отсчеты', fontsize=9)
-            
-            # Улучшаем форматирование осей
-            ax.tick_params(axis='both', which='major', labelsize=8)
-        
-        try:
-            plt.tight_layout()
-        except:
-            pass  # Игнорируем предупреждения tight_layout
-        pdf.savefig(fig, bbox_inches='tight', dpi=300, facecolor='white')
-        plt.close(fig)
-    
-    def _create_processed_signals_page(self, pdf: PdfPages):
-        """Создание страницы с обработанными сигналами"""
-        fig = plt.figure(figsize=(8.27, 11.69), dpi=300)
+
+        return fig
+
+    @staticmethod
+    def _create_signals_page(content: Dict[str, Any]) -> Figure:
+        """Создание страницы с исходными или обработанными сигналами"""
+        fig = Figure(figsize=PAGE_SIZE)
         fig.patch.set_facecolor('white')
-        
-        processed_data = self.report_data['processed_data']
-        sampling_rate = self.report_data['sampling_rate']
-        channel_names = self.report_data['channel_names']
-        
-        # Выбираем только каналы A0 и A2, исключаем служебные каналы
-        selected_channels = []
-        selected_indices = []
-        for i, name in enumerate(channel_names):
-            # Исключаем каналы с "Время" в названии и выбираем только A0 и A2
-            if name in ['A0', 'A2'] and 'Время' not in name and 'время' not in name:
-                selected_channels.append(name)
-                selected_indices.append(i)
-        
-        n_channels = len(selected_channels)
-        if n_channels == 0:
-            # Если A0 и A2 не найдены, используем первые 2 канала (кроме "Время")
-            n_channels = 0
-            for i, name in enumerate(channel_names):
-                if 'Время' not in name and 'время' not in name and n_channels < 2:
-                    selected_indices.append(i)
-                    selected_channels.append(name)
-                    n_channels += 1
-        
-        # Создаем массив отсчетов (без времени)
-        samples = np.arange(processed_data.shape[1])
-        
-        # Создание субплотов (заголовок + каналы)
-        gs = GridSpec(n_channels + 1, 1, figure=fig, 
-                     height_ratios=[0.1] + [1] * n_channels,
+
+        signals = content['data']
+        channel_names = content['channel_names']
+        n_channels = len(channel_names)
+
+        # Создание субплотов (заголовок + каналы); высота строк как при двух каналах на странице
+        gs = GridSpec(max(n_channels, 2) + 1, 1, figure=fig,
+                     height_ratios=[0.1] + [1] * max(n_channels, 2),
                      hspace=0.3)
-        
+
         # Заголовок
         title_ax = fig.add_subplot(gs[0, 0])
-        title_ax.text(0.5, 0.5, 'ОБРАБОТАННЫЕ СИГНАЛЫ ЭЭГ', 
+        title_ax.text(0.5, 0.5, content['title'],
                      ha='center', va='center', fontsize=16, fontweight='bold',
                      transform=title_ax.transAxes)
         title_ax.axis('off')
-        
+
         # Графики сигналов
-        for idx, ch_idx in enumerate(selected_indices):
+        for idx, name in enumerate(channel_names):
             ax = fig.add_subplot(gs[idx + 1, 0])
-            
-            # Ограничиваем отображение первыми 5000 отсчетами
-            max_samples = min(5000, len(samples))
-            display_samples = samples[:max_samples]
-            display_data = processed_data[ch_idx][:max_samples]
-            
-            ax.plot(display_samples, display_data, 'g', linewidth=0.8, alpha=0.9)
-            ax.set_ylabel(f'{selected_channels[idx]}', rotation=0, ha='right', va='center', 
+
+            # Огибающая уже ограничена шириной печати; при rasterize линия растеризуется с разрешением страницы
+            ax.plot(content['time'], signals[idx], content['color'], linewidth=0.8, alpha=0.9,
+                    rasterized=content['rasterized'])
+            ax.set_ylabel(f'{name}', rotation=0, ha='right', va='center',
                          fontsize=10, fontweight='bold')
             ax.grid(True, alpha=0.3, linestyle='--')
-            ax.set_xlim(0, max_samples)
-            ax.set_xlabel('Отсчеты', fontsize=9)
-            
+            ax.set_xlim(0, content['duration'])
+            ax.set_xlabel('Время (с)', fontsize=9)
+
             # Улучшаем форматирование осей
             ax.tick_params(axis='both', which='major', labelsize=8)
-        
+
         try:
-            plt.tight_layout()
+            fig.tight_layout()
         except:
             pass  # Игнорируем предупреждения tight_layout
-        pdf.savefig(fig, bbox_inches='tight', dpi=300, facecolor='white')
-        plt.close(fig)
-    
-    def _create_spectral_analysis_page(self, pdf: PdfPages):
+        return fig
+
+    @staticmethod
+    def _create_spectral_analysis_page(analysis_results: Dict[str, Any]) -> Figure:
         """Создание страницы со спектральным анализом"""
-        fig = plt.figure(figsize=(8.27, 11.69), dpi=300)
+        fig = Figure(figsize=PAGE_SIZE)
         fig.patch.set_facecolor('white')
-        
-        analysis_results = self.report_data['analysis_results']
-        
+
         # Создание сетки для графиков с правильными отступами
-        gs = GridSpec(4, 2, figure=fig, 
+        gs = GridSpec(4, 2, figure=fig,
                      height_ratios=[0.1, 1.2, 1, 0.6],
                      hspace=0.4, wspace=0.3)
-        
+
         # Заголовок
         title_ax = fig.add_subplot(gs[0, :])
-        title_ax.text(0.5, 0.5, 'СПЕКТРАЛЬНЫЙ АНАЛИЗ', 
+        title_ax.text(0.5, 0.5, 'СПЕКТРАЛЬНЫЙ АНАЛИЗ',
                      ha='center', va='center', fontsize=16, fontweight='bold',
                      transform=title_ax.transAxes)
         title_ax.axis('off')
-        
+
         # График спектра мощности
         ax1 = fig.add_subplot(gs[1, :])
         frequencies = analysis_results['frequencies']
         power_spectrum = analysis_results['power_spectrum']
-        
+
         ax1.semilogy(frequencies, power_spectrum, 'r', linewidth=2, alpha=0.8)
         ax1.set_xlabel('Частота (Гц)', fontsize=12, fontweight='bold')
         ax1.set_ylabel('Мощность (мкВ²/Гц)', fontsize=12, fontweight='bold')
         ax1.set_title('Спектр мощности сигнала ЭЭГ', fontsize=14, fontweight='bold', pad=15)
         ax1.grid(True, alpha=0.3, linestyle='--')
         ax1.set_xlim(0, 40)
-        
+
         # Выделение ритмов на спектре с улучшенными цветами
         rhythm_bands = {
             'δ (delta)': (0.5, 4, '#1f77b4'),
@@ -311,147 +531,140 @@ class EEGReportGenerator:
             'β (beta)': (13, 30, '#ff7f0e'),
             'γ (gamma)': (30, 40, '#9467bd')
         }
-        
+
         for rhythm, (low, high, color) in rhythm_bands.items():
             ax1.axvspan(low, high, alpha=0.2, color=color, label=rhythm)
-        
+
         ax1.legend(loc='upper right', fontsize=10, framealpha=0.9)
         ax1.tick_params(axis='both', which='major', labelsize=10)
-        
+
         # График относительной мощности ритмов
         ax2 = fig.add_subplot(gs[2, 0])
         rhythms = list(analysis_results['relative_power'].keys())
         powers = list(analysis_results['relative_power'].values())
         colors = ['#1f77b4', '#2ca02c', '#d62728', '#ff7f0e', '#9467bd']
-        
+
         bars = ax2.bar(rhythms, powers, color=colors[:len(rhythms)], alpha=0.8, edgecolor='black', linewidth=0.5)
         ax2.set_ylabel('Относительная мощность', fontsize=11, fontweight='bold')
         ax2.set_title('Распределение мощности по ритмам', fontsize=12, fontweight='bold')
         ax2.set_ylim(0, max(powers) * 1.2 if powers else 1)
         ax2.tick_params(axis='both', which='major', labelsize=9)
         ax2.grid(True, alpha=0.3, axis='y')
-        
+
         # Добавление значений на столбцы
         for bar, power in zip(bars, powers):
             ax2.text(bar.get_x() + bar.get_width()/2, bar.get_height() + max(powers) * 0.02,
                     f'{power:.3f}', ha='center', va='bottom', fontsize=9, fontweight='bold')
-        
+
         # Круговая диаграмма ритмов
         ax3 = fig.add_subplot(gs[2, 1])
         if powers and sum(powers) > 0:
             wedges, texts, autotexts = ax3.pie(powers, labels=rhythms, colors=colors[:len(rhythms)],
-                                              autopct='%1.1f%%', startangle=90, 
+                                              autopct='%1.1f%%', startangle=90,
                                               textprops={'fontsize': 9})
             ax3.set_title('Процентное соотношение ритмов', fontsize=12, fontweight='bold')
-            
+
             # Улучшаем читаемость процентов
             for autotext in autotexts:
                 autotext.set_color('white')
                 autotext.set_fontweight('bold')
         else:
-            ax3.text(0.5, 0.5, 'Нет данных для\nотображения', 
+            ax3.text(0.5, 0.5, 'Нет данных для\nотображения',
                     ha='center', va='center', transform=ax3.transAxes,
                     fontsize=12, style='italic')
             ax3.set_title('Процентное соотношение ритмов', fontsize=12, fontweight='bold')
-        
+
         # Статистика спектрального анализа
         stats_ax = fig.add_subplot(gs[3, :])
-        
+
         # Формируем текст статистики
-        analysis = self.report_data['analysis_results']
+        analysis = analysis_results
         spectral_stats = f"""СТАТИСТИКА СПЕКТРАЛЬНОГО АНАЛИЗА:
-        
+
 Доминирующий ритм: {analysis.get('dominant_rhythm', 'N/A')}
 Спектральная энтропия: {analysis.get('spectral_entropy', 0):.3f}
 Пиковая частота: {analysis.get('peak_frequency', 0):.2f} Гц
 
 Относительная мощность ритмов:"""
-        
+
         if 'relative_power' in analysis:
             for rhythm, power in analysis['relative_power'].items():
                 spectral_stats += f"\n  • {rhythm}: {power:.3f} ({power*100:.1f}%)"
-        
+
         stats_ax.text(0.02, 0.95, spectral_stats, transform=stats_ax.transAxes,
                      fontsize=10, verticalalignment='top', fontfamily='monospace',
-                     bbox=dict(boxstyle="round,pad=0.5", facecolor="lightyellow", 
+                     bbox=dict(boxstyle="round,pad=0.5", facecolor="lightyellow",
                               alpha=0.8, edgecolor='orange', linewidth=1))
         stats_ax.axis('off')
-        
+
         try:
-            plt.tight_layout()
+            fig.tight_layout()
         except:
             pass  # Игнорируем предупреждения tight_layout
-        pdf.savefig(fig, bbox_inches='tight', dpi=300, facecolor='white')
-        plt.close(fig)
-    
-    def _create_rhythm_analysis_page(self, pdf: PdfPages):
+        return fig
+
+    @staticmethod
+    def _create_rhythm_analysis_page(analysis: Dict[str, Any]) -> Figure:
         """Создание страницы с детальным анализом ритмов"""
-        fig = plt.figure(figsize=(8.27, 11.69), dpi=300)
+        fig = Figure(figsize=PAGE_SIZE)
         fig.patch.set_facecolor('white')
-        
-        analysis = self.report_data['analysis_results']
-        
+
         # Заголовок
         ax_title = fig.add_subplot(6, 1, 1)
-        ax_title.text(0.5, 0.5, 'ДЕТАЛЬНЫЙ АНАЛИЗ РИТМОВ', 
+        ax_title.text(0.5, 0.5, 'ДЕТАЛЬНЫЙ АНАЛИЗ РИТМОВ',
                      ha='center', va='center', fontsize=16, fontweight='bold',
                      transform=ax_title.transAxes)
         ax_title.axis('off')
-        
+
         # Информация о ритмах
         rhythm_info_ax = fig.add_subplot(6, 1, (2, 6))
         rhythm_info_ax.axis('off')
-        
+
         rhythm_text = "АНАЛИЗ МОЗГОВЫХ РИТМОВ:\n\n"
-        
+
         if 'rhythm_analysis' in analysis:
             for rhythm, data in analysis['rhythm_analysis'].items():
                 rhythm_text += f"{rhythm.upper()} ({data['freq_range'][0]}-{data['freq_range'][1]} Гц):\n"
                 rhythm_text += f"  • Абсолютная мощность: {data['power']:.6f}\n"
                 rhythm_text += f"  • Относительная мощность: {data['relative_power']:.3f} ({data['relative_power']*100:.1f}%)\n"
                 rhythm_text += f"  • Пиковая частота: {data['peak_freq']:.2f} Гц\n\n"
-        
+
         rhythm_text += f"\nДОМИНИРУЮЩИЙ РИТМ: {analysis.get('dominant_rhythm', 'N/A')}\n"
         rhythm_text += f"СПЕКТРАЛЬНАЯ ЭНТРОПИЯ: {analysis.get('spectral_entropy', 0):.3f}"
-        
-        rhythm_info_ax.text(0.1, 0.95, rhythm_text, 
+
+        rhythm_info_ax.text(0.1, 0.95, rhythm_text,
                            ha='left', va='top', fontsize=10,
                            transform=rhythm_info_ax.transAxes, fontfamily='monospace',
-                           bbox=dict(boxstyle="round,pad=0.8", facecolor="lightyellow", 
+                           bbox=dict(boxstyle="round,pad=0.8", facecolor="lightyellow",
                                     edgecolor="orange", linewidth=1, alpha=0.8))
-        
+
         try:
-            plt.tight_layout()
+            fig.tight_layout()
         except:
             pass
-        pdf.savefig(fig, bbox_inches='tight', dpi=300, facecolor='white')
-        plt.close(fig)
-    
-    def _create_recommendations_page(self, pdf: PdfPages):
+        return fig
+
+    @staticmethod
+    def _create_recommendations_page(recommendations: Dict[str, Any]) -> Figure:
         """Создание страницы с рекомендациями и выводами"""
-        fig = plt.figure(figsize=(8.27, 11.69), dpi=300)
+        fig = Figure(figsize=PAGE_SIZE)
         fig.patch.set_facecolor('white')
-        
+
         # Создаем основную ось для размещения текста
         ax = fig.add_subplot(111)
         ax.axis('off')
-        
-        recommendations = self.report_data['recommendations']
-        
+
         # Заголовок
         ax.text(0.5, 0.95, 'Заключение',
                 ha='center', va='top', fontsize=18, fontweight='bold',
                 transform=ax.transAxes, color='navy')
-        
+
         # Декоративная линия под заголовком
         line_y = 0.92
-        ax.plot([0.1, 0.9], [line_y, line_y], color='navy', linewidth=2, 
+        ax.plot([0.1, 0.9], [line_y, line_y], color='navy', linewidth=2,
                transform=ax.transAxes)
-        
+
         # Основной текст заключения
-        recommendations = self.report_data['recommendations']
-        analysis = self.report_data['analysis_results']
-        
         conclusion_text = f"""Итог:
 
 {recommendations['general'].get('summary', 'Нет данных')}
@@ -461,30 +674,29 @@ class EEGReportGenerator:
 
 ДЕТАЛЬНЫЙ АНАЛИЗ РИТМОВ:
 """
-        
+
         for rhythm, details in recommendations.get('rhythm_details', {}).items():
             conclusion_text += f"\n{rhythm.upper()}:\n"
             conclusion_text += f"  Состояние: {details.get('state', 'N/A')}\n"
             conclusion_text += f"  {details.get('recommendation', 'N/A')}\n"
-        
+
         if 'specific_recommendations' in recommendations:
             conclusion_text += "Рекомендации:\n"
             for rec in recommendations['specific_recommendations']:
                 conclusion_text += f"• {rec}\n"
-        
+
         # Размещаем текст в прокручиваемом блоке
-        ax.text(0.05, 0.88, conclusion_text, 
-                ha='left', va='top', fontsize=9, 
+        ax.text(0.05, 0.88, conclusion_text,
+                ha='left', va='top', fontsize=9,
                 transform=ax.transAxes, wrap=True,
-                bbox=dict(boxstyle="round,pad=0.8", facecolor="#f8f9fa", 
+                bbox=dict(boxstyle="round,pad=0.8", facecolor="#f8f9fa",
                          edgecolor="navy", linewidth=1.5, alpha=0.9))
-      
-  
+
+
         ax.axis('off')
-        
+
         try:
-            plt.tight_layout()
+            fig.tight_layout()
         except:
             pass
-        pdf.savefig(fig, bbox_inches='tight', dpi=300, facecolor='white')
-        plt.close(fig)
+        return fig
@@ -0,0 +1,300 @@
+"""
+Генерация отчетов (PDF, HTML, JSON) без GUI: API, очередь заданий и командная строка.
+
+Запуск:
+    python -m report_generator.report_service emotion_6/2.csv --output-dir reports
+    python -m report_generator.report_service emotion_6/*.csv --output-dir reports --jobs 2 --quality draft
+    python -m report_generator.report_service session.pkl --output-dir reports --patient "ФИО=Иванов И.И."
+    python -m report_generator.report_service emotion_6/2.csv --output-dir reports --format html
+
+На вход принимаются записи (CSV, EDF, EEGLAB) или сохраненные ранее результаты анализа
+(--save-bundle, файл .pkl). Дисплей и Qt не нужны.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait as futures_wait
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, Optional
+
+# Сохраненные результаты анализа (данные отчета) - pickle, открывать только свои файлы
+BUNDLE_EXTENSION = '.pkl'
+BUNDLE_VERSION = 1
+
+JOB_STATUSES = ('queued', 'running', 'done', 'failed', 'cancelled')
+
+
+def save_report_bundle(path: str, report_data: Dict[str, Any]) -> str:
+    """Сохранение данных отчета (сигналы, анализ, рекомендации) для повторной генерации без пересчета"""
+    with open(path, 'wb') as f:
+        pickle.dump({'version': BUNDLE_VERSION, 'report_data': report_data}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+def load_report_bundle(path: str) -> Dict[str, Any]:
+    with open(path, 'rb') as f:
+        bundle = pickle.load(f)
+
+    if not isinstance(bundle, dict) or bundle.get('version') != BUNDLE_VERSION:
+        raise ValueError(f"Неподдерживаемый файл результатов анализа: {path}")
+    return bundle['report_data']
+
+
+def analyze_recording(recording_path: str, processing_params: Optional[Dict] = None,
+                      channel_idx: Optional[int] = None) -> Dict[str, Any]:
+    """Загрузка, обработка и анализ записи - те же шаги, что в приложении"""
+    from analyzer.analyzer import EEGAnalyzer
+    from data_loader.data_loader import EEGDataLoader
+    from preprocessor.preprocessor import DEFAULT_PROCESSING_PARAMS, EEGPreprocessor
+    from report_generator.report_generator import EEGReportGenerator
+
+    data, sampling_rate, channel_names = EEGDataLoader().load_data(recording_path)
+    params = dict(DEFAULT_PROCESSING_PARAMS, **(processing_params or {}))
+    processed_data, _ = EEGPreprocessor().process(data, sampling_rate, params)
+
+    if channel_idx is None:
+        # Первый канал с сигналом (колонка времени в CSV тоже считается каналом)
+        signal_channels = EEGReportGenerator._select_channels(list(channel_names))
+        channel_idx = signal_channels[0] if signal_channels else 0
+
+    analyzer = EEGAnalyzer()
+    analysis = analyzer.analyze_rhythms(processed_data, sampling_rate, channel_idx)
+
+    return {
+        'raw_data': data,
+        'processed_data': processed_data,
+        'analysis_results': analysis,
+        'sampling_rate': sampling_rate,
+        'channel_names': list(channel_names),
+        'recommendations': analyzer.get_rhythm_recommendations(analysis),
+        'processing_params': params
+    }
+
+
+def build_report(output_path: str, input_path: str, patient_info: Optional[Dict] = None,
+                 quality: str = 'print', channels: Optional[list] = None,
+                 processing_params: Optional[Dict] = None, channel_idx: Optional[int] = None,
+                 save_bundle: Optional[str] = None, page_executor=None,
+                 report_format: str = 'pdf') -> Dict[str, Any]:
+    """Создание отчета (PDF, HTML или JSON) по записи или сохраненным результатам анализа"""
+    from report_generator.report_generator import EEGReportGenerator
+
+    start = time.perf_counter()
+
+    if input_path.lower().endswith(BUNDLE_EXTENSION):
+        report_data = load_report_bundle(input_path)
+    else:
+        report_data = analyze_recording(input_path, processing_params, channel_idx)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    if save_bundle:
+        save_report_bundle(save_bundle, report_data)
+
+    # Без явного исполнителя страницы рисуются в пуле процессов: служба работает без GUI,
+    # и fork здесь безопасен (в приложении генератор рисует последовательно)
+    owned_executor = None
+    if page_executor is None:
+        from utils.parallel import ChannelExecutor
+        page_executor = owned_executor = ChannelExecutor('process')
+
+    try:
+        generator = EEGReportGenerator(executor=page_executor)
+        generator.set_data(**{key: report_data[key] for key in (
+            'raw_data', 'processed_data', 'analysis_results', 'sampling_rate',
+            'channel_names', 'recommendations')},
+            processing_params=report_data.get('processing_params'))
+
+        # Исключение генератора доходит до задания как есть - с причиной ошибки
+        generator.export_report(output_path, patient_info, report_format=report_format,
+                                quality=quality, channels=channels, raise_errors=True)
+    finally:
+        if owned_executor is not None:
+            owned_executor.shutdown()
+
+    return {
+        'output_path': output_path,
+        'format': report_format,
+        'bundle_path': save_bundle,
+        'duration': time.perf_counter() - start
+    }
+
+
+def _run_job(options: Dict[str, Any]) -> Dict[str, Any]:
+    # Выполняется в процессе пула: страницы рисуются последовательно, параллелизм - на уровне заданий
+    from utils.parallel import ChannelExecutor
+
+    started_at = time.time()
+    result = build_report(page_executor=ChannelExecutor('serial'), **options)
+    result['started_at'] = started_at
+    return result
+
+
+@dataclass
+class ReportJob:
+    job_id: str
+    input_path: str
+    output_path: str
+    options: Dict[str, Any] = field(default_factory=dict)
+    status: str = 'queued'
+    error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class ReportJobQueue:
+    """Локальная очередь заданий на отчеты с ограничением числа одновременных заданий.
+
+    Задания выполняются в пуле процессов (или потоков); состояние каждого задания
+    доступно через status() и меняется: queued -> running -> done / failed / cancelled.
+    """
+
+    def __init__(self, max_workers: int = 2, backend: str = 'process'):
+        if backend not in ('process', 'thread'):
+            raise ValueError(f"Неизвестный backend: {backend}. Доступны: process, thread")
+        if max_workers < 1:
+            raise ValueError(f"Число одновременных заданий должно быть больше 0, получено: {max_workers}")
+
+        pool_class = ProcessPoolExecutor if backend == 'process' else ThreadPoolExecutor
+        self._pool = pool_class(max_workers=max_workers)
+        self.max_workers = max_workers
+        self._jobs = {}
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def submit(self, input_path: str, output_path: str, **options) -> str:
+        with self._lock:
+            job_id = f"job-{next(self._ids):04d}"
+            self._jobs[job_id] = ReportJob(job_id, input_path, output_path, options)
+            self._futures[job_id] = self._pool.submit(
+                _run_job, dict(options, input_path=input_path, output_path=output_path))
+        return job_id
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        with self._lock:
+            if job_id not in self._jobs:
+                raise KeyError(f"Задание не найдено: {job_id}")
+            return self._refresh(job_id).to_dict()
+
+    def list_jobs(self) -> list:
+        with self._lock:
+            return [self._refresh(job_id).to_dict() for job_id in self._jobs]
+
+    def cancel(self, job_id: str) -> bool:
+        """Отмена задания, которое еще не начало выполняться"""
+        future = self._futures.get(job_id)
+        return future.cancel() if future is not None else False
+
+    def wait(self, job_ids: Optional[list] = None, timeout: Optional[float] = None) -> list:
+        job_ids = list(self._futures) if job_ids is None else job_ids
+        futures_wait([self._futures[job_id] for job_id in job_ids], timeout=timeout)
+        return [self.status(job_id) for job_id in job_ids]
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait, cancel_futures=not wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+    def _refresh(self, job_id: str) -> ReportJob:
+        # Статус берется из future при запросе - колбэки пула могут запаздывать
+        job = self._jobs[job_id]
+        future = self._futures[job_id]
+        if job.status not in ('queued', 'running'):
+            return job
+
+        if future.cancelled():
+            job.status = 'cancelled'
+            job.finished_at = time.time()
+        elif future.done():
+            job.finished_at = time.time()
+            error = future.exception()
+            if error is not None:
+                job.status = 'failed'
+                job.error = str(error)
+            else:
+                job.status = 'done'
+                job.result = future.result()
+                job.started_at = job.result.get('started_at', job.started_at)
+        elif future.running() and job.status == 'queued':
+            job.status = 'running'
+            job.started_at = time.time()
+        return job
+
+
+def _parse_patient_info(items) -> Dict[str, str]:
+    patient_info = {}
+    for item in items or []:
+        key, sep, value = item.partition('=')
+        if not sep:
+            raise ValueError(f"Данные пациента задаются как КЛЮЧ=ЗНАЧЕНИЕ, получено: {item}")
+        patient_info[key.strip()] = value.strip()
+    return patient_info
+
+
+def main(argv=None):
+    from report_generator.report_generator import REPORT_FORMATS
+
+    parser = argparse.ArgumentParser(description="Генерация отчетов ЭЭГ без GUI")
+    parser.add_argument('inputs', nargs='+', help="Записи (CSV/EDF/SET) или сохраненные результаты анализа (.pkl)")
+    parser.add_argument('--output-dir', default='reports', help="Каталог для отчетов")
+    parser.add_argument('--patient', action='append', metavar='КЛЮЧ=ЗНАЧЕНИЕ', help="Данные пациента (можно несколько)")
+    parser.add_argument('--quality', default='print', help="Качество: draft, standard, print")
+    parser.add_argument('--format', default='pdf', choices=REPORT_FORMATS,
+                        help="Формат: pdf - полный отчет, html/json - легкий отчет для просмотра и обмена")
+    parser.add_argument('--channels', help="Каналы через запятую (по умолчанию все)")
+    parser.add_argument('--channel-idx', type=int, help="Канал для анализа ритмов")
+    parser.add_argument('--params', help="JSON с параметрами обработки (как на панели обработки)")
+    parser.add_argument('--jobs', type=int, default=2, help="Число одновременных заданий")
+    parser.add_argument('--save-bundle', action='store_true', help="Сохранить результаты анализа рядом с отчетом")
+    parser.add_argument('--json', action='store_true', help="Вывести статусы заданий в JSON")
+    args = parser.parse_args(argv)
+
+    options = {
+        'patient_info': _parse_patient_info(args.patient),
+        'quality': args.quality,
+        'report_format': args.format,
+        'channels': args.channels.split(',') if args.channels else None,
+        'channel_idx': args.channel_idx,
+        'processing_params': json.loads(args.params) if args.params else None
+    }
+
+    with ReportJobQueue(max_workers=args.jobs) as queue:
+        job_ids = []
+        for input_path in args.inputs:
+            name = os.path.splitext(os.path.basename(input_path))[0]
+            output_path = os.path.join(args.output_dir, f'{name}_report.{args.format}')
+            bundle = os.path.join(args.output_dir, f'{name}{BUNDLE_EXTENSION}') if args.save_bundle else None
+            job_ids.append(queue.submit(input_path, output_path, save_bundle=bundle, **options))
+
+        results = queue.wait(job_ids)
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        for job in results:
+            if job['status'] == 'done':
+                print(f"{job['job_id']}: {job['input_path']} -> {job['output_path']} "
+                      f"({job['result']['duration']:.1f} с)")
+            else:
+                print(f"{job['job_id']}: {job['input_path']} - {job['status']}: {job['error']}")
+
+    return 0 if all(job['status'] == 'done' for job in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,10 +2,13 @@ import os
 import sys
 import unittest
 
+import numpy as np
+
 # Добавляем путь к корневой директории проекта
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from analyzer.analyzer import EEGAnalyzer
+from analyzer.connectivity import ConnectivityEngine
 from preprocessor.preprocessor import EEGPreprocessor
 from data_loader.data_loader import EEGDataLoader
 
@@ -89,6 +92,26 @@ class TestEEGAnalyzer(unittest.TestCase):
         self.assertIsInstance(stats['mean'], float)
         self.assertGreaterEqual(stats['std'], 0)
 
+    def test_statistics_match_full_pass(self):
+        """Тест: статистика по частям и объединение совпадают с расчетом по всей записи"""
+        from scipy.stats import kurtosis, skew
+        from analyzer.moments import MomentAccumulator
+
+        flat_data = self.processed_data.flatten()
+        stats = self.analyzer.calculate_statistics(self.processed_data)
+        self.assertAlmostEqual(stats['kurtosis'], kurtosis(flat_data))
+        self.assertAlmostEqual(stats['skewness'], skew(flat_data))
+        self.assertAlmostEqual(stats['rms'], np.sqrt(np.mean(flat_data ** 2)))
+        np.testing.assert_allclose(stats['per_channel']['std'], np.std(self.processed_data, axis=1))
+
+        # Две половины записи, посчитанные независимо и объединенные
+        half = self.processed_data.shape[1] // 2
+        first = MomentAccumulator.from_data(self.processed_data[:, :half], chunk_samples=100)
+        second = MomentAccumulator.from_data(self.processed_data[:, half:])
+        merged = first.merge(second).global_statistics()
+        for name in ('mean', 'variance', 'kurtosis', 'skewness', 'dynamic_range'):
+            self.assertAlmostEqual(merged[name], stats[name])
+
     def test_performance_monitoring(self):
         """Тест мониторинга производительности"""
         import time
@@ -116,6 +139,73 @@ class TestEEGAnalyzer(unittest.TestCase):
         # Проверка диапазона когерентности
         self.assertTrue(0 <= result['mean_coherence'] <= 1)
 
+    def test_filter_design_cache(self):
+        """Тест повторного использования рассчитанных фильтров"""
+        from utils.filter_design import FilterDesignCache
+
+        cache = FilterDesignCache()
+        sos = cache.get_sos('bandpass', (8, 13), self.sampling_rate, 4)
+        sos_again = cache.get_sos('bandpass', (8.0, 13.0), self.sampling_rate, 4)
+
+        self.assertIs(sos, sos_again)
+        self.assertEqual(cache.get_statistics()['hits'], 1)
+        self.assertEqual(cache.get_statistics()['misses'], 1)
+
+        # Некорректные параметры корректируются валидатором один раз
+        design = cache.get_design('bandpass', (30, 200), self.sampling_rate, 4)
+        self.assertLess(design.params[1], self.sampling_rate / 2)
+        self.assertTrue(design.warnings)
+
+    def test_connectivity_matrix(self):
+        """Тест матрицы связности по всем парам каналов"""
+        result = self.analyzer.calculate_connectivity(self.processed_data, self.sampling_rate, nperseg=256)
+        n_channels = self.processed_data.shape[0]
+        n_bands = len(self.analyzer.rhythm_bands)
+
+        for measure in ('coherence', 'imaginary_coherence', 'plv'):
+            self.assertEqual(result[measure].shape, (n_channels, n_channels, n_bands))
+
+        # Совпадает с попарным расчетом scipy для той же длины сегмента
+        from scipy import signal
+        f, Cxy = signal.coherence(self.processed_data[0], self.processed_data[2], fs=self.sampling_rate, nperseg=256)
+        alpha = (f >= 8) & (f <= 13)
+        alpha_idx = result['bands'].index('alpha')
+        self.assertAlmostEqual(result['coherence'][0, 2, alpha_idx], Cxy[alpha].mean())
+
+        # Симметрия когерентности и антисимметрия мнимой части
+        np.testing.assert_allclose(result['coherence'], result['coherence'].transpose(1, 0, 2))
+        np.testing.assert_allclose(result['imaginary_coherence'],
+                                   -result['imaginary_coherence'].transpose(1, 0, 2), atol=1e-12)
+
+    def test_connectivity_rejects_invalid_overlap(self):
+        """Тест: перекрытие не меньше длины сегмента (нулевой или обратный шаг) отклоняется"""
+        for noverlap in (256, 300, -1):
+            with self.assertRaises(ValueError):
+                ConnectivityEngine(self.analyzer.rhythm_bands, nperseg=256, noverlap=noverlap)
+
+        # Перекрытие, заданное для длинного сегмента, ужимается вместе с ним на короткой записи
+        engine = ConnectivityEngine(self.analyzer.rhythm_bands, nperseg=4096, noverlap=3000)
+        self.assertGreater(engine.compute(self.processed_data, self.sampling_rate)['n_segments'], 0)
+
+    def test_window_features(self):
+        """Тест таблицы признаков по скользящим окнам"""
+        features = self.analyzer.extract_window_features(self.processed_data, self.sampling_rate,
+                                                         window_seconds=2.0, step_seconds=1.0)
+
+        # 5 с записи, окно 2 с, шаг 1 с -> 4 окна на каждый из 4 каналов
+        self.assertEqual(len(features), 4 * 4)
+        for column in ('alpha_power', 'theta_beta_ratio', 'spectral_entropy', 'hjorth_mobility', 'kurtosis'):
+            self.assertIn(column, features.columns)
+
+        # Значения окна совпадают с расчетом по вырезанному фрагменту
+        row = features[(features['window'] == 2) & (features['channel'] == 'Канал 3')].iloc[0]
+        segment = self.processed_data[2, 2 * self.sampling_rate:4 * self.sampling_rate]
+        spectral = self.analyzer.calculate_spectral_power(segment, self.sampling_rate)
+        stats = self.analyzer.calculate_statistics(segment)
+        self.assertAlmostEqual(row['alpha_power'], spectral['rhythm_power']['alpha'])
+        self.assertAlmostEqual(row['kurtosis'], stats['kurtosis'])
+        self.assertAlmostEqual(row['rms'], stats['rms'])
+
 
 if __name__ == '__main__':
     # Запуск тестов
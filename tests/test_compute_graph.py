@@ -0,0 +1,151 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzer.analyzer import EEGAnalyzer
+from app.pipeline import build_pipeline_graph, processing_inputs
+from preprocessor.preprocessor import DEFAULT_PROCESSING_PARAMS, EEGPreprocessor
+from utils.compute_graph import ComputeGraph
+
+
+class TestComputeGraph(unittest.TestCase):
+
+    def setUp(self):
+        """Настройка тестовых данных"""
+        rng = np.random.default_rng(1)
+        self.fs = 250
+        t = np.arange(0, 8, 1 / self.fs)
+        self.data = np.sin(2 * np.pi * 10 * t) + 0.5 * rng.standard_normal((4, len(t)))
+        self.preprocessor = EEGPreprocessor()
+        self.graph = build_pipeline_graph(self.preprocessor, EEGAnalyzer())
+
+    def process(self, params):
+        self.graph.set_inputs(raw=self.data, sampling_rate=self.fs, **processing_inputs(params))
+        return self.graph.get('processed')
+
+    def test_memoization_by_inputs(self):
+        """Тест: узел пересчитывается только при изменении входов, одинаковое значение входа не сбрасывает кэш"""
+        calls = []
+        graph = ComputeGraph().add_input('a', 1).add_input('b', 2)
+        graph.add_node('sum', lambda a, b: calls.append('sum') or a + b, ('a', 'b'))
+        graph.add_node('double', lambda a: calls.append('double') or a * 2, ('a',))
+        graph.add_node('total', lambda s, d: calls.append('total') or s + d, ('sum', 'double'))
+
+        self.assertEqual(graph.get('total'), 5)
+        self.assertFalse(graph.set_input('a', 1))
+        self.assertEqual(graph.get('total'), 5)
+        self.assertEqual(calls, ['sum', 'double', 'total'])
+
+        graph.set_input('b', 10)
+        self.assertEqual(graph.stale_nodes('total'), ['sum', 'total'])
+        self.assertEqual(graph.get('total'), 13)
+        self.assertEqual(calls[3:], ['sum', 'total'])
+
+        with self.assertRaises(ValueError):
+            graph.add_node('bad', lambda x: x, ('missing',))
+
+    def test_pipeline_matches_preprocessor_and_recomputes_only_changed_stages(self):
+        """Тест: этапы графа дают тот же результат, что и process(), смена порога пересчитывает только артефакты"""
+        params = dict(DEFAULT_PROCESSING_PARAMS)
+        processed = self.process(params)
+        expected, _ = self.preprocessor.process(self.data, self.fs, params)
+        np.testing.assert_allclose(processed, expected)
+
+        filtered = self.graph.peek('filtered')
+        params['artifact_threshold'] = 2.5
+        self.graph.set_inputs(**processing_inputs(params))
+        self.assertEqual(self.graph.stale_nodes('processed'), ['artifacts', 'processed'])
+        processed = self.process(params)
+        self.assertIs(self.graph.peek('filtered'), filtered)
+        np.testing.assert_allclose(processed, self.preprocessor.process(self.data, self.fs, params)[0])
+
+        # Параметры выключенного вейвлет-этапа не сбрасывают кэш
+        params['wavelet_method'] = 'sure'
+        self.graph.set_inputs(**processing_inputs(params))
+        self.assertEqual(self.graph.stale_nodes('processed'), [])
+
+        # Полосу фильтра меняем - пересчитывается все ниже фильтрации, но не ICA
+        params['low_freq'] = 2.0
+        self.graph.set_inputs(**processing_inputs(params))
+        self.assertEqual(self.graph.stale_nodes('processed'),
+                         ['filtered', 'detrended', 'dc_removed', 'denoised', 'artifacts', 'processed'])
+
+    def test_not_retained_nodes_are_reported_and_regenerated(self):
+        """Тест: нехранимый узел восстанавливается для пересчета зависящего от него узла и виден в stale_nodes"""
+        calls = []
+        graph = ComputeGraph().add_input('a', 1).add_input('b', 2)
+        graph.add_node('cheap', lambda a: calls.append('cheap') or a + 1, ('a',), retain=False)
+        graph.add_node('total', lambda c, b: calls.append('total') or c * b, ('cheap', 'b'))
+
+        self.assertEqual(graph.get('total'), 4)
+        self.assertIsNone(graph.peek('cheap'))
+        graph.set_input('b', 3)
+        self.assertEqual(graph.stale_nodes('total'), ['cheap', 'total'])
+        self.assertEqual(graph.get('total'), 6)
+        self.assertEqual(calls, ['cheap', 'total', 'cheap', 'total'])
+        self.assertEqual(graph.stale_nodes('total'), [])
+
+    def test_retained_stages_and_recompute_counts(self):
+        """Тест: хранятся только дорогие этапы, смена порога не повторяет денойзинг и тренд"""
+        calls = {}
+        for method in ('apply_filters', 'detrend_signal', 'wavelet_denoising', 'remove_artifacts'):
+            original = getattr(self.preprocessor, method)
+            setattr(self.preprocessor, method,
+                    lambda *args, _name=method, _original=original, **kwargs:
+                    calls.__setitem__(_name, calls.get(_name, 0) + 1) or _original(*args, **kwargs))
+
+        params = dict(DEFAULT_PROCESSING_PARAMS, wavelet_denoise=True)
+        processed = self.process(params)
+        kept = {id(value) for value in (self.graph.peek(name) for name in self.graph._nodes)
+                if isinstance(value, np.ndarray) and value.dtype.kind == 'f'}
+        self.assertEqual(kept, {id(self.data), id(self.graph.peek('filtered')),
+                                id(self.graph.peek('denoised')), id(processed)})
+        self.assertIsNone(self.graph.peek('detrended'))
+        self.assertIsNone(self.graph.peek('dc_removed'))
+
+        # Маска берется из того же хранимого результата, этапы не повторяются
+        mask = self.graph.get('artifact_mask')
+        self.assertEqual(mask.shape, self.data.shape)
+        self.assertEqual(calls, {'apply_filters': 1, 'detrend_signal': 1, 'wavelet_denoising': 1,
+                                 'remove_artifacts': 1})
+
+        params['artifact_threshold'] = 2.0
+        self.graph.set_inputs(**processing_inputs(params))
+        self.assertEqual(self.graph.stale_nodes('processed'), ['artifacts', 'processed'])
+        processed = self.process(params)
+        self.assertEqual(calls, {'apply_filters': 1, 'detrend_signal': 1, 'wavelet_denoising': 1,
+                                 'remove_artifacts': 2})
+        np.testing.assert_allclose(processed, self.preprocessor.process(self.data, self.fs, params)[0])
+
+        # Смена метода денойзинга восстанавливает удаление тренда от хранимой фильтрации
+        params['wavelet_method'] = 'sure'
+        self.graph.set_inputs(**processing_inputs(params))
+        stale = self.graph.stale_nodes('processed')
+        self.assertEqual(stale, ['detrended', 'dc_removed', 'denoised', 'artifacts', 'processed'])
+        computed = [node for node in self.graph._nodes.values() if node.computed]
+        before = {node.name: node.computed for node in computed}
+        self.process(params)
+        self.assertEqual([node.name for node in computed if node.computed != before[node.name]], stale)
+
+    def test_rhythm_analysis_node(self):
+        """Тест: узел анализа ритмов совпадает с прямым вызовом анализатора"""
+        processed = self.process(DEFAULT_PROCESSING_PARAMS)
+        self.graph.set_inputs(processed_data=processed, analysis_channel=2)
+        result = self.graph.get('rhythms')
+        expected = EEGAnalyzer().analyze_rhythms(processed, self.fs, 2)
+
+        self.assertEqual(result['channel_idx'], 2)
+        self.assertEqual(result['analysis']['dominant_rhythm'], expected['dominant_rhythm'])
+        self.assertAlmostEqual(result['analysis']['rhythm_analysis']['alpha']['relative_power'],
+                               expected['rhythm_analysis']['alpha']['relative_power'])
+        self.assertIs(self.graph.get('rhythms'), result)
+
+
+if __name__ == '__main__':
+    # Запуск тестов
+    unittest.main(verbosity=2)
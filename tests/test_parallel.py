@@ -0,0 +1,60 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzer.analyzer import EEGAnalyzer
+from data_loader.data_loader import EEGDataLoader
+from preprocessor.preprocessor import EEGPreprocessor
+from utils.parallel import ChannelExecutor
+
+
+class TestChannelExecutor(unittest.TestCase):
+
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.data, self.sampling_rate, _ = EEGDataLoader().generate_test_data(
+            duration=5, sampling_rate=250, n_channels=7
+        )
+
+    def test_backends_give_identical_results(self):
+        """Тест: все исполнители дают одинаковый результат в исходном порядке каналов"""
+        expected = EEGPreprocessor().apply_filters(self.data, self.sampling_rate)
+
+        for backend in ('thread', 'process'):
+            with ChannelExecutor(backend, max_workers=3) as executor:
+                preprocessor = EEGPreprocessor(executor=executor)
+                np.testing.assert_allclose(
+                    preprocessor.apply_filters(self.data, self.sampling_rate), expected
+                )
+                np.testing.assert_allclose(
+                    preprocessor.detrend_signal(self.data),
+                    EEGPreprocessor().detrend_signal(self.data)
+                )
+
+    def test_map_keeps_order(self):
+        """Тест сохранения порядка результатов"""
+        with ChannelExecutor('thread', max_workers=4) as executor:
+            self.assertEqual(executor.map(abs, range(-10, 0)), list(range(10, 0, -1)))
+
+        with self.assertRaises(ValueError):
+            ChannelExecutor('gpu')
+
+    def test_rhythm_analysis_with_executor(self):
+        """Тест анализа ритмов с параллельным исполнителем"""
+        expected = EEGAnalyzer().analyze_rhythms(self.data, self.sampling_rate)
+
+        with ChannelExecutor('thread', max_workers=4) as executor:
+            result = EEGAnalyzer(executor=executor).analyze_rhythms(self.data, self.sampling_rate)
+
+        self.assertEqual(list(result['rhythm_analysis']), list(expected['rhythm_analysis']))
+        for rhythm, values in expected['rhythm_analysis'].items():
+            self.assertAlmostEqual(result['rhythm_analysis'][rhythm]['mean_amplitude'], values['mean_amplitude'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,125 @@
+import os
+import sys
+import tracemalloc
+import unittest
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.performance import HISTORY_SIZE, PerformanceMonitor
+
+
+class TestPerformanceMonitor(unittest.TestCase):
+
+    def setUp(self):
+        """Настройка монитора"""
+        self.monitor = PerformanceMonitor()
+
+    def test_nested_spans(self):
+        """Тест вложенных измерений: дерево вызовов и общее время без двойного учета"""
+        with self.monitor.measure("Обработка"):
+            with self.monitor.measure("Фильтрация"):
+                pass
+            with self.monitor.measure("Детрендирование"):
+                pass
+
+        tree = self.monitor.get_span_tree()
+        self.assertEqual(len(tree), 1)
+        self.assertEqual(tree[0]['name'], "Обработка")
+        self.assertEqual([child['name'] for child in tree[0]['children']], ["Фильтрация", "Детрендирование"])
+
+        stats = self.monitor.get_operation_stats()
+        self.assertAlmostEqual(self.monitor.get_total_time(), stats["Обработка"]['total_time'])
+        self.assertIn("└ Фильтрация", self.monitor.get_detailed_summary())
+
+    def test_bounded_history_and_percentiles(self):
+        """Тест ограниченной истории и перцентилей"""
+        for _ in range(HISTORY_SIZE + 10):
+            with self.monitor.measure("Операция"):
+                pass
+
+        stats = self.monitor.operations["Операция"]
+        self.assertEqual(stats.count, HISTORY_SIZE + 10)
+        self.assertEqual(stats.recent_durations().size, HISTORY_SIZE)
+
+        percentiles = stats.percentiles()
+        self.assertLessEqual(percentiles['p50'], percentiles['p95'])
+        self.assertLessEqual(percentiles['p95'], percentiles['p99'])
+
+    def test_trace_export(self):
+        """Тест экспорта трассировки с идентификаторами потоков"""
+        import json
+        import tempfile
+        import threading
+
+        def worker():
+            self.monitor.set_thread_name("ProcessingThread")
+            with self.monitor.measure("Фильтрация"):
+                pass
+
+        with self.monitor.measure("Загрузка данных"):
+            thread = threading.Thread(target=worker)
+            thread.start()
+            thread.join()
+
+        trace = self.monitor.export_trace_events()
+        spans = [event for event in trace['traceEvents'] if event['ph'] == 'X']
+        thread_names = {event['args']['name'] for event in trace['traceEvents'] if event['name'] == 'thread_name'}
+
+        self.assertEqual(len(spans), 2)
+        self.assertNotEqual(spans[0]['tid'], spans[1]['tid'])
+        self.assertIn("ProcessingThread", thread_names)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, "trace.json")
+            self.monitor.save_trace(file_path, 'json')
+            with open(file_path, encoding='utf-8') as f:
+                exported = json.load(f)
+
+        self.assertEqual({span['thread'] for span in exported['spans']},
+                         {"ProcessingThread", threading.current_thread().name})
+        self.assertIn("Фильтрация", exported['operations'])
+
+    def test_memory_sampling_is_opt_in(self):
+        """Тест: память измеряется только при включенном сэмплировании"""
+        with self.monitor.measure_with_memory("Без памяти"):
+            pass
+        self.assertNotIn('memory_delta_mb', self.monitor.get_operation_stats("Без памяти"))
+
+        self.monitor.enable_memory_sampling()
+        try:
+            with self.monitor.measure_with_memory("С памятью"):
+                buffer = bytearray(4 * 1024 * 1024)
+            self.assertGreater(self.monitor.get_operation_stats("С памятью")['memory_delta_mb'], 3)
+            del buffer
+        finally:
+            self.monitor.disable_memory_sampling()
+
+    def test_disabling_sampling_keeps_other_monitors_tracing(self):
+        """Тест: отключение сэмплирования одного монитора не останавливает tracemalloc у других"""
+        other = PerformanceMonitor()
+        self.monitor.enable_memory_sampling()
+        other.enable_memory_sampling()
+        try:
+            self.monitor.disable_memory_sampling()
+            self.assertTrue(tracemalloc.is_tracing())
+            with other.measure_with_memory("Память другого монитора"):
+                buffer = bytearray(4 * 1024 * 1024)
+            self.assertGreater(other.get_operation_stats("Память другого монитора")['memory_delta_mb'], 3)
+            del buffer
+        finally:
+            other.disable_memory_sampling()
+        self.assertFalse(tracemalloc.is_tracing())
+
+        # Трассировку, запущенную не мониторами, они не останавливают
+        tracemalloc.start()
+        try:
+            other.enable_memory_sampling()
+            other.disable_memory_sampling()
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
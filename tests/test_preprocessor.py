@@ -0,0 +1,114 @@
+import io
+import os
+import sys
+import unittest
+from contextlib import redirect_stdout
+
+import numpy as np
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from preprocessor.preprocessor import EEGPreprocessor
+from utils.filter_design import filter_design_cache
+from data_loader.data_loader import EEGDataLoader
+
+
+class TestEEGPreprocessor(unittest.TestCase):
+
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.preprocessor = EEGPreprocessor()
+        self.data_loader = EEGDataLoader()
+
+        self.test_data, self.sampling_rate, _ = self.data_loader.generate_test_data(
+            duration=5, sampling_rate=250, n_channels=4
+        )
+
+    def test_filter_boundary_warnings_once_per_key(self):
+        """Тест: коррекция полосы у границ диапазона предупреждает один раз, а не при каждом вызове"""
+        data = np.random.default_rng(1).normal(size=(2, 4000))
+        filter_design_cache.clear()
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            first = self.preprocessor.bandpass_filter(data, 2000, 0.5, 999.5)
+            second = self.preprocessor.bandpass_filter(data, 2000, 0.5, 999.5)
+            self.preprocessor.notch_filter(data, 2000, 999.9)
+            self.preprocessor.notch_filter(data, 2000, 999.9)
+
+        np.testing.assert_array_equal(first, second)
+        self.assertEqual(output.getvalue().count("АВТОКОРРЕКЦИЯ"), 2)
+        self.assertNotIn("Предупреждение", output.getvalue())
+        design = filter_design_cache.get_design('bandpass', (0.5, 999.5), 2000, 4)
+        self.assertLess(design.params[1], 999.5)
+
+        with self.assertRaises(ValueError):
+            self.preprocessor.bandpass_filter(data, 2000, 0.0, 40.0)
+
+    def test_artifact_mask_and_interpolation(self):
+        """Тест векторизованного удаления артефактов"""
+        data = np.random.default_rng(0).normal(size=(3, 2000))
+        data[0, 500:505] += 100
+        data[1, :3] += 100  # Артефакт на краю записи
+
+        cleaned, mask = self.preprocessor.remove_artifacts(data, threshold=4.0, return_mask=True)
+
+        self.assertEqual(mask.shape, data.shape)
+        self.assertTrue(np.all(mask[0, 500:505]))
+        self.assertTrue(np.all(mask[1, :3]))
+
+        # Интерполяция совпадает с линейной интерполяцией по корректным отсчетам
+        indices = np.arange(data.shape[1])
+        for ch in range(data.shape[0]):
+            expected = np.interp(indices, indices[~mask[ch]], data[ch][~mask[ch]])
+            np.testing.assert_allclose(cleaned[ch], expected)
+
+        # Незатронутые отсчеты не изменяются
+        np.testing.assert_array_equal(cleaned[~mask], data[~mask])
+
+    def test_artifact_removal_single_channel(self):
+        """Тест удаления артефактов для одномерного сигнала"""
+        cleaned = self.preprocessor.remove_artifacts(self.test_data[0])
+        self.assertEqual(cleaned.shape, self.test_data[0].shape)
+
+    def test_ica_removes_blink_component_and_caches_model(self):
+        """Тест ICA: удаление компоненты морганий и повторное использование разложения"""
+        data, sampling_rate, _ = self.data_loader.generate_test_data(
+            duration=20, sampling_rate=250, n_channels=6
+        )
+        time_axis = np.arange(data.shape[1]) / sampling_rate
+        blinks = sum(300 * np.exp(-((time_axis - t0) / 0.1) ** 2) for t0 in np.arange(1, 20, 2.5))
+        data = data + np.outer(np.linspace(1.0, 0.2, data.shape[0]), blinks)
+
+        cleaned, excluded = self.preprocessor.ica_artifact_removal(
+            data, sampling_rate, return_excluded=True
+        )
+
+        self.assertEqual(cleaned.shape, data.shape)
+        self.assertGreater(len(excluded), 0)
+        self.assertLess(np.max(np.abs(cleaned[0])), np.max(np.abs(data[0])))
+
+        # Повторный вызов с другими порогами использует кеш
+        self.assertEqual(len(self.preprocessor._ica_cache), 1)
+        self.preprocessor.ica_artifact_removal(data, sampling_rate, kurtosis_threshold=10.0)
+        self.assertEqual(len(self.preprocessor._ica_cache), 1)
+
+    def test_wavelet_denoising_methods(self):
+        """Тест пакетного вейвлет-денойзинга с разными порогами"""
+        rng = np.random.default_rng(1)
+        time_axis = np.arange(5001) / self.sampling_rate
+        clean = 20 * np.sin(2 * np.pi * 10 * time_axis)
+        noisy = clean + rng.normal(scale=5, size=(4, time_axis.size))
+
+        for method in ('universal', 'sure'):
+            denoised = self.preprocessor.wavelet_denoising(noisy, level=3, threshold_method=method)
+            self.assertEqual(denoised.shape, noisy.shape)
+            self.assertLess(np.std(denoised - clean), np.std(noisy - clean))
+
+        with self.assertRaises(ValueError):
+            self.preprocessor.wavelet_denoising(noisy, threshold_method='unknown')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
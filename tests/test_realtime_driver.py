@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+import unittest
+
+import numpy as np
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from realtime_work.realtime_driver import SyntheticBlockEEGDriver
+
+
+class TestSyntheticBlockEEGDriver(unittest.TestCase):
+
+    def test_unthrottled_blocks(self):
+        """Тест генерации блоков без задержек для нескольких каналов"""
+        driver = SyntheticBlockEEGDriver(sample_rate_hz=2000, n_channels=16, block_size=100, realtime=False, seed=0)
+        driver.open()
+
+        timestamps = []
+        for i, (block_timestamps, block) in enumerate(driver.iter_blocks()):
+            self.assertEqual(block.shape, (16, 100))
+            timestamps.append(block_timestamps)
+            if i >= 9:
+                break
+        driver.close()
+
+        # Временные метки непрерывны между блоками
+        np.testing.assert_allclose(np.diff(np.concatenate(timestamps)), 1 / 2000)
+
+    def test_realtime_pacing_and_samples(self):
+        """Тест выдачи отсчетов в темпе частоты дискретизации"""
+        driver = SyntheticBlockEEGDriver(sample_rate_hz=1000, n_channels=4, realtime=True, seed=0)
+        driver.open()
+
+        start = time.perf_counter()
+        samples = []
+        for sample in driver.iter_samples():
+            samples.append(sample)
+            if len(samples) >= 200:
+                break
+        elapsed = time.perf_counter() - start
+        driver.close()
+
+        self.assertEqual(len(samples[0].amplitudes), 4)
+        self.assertGreater(samples[0].received_ns, 0)
+        self.assertGreaterEqual(elapsed, 0.15)
+
+        with self.assertRaises(ValueError):
+            SyntheticBlockEEGDriver(sample_rate_hz=0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,74 @@
+import os
+import sys
+import time
+import unittest
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from realtime_work.realtime_driver import EEGSample, EEGSampleBatch
+from realtime_work.realtime_latency import RealtimeLatencyMonitor
+
+
+class TestRealtimeLatencyMonitor(unittest.TestCase):
+
+    def setUp(self):
+        """Настройка монитора задержек"""
+        self.monitor = RealtimeLatencyMonitor(window_seconds=5.0)
+
+    def _make_batch(self, n_samples=10):
+        now = time.perf_counter_ns()
+        samples = [EEGSample(timestamp=i / 250, amplitudes=[0.0], received_ns=now) for i in range(n_samples)]
+        return EEGSampleBatch(samples=samples)
+
+    def test_hops_are_measured(self):
+        """Тест измерения всех участков тракта отсчет -> экран"""
+        for _ in range(5):
+            batch = self._make_batch()
+            self.monitor.on_batch_enqueued(batch)
+            time.sleep(0.002)
+            self.monitor.on_batch_dequeued(batch)
+            self.monitor.on_batch_buffered(batch)
+            self.monitor.on_render_requested()
+            self.monitor.on_frame_drawn()
+
+        stats = self.monitor.get_statistics()
+
+        for hop in RealtimeLatencyMonitor.HOPS:
+            self.assertEqual(stats['hops'][hop]['count'], 5)
+
+        self.assertGreaterEqual(stats['hops']['queue_wait']['p50'], 2.0)
+        self.assertGreaterEqual(stats['hops']['sample_to_pixel']['p50'], stats['hops']['queue_wait']['p50'])
+        self.assertGreater(stats['sample_rate'], 0)
+        self.assertGreater(stats['frame_rate'], 0)
+        self.assertIn("FPS", self.monitor.format_overlay())
+
+    def test_pending_samples_bounded_while_not_drawn(self):
+        """Тест: пока кадры не рисуются, ожидающие отсчеты не копятся и не попадают в статистику после показа"""
+        monitor = RealtimeLatencyMonitor(window_seconds=0.05)
+        for _ in range(2000):
+            monitor.on_batch_buffered(self._make_batch(1))
+        self.assertLessEqual(len(monitor._pending_pixel_ns), 256)
+
+        time.sleep(0.06)
+        fresh = self._make_batch(1)
+        monitor.on_batch_buffered(fresh)
+        monitor.on_frame_drawn()
+
+        stats = monitor.get_statistics()
+        self.assertEqual(stats['hops']['sample_to_pixel']['count'], 1)
+        self.assertLess(stats['hops']['sample_to_pixel']['p99'], 50.0)
+
+    def test_reset(self):
+        """Тест сброса статистики"""
+        batch = self._make_batch()
+        self.monitor.on_batch_enqueued(batch)
+        self.monitor.reset()
+
+        stats = self.monitor.get_statistics()
+        self.assertEqual(stats['hops']['batching']['count'], 0)
+        self.assertEqual(stats['sample_rate'], 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,129 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzer.analyzer import EEGAnalyzer
+from data_loader.data_loader import EEGDataLoader
+from report_generator.html_report import TRACE_BUCKETS, decode_array, extract_payload
+from report_generator.report_generator import EEGReportGenerator, PAGE_BUILDERS
+from utils.decimation import minmax_envelope
+from utils.parallel import ChannelExecutor
+
+
+class TestEEGReportGenerator(unittest.TestCase):
+
+    def setUp(self):
+        """Настройка тестовых данных"""
+        analyzer = EEGAnalyzer()
+        data, sampling_rate, _ = EEGDataLoader().generate_test_data(
+            duration=5, sampling_rate=250, n_channels=3
+        )
+        analysis = analyzer.analyze_rhythms(data, sampling_rate)
+
+        self.generator = EEGReportGenerator(executor=ChannelExecutor('serial'))
+        self.generator.set_data(
+            raw_data=data, processed_data=data, analysis_results=analysis,
+            sampling_rate=sampling_rate, channel_names=['A0', 'A1', 'A2'],
+            recommendations=analyzer.get_rhythm_recommendations(analysis)
+        )
+
+    def test_report_is_created(self):
+        """Тест создания PDF-отчета"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_path = os.path.join(tmp_dir, 'report.pdf')
+            self.assertTrue(self.generator.generate_report(output_path, {'ФИО': 'Иванов И.И.'}))
+
+            with open(output_path, 'rb') as f:
+                self.assertTrue(f.read(5).startswith(b'%PDF'))
+
+    def test_unchanged_pages_are_cached(self):
+        """Тест: при смене данных пациента перерисовывается только титульная страница"""
+        pages = self.generator.render_pages({'ФИО': 'Иванов И.И.'}, quality='draft')
+        self.assertEqual([name for name, _ in pages], list(PAGE_BUILDERS))
+        self.assertTrue(all(image.startswith(b'\x89PNG') for _, image in pages))
+
+        self.generator.render_pages({'ФИО': 'Петров П.П.'}, quality='draft')
+        stats = self.generator.get_cache_statistics()
+        self.assertEqual(stats['misses'], len(PAGE_BUILDERS) + 1)
+        self.assertEqual(stats['hits'], len(PAGE_BUILDERS) - 1)
+
+        with self.assertRaises(ValueError):
+            self.generator.render_pages(quality='poster')
+
+    def test_signal_pages_overflow(self):
+        """Тест: выбор каналов и перенос большого монтажа на несколько страниц"""
+        contents = self.generator._page_contents(None, channels=['A2', 0])
+        raw_pages = [content for name, content in contents if name == 'raw_signals']
+        self.assertEqual(len(raw_pages), 1)
+        self.assertEqual(raw_pages[0]['channel_names'], ['A2', 'A0'])
+
+        data = np.random.randn(20, 250 * 600)
+        self.generator.report_data.update(raw_data=data, processed_data=data,
+                                          channel_names=[f'Ch{i}' for i in range(20)])
+        contents = self.generator._page_contents(None, dpi=100)
+        raw_pages = [content for name, content in contents if name == 'raw_signals']
+        self.assertEqual(len(raw_pages), 3)
+        self.assertEqual(sum(len(page['channel_names']) for page in raw_pages), 20)
+
+        # Число точек графика зависит от ширины печати, а не от длины записи
+        self.assertEqual(raw_pages[0]['data'].shape[1], 2 * 700)
+
+        with self.assertRaises(ValueError):
+            self.generator._page_contents(None, channels=['Fz'])
+
+    def test_html_report(self):
+        """Тест легкого HTML-отчета: встроенные данные и миниатюры, повторное использование миниатюр"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_path = os.path.join(tmp_dir, 'report.html')
+            patient_info = {'ФИО': '<Иванов И.И.>'}
+            self.assertTrue(self.generator.export_report(output_path, patient_info, report_format='html'))
+
+            with open(output_path, encoding='utf-8') as f:
+                html = f.read()
+
+        self.assertIn('data:image/png;base64,', html)
+        self.assertIn('&lt;Иванов И.И.&gt;', html)
+
+        payload = extract_payload(html)
+        self.assertEqual(payload['patient_info'], patient_info)
+        self.assertEqual(payload['recording']['channel_names'], ['A0', 'A1', 'A2'])
+
+        # Сигналы - огибающая фиксированной ширины, экстремумы совпадают с исходными
+        raw = decode_array(payload['traces']['raw'])
+        self.assertEqual(raw.shape, (3, 2 * TRACE_BUCKETS))
+        data = self.generator.report_data['raw_data']
+        np.testing.assert_allclose(raw.max(axis=1), data.max(axis=1), rtol=1e-6)
+
+        # Смена данных пациента не перерисовывает миниатюры
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.assertTrue(self.generator.generate_html_report(os.path.join(tmp_dir, 'r.html'), {'ФИО': 'Петров'}))
+        self.assertEqual(self.generator.get_cache_statistics()['hits'], 1)
+
+        with self.assertRaises(ValueError):
+            self.generator.export_report('report.docx', report_format='docx')
+
+    def test_minmax_envelope(self):
+        """Тест огибающей min/max: экстремумы сохраняются"""
+        data = np.random.randn(3, 100000)
+        data[1, 12345] = 50
+
+        x, y = minmax_envelope(data, 500)
+        self.assertEqual(y.shape, (3, 1000))
+        self.assertEqual(len(x), 1000)
+        np.testing.assert_array_equal(y.max(axis=1), data.max(axis=1))
+        np.testing.assert_array_equal(y.min(axis=1), data.min(axis=1))
+
+        # Короткий сигнал не прореживается
+        x, y = minmax_envelope(data[:, :600], 500)
+        np.testing.assert_array_equal(y, data[:, :600])
+
+
+if __name__ == '__main__':
+    # Запуск тестов
+    unittest.main(verbosity=2)
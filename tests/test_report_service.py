@@ -0,0 +1,64 @@
+import os
+import sys
+import tempfile
+import unittest
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzer.analyzer import EEGAnalyzer
+from data_loader.data_loader import EEGDataLoader
+from report_generator.report_service import ReportJobQueue, save_report_bundle
+
+
+class TestReportService(unittest.TestCase):
+
+    def setUp(self):
+        """Сохраненные результаты анализа синтетической записи"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        analyzer = EEGAnalyzer()
+        data, sampling_rate, channel_names = EEGDataLoader().generate_test_data(
+            duration=5, sampling_rate=250, n_channels=2
+        )
+        analysis = analyzer.analyze_rhythms(data, sampling_rate)
+
+        self.bundle_path = save_report_bundle(os.path.join(self.tmp_dir.name, 'session.pkl'), {
+            'raw_data': data,
+            'processed_data': data,
+            'analysis_results': analysis,
+            'sampling_rate': sampling_rate,
+            'channel_names': channel_names,
+            'recommendations': analyzer.get_rhythm_recommendations(analysis)
+        })
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_job_queue(self):
+        """Тест очереди: успешное и ошибочное задания получают итоговые статусы"""
+        output_path = os.path.join(self.tmp_dir.name, 'out', 'report.pdf')
+
+        with ReportJobQueue(max_workers=1, backend='thread') as queue:
+            ok_job = queue.submit(self.bundle_path, output_path, patient_info={'ФИО': 'Иванов И.И.'},
+                                  quality='draft')
+            bad_job = queue.submit(os.path.join(self.tmp_dir.name, 'missing.csv'),
+                                   os.path.join(self.tmp_dir.name, 'missing.pdf'))
+            bad_channel_job = queue.submit(self.bundle_path, os.path.join(self.tmp_dir.name, 'bad.pdf'),
+                                           channels=[99], quality='draft')
+            results = {job['job_id']: job for job in queue.wait()}
+
+        self.assertEqual(results[ok_job]['status'], 'done')
+        self.assertEqual(results[ok_job]['result']['output_path'], output_path)
+        self.assertTrue(os.path.getsize(output_path) > 0)
+
+        self.assertEqual(results[bad_job]['status'], 'failed')
+        self.assertIn('missing.csv', results[bad_job]['error'])
+
+        # Ошибка генератора записывается в задание с причиной, а не общим сообщением
+        self.assertEqual(results[bad_channel_job]['status'], 'failed')
+        self.assertIn('Номер канала 99', results[bad_channel_job]['error'])
+
+
+if __name__ == '__main__':
+    # Запуск тестов
+    unittest.main(verbosity=2)
@@ -0,0 +1,64 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzer.spikes import StreamingSpikeDetector, detect_spikes_multichannel
+
+
+class TestSpikeDetection(unittest.TestCase):
+
+    def setUp(self):
+        """Шум на 8 каналах с известными спайками на каналах 2 и 5"""
+        self.sampling_rate = 250
+        rng = np.random.default_rng(0)
+        self.data = rng.standard_normal((8, self.sampling_rate * 20))
+        self.spike_positions = np.arange(600, self.data.shape[1], 500)
+        self.data[2, self.spike_positions] += 15
+        self.data[5, self.spike_positions + 2] -= 20
+
+    def test_multichannel_detection(self):
+        """Тест векторной детекции по всем каналам"""
+        result = detect_spikes_multichannel(self.data, self.sampling_rate, threshold=6.0)
+
+        self.assertEqual(result['spike_counts'][2], len(self.spike_positions))
+        self.assertEqual(result['spike_counts'][5], len(self.spike_positions))
+        self.assertEqual(result['spike_counts'].sum(), 2 * len(self.spike_positions))
+        np.testing.assert_allclose(result['spike_times'][2], self.spike_positions / self.sampling_rate)
+        self.assertTrue(np.all(result['spike_amplitudes'][5] < -10))
+
+    def test_zero_mad_channels(self):
+        """Тест: на плоском и квантованном каналах (MAD = 0) порог не нулевой"""
+        data = np.zeros((2, self.data.shape[1]))
+        # Квантованный сигнал: больше половины отсчетов на одном уровне, редкие отсчеты на соседних
+        data[1, ::5] = 1.0
+        data[1, 2::5] = -1.0
+        data[1, self.spike_positions] = 12.0
+
+        result = detect_spikes_multichannel(data, self.sampling_rate, threshold=6.0)
+        self.assertEqual(result['spike_counts'][0], 0)
+        self.assertEqual(result['spike_counts'][1], len(self.spike_positions))
+
+    def test_streaming_matches_batch(self):
+        """Тест потоковой детекции пакетами без пересмотра истории"""
+        detector = StreamingSpikeDetector(8, self.sampling_rate, threshold=6.0, warmup_s=2.0)
+
+        times = []
+        for start in range(0, self.data.shape[1], 64):
+            channels, spike_times, _ = detector.update(self.data[:, start:start + 64])
+            times.extend(spike_times[channels == 2])
+
+        # Спайки после прогрева находятся все и ровно по одному разу
+        expected = self.spike_positions[self.spike_positions >= 2 * self.sampling_rate] / self.sampling_rate
+        np.testing.assert_allclose(times, expected)
+        self.assertEqual(detector.spike_counts[5], len(expected))
+        self.assertAlmostEqual(detector.std[0], np.std(self.data[0]), places=1)
+
+
+if __name__ == '__main__':
+    # Запуск тестов
+    unittest.main(verbosity=2)
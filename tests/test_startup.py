@@ -0,0 +1,64 @@
+import os
+import subprocess
+import sys
+import unittest
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.lazy_import import LAZY_LOAD_TIMES, lazy_import
+from utils.startup import StartupTimer, parse_importtime
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_lazy_import(self):
+        """Тест отложенного импорта: модуль загружается при первом обращении"""
+        module = lazy_import('json.tool')
+        self.assertEqual(module.__name__, 'json.tool')
+        self.assertTrue(module.is_loaded)
+        self.assertIn('json.tool', LAZY_LOAD_TIMES)
+
+        with self.assertRaises(ModuleNotFoundError):
+            lazy_import('no_such_module_for_eeg')
+
+    def test_heavy_modules_are_not_imported_at_startup(self):
+        """Тест: модули обработки и загрузки не тянут scipy.signal, pandas, MNE и pywt при импорте"""
+        code = ("import sys\n"
+                "import data_loader.data_loader, preprocessor.preprocessor, analyzer.analyzer, validator.validator\n"
+                "print(','.join(m for m in ('scipy.signal', 'scipy.stats', 'pandas', 'mne', 'pywt', 'pyedflib')"
+                " if m in sys.modules))")
+        completed = subprocess.run([sys.executable, '-c', code], cwd=PROJECT_ROOT,
+                                   capture_output=True, text=True, timeout=120)
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+        self.assertEqual(completed.stdout.strip(), '')
+
+    def test_serial_is_not_imported_with_app(self):
+        """Тест: модули приложения и записи в реальном времени не загружают pyserial при импорте"""
+        code = ("import sys\n"
+                "import app.eeg_app, realtime_work.realtime_driver\n"
+                "print('serial' in sys.modules)")
+        completed = subprocess.run([sys.executable, '-c', code], cwd=PROJECT_ROOT,
+                                   capture_output=True, text=True, timeout=120)
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+        self.assertEqual(completed.stdout.strip().splitlines()[-1], 'False')
+
+    def test_startup_report(self):
+        """Тест отчета о запуске и разбора вывода -X importtime"""
+        timer = StartupTimer()
+        timer.mark("Импорт модулей приложения")
+        self.assertIn("Импорт модулей приложения", timer.report())
+
+        rows = parse_importtime("import time: self [us] | cumulative | imported package\n"
+                                "import time:       120 |       1500 |   scipy.signal\n"
+                                "import time:       300 |       2000 | analyzer.analyzer\n")
+        self.assertEqual([row['module'] for row in rows], ['scipy.signal', 'analyzer.analyzer'])
+        self.assertEqual(rows[0]['depth'], 1)
+        self.assertAlmostEqual(rows[1]['cumulative'], 0.002)
+
+
+if __name__ == '__main__':
+    # Запуск тестов
+    unittest.main(verbosity=2)
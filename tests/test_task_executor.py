@@ -0,0 +1,146 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+import numpy as np
+from PyQt5.QtCore import QCoreApplication
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzer.analyzer import EEGAnalyzer
+from app.pipeline import RhythmAnalysisCache, precompute_analysis_task
+from gui.task_executor import GuiTaskExecutor, TaskCancelled
+
+
+def wait_until(condition, timeout=5.0):
+    """Обработка событий Qt, пока условие не выполнится"""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        QCoreApplication.processEvents()
+        time.sleep(0.005)
+    return condition()
+
+
+class TestGuiTaskExecutor(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def setUp(self):
+        self.executor = GuiTaskExecutor(max_workers=2)
+
+    def tearDown(self):
+        self.executor.shutdown(wait=True)
+
+    def test_result_and_messages_delivered_in_gui_thread(self):
+        """Тест: результат, сообщения и прогресс приходят в GUI-поток, в том числе подключенные после submit"""
+        def task(context, value):
+            context.info("старт")
+            context.progress(50)
+            return value * 2
+
+        events = []
+        future = self.executor.submit("Test", task, 21)
+        future.info_signal.connect(lambda message: events.append(('info', message, threading.current_thread())))
+        future.progress_signal.connect(lambda value: events.append(('progress', value, threading.current_thread())))
+        future.result_signal.connect(lambda result: events.append(('result', result, threading.current_thread())))
+
+        self.assertTrue(wait_until(lambda: self.executor.active_count == 0))
+        self.assertEqual([event[:2] for event in events], [('info', "старт"), ('progress', 50), ('result', 42)])
+        self.assertTrue(all(event[2] is threading.main_thread() for event in events))
+
+        errors = []
+        failing = self.executor.submit("Test", lambda context: 1 / 0)
+        failing.error_signal.connect(errors.append)
+        self.assertTrue(wait_until(lambda: errors))
+        self.assertIn("division by zero", errors[0])
+
+    def test_superseded_requests_are_coalesced(self):
+        """Тест: при частой смене канала считается и доставляется только последний запрос"""
+        gate = threading.Event()
+        started = []
+
+        def analysis(context, channel_idx):
+            started.append(channel_idx)
+            gate.wait(5)
+            context.check_cancelled()
+            return channel_idx
+
+        results, cancelled = [], []
+        futures = []
+        for channel_idx in range(5):
+            future = self.executor.submit("Analysis", analysis, channel_idx, key='analysis')
+            future.result_signal.connect(results.append)
+            future.cancelled_signal.connect(lambda idx=channel_idx: cancelled.append(idx))
+            futures.append(future)
+        self.assertTrue(self.executor.is_running('analysis'))
+        gate.set()
+
+        self.assertTrue(wait_until(lambda: self.executor.active_count == 0))
+        self.assertEqual(results, [4])
+        self.assertEqual(sorted(cancelled), [0, 1, 2, 3])
+        # Отмененные до начала задачи не запускались вовсе
+        self.assertLess(len(started), 5)
+        self.assertEqual(futures[-1].result(), 4)
+        with self.assertRaises(TaskCancelled):
+            futures[0].result()
+        self.assertFalse(self.executor.is_running('analysis'))
+
+    def test_precompute_analysis_in_priority_order(self):
+        """Тест: фоновый анализ заполняет кэш всех каналов, начиная с выбранного"""
+        data = np.random.default_rng(2).standard_normal((4, 1000))
+        cache = RhythmAnalysisCache()
+        cache.bind(data, 250)
+        cache.prioritize(2)
+
+        order = []
+        put = cache.put
+        cache.put = lambda *args: order.append(args[2]) or put(*args)
+        future = self.executor.submit("Precompute", precompute_analysis_task, EEGAnalyzer(), cache, data, 250,
+                                      key='precompute')
+        self.assertEqual(future.result(timeout=30), 4)
+        self.assertEqual(order, [2, 3, 0, 1])
+        self.assertEqual(cache.get(data, 250, 3)['channel_idx'], 3)
+
+        # Результаты для прежних данных после смены записи отбрасываются
+        self.assertTrue(cache.bind(data.copy(), 250))
+        self.assertIsNone(cache.get(data, 250, 3))
+        self.assertFalse(cache.put(data, 250, 3, {}))
+
+    def test_background_precompute_yields_to_user_tasks(self):
+        """Тест: фоновый предрасчет не виден в счетчике задач и уступает пул задаче пользователя"""
+        data = np.random.default_rng(3).standard_normal((4, 1000))
+        cache = RhythmAnalysisCache()
+        cache.bind(data, 250)
+
+        counts = []
+        self.executor.active_changed.connect(counts.append)
+        gate = threading.Event()
+        user_task = self.executor.submit("Processing", lambda context: gate.wait(5))
+        background = self.executor.submit(
+            "Precompute", precompute_analysis_task, EEGAnalyzer(), cache, data, 250,
+            lambda: self.executor.foreground_count > 0, key='precompute', background=True)
+
+        # Пока идет задача пользователя, предрасчет сразу завершается, не занимая поток
+        self.assertEqual(background.result(timeout=30), 0)
+        self.assertEqual(len(cache), 0)
+        gate.set()
+        self.assertTrue(user_task.result(timeout=5))
+        self.assertTrue(wait_until(lambda: self.executor.active_count == 0))
+        self.assertEqual(counts, [1, 0])
+
+        resumed = self.executor.submit(
+            "Precompute", precompute_analysis_task, EEGAnalyzer(), cache, data, 250,
+            lambda: self.executor.foreground_count > 0, key='precompute', background=True)
+        self.assertEqual(resumed.result(timeout=30), 4)
+        self.assertTrue(wait_until(lambda: self.executor.active_count == 0))
+        self.assertEqual(counts, [1, 0])
+
+
+if __name__ == '__main__':
+    # Запуск тестов
+    unittest.main(verbosity=2)
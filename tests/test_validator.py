@@ -0,0 +1,92 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+import numpy as np
+from scipy.stats import pearsonr
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from validator import validator as validator_module
+from preprocessor.preprocessor import EEGPreprocessor
+from validator.validator import EEGValidator
+
+
+class TestEEGValidator(unittest.TestCase):
+
+    def setUp(self):
+        """Настройка тестовых данных"""
+        rng = np.random.default_rng(0)
+        self.validator = EEGValidator()
+        self.mne_data = rng.standard_normal((6, 2000))
+        self.our_data = self.mne_data + 0.3 * rng.standard_normal((6, 2000))
+
+    def test_filtering_metrics_match_per_channel(self):
+        """Тест: векторные метрики совпадают с поканальным расчетом через pearsonr"""
+        # Маленький блок - проверяем и разбиение каналов на части
+        block = validator_module.METRICS_BLOCK_ELEMENTS
+        validator_module.METRICS_BLOCK_ELEMENTS = 4000
+        try:
+            comparison = self.validator.compare_filtering(self.our_data, self.mne_data)
+        finally:
+            validator_module.METRICS_BLOCK_ELEMENTS = block
+
+        for ch_result, our_ch, mne_ch in zip(comparison['channels'], self.our_data, self.mne_data):
+            correlation, p_value = pearsonr(our_ch, mne_ch)
+            self.assertAlmostEqual(ch_result['correlation'], correlation, places=10)
+            self.assertAlmostEqual(ch_result['p_value'], p_value, places=10)
+            self.assertAlmostEqual(ch_result['rmse'], np.sqrt(np.mean((our_ch - mne_ch) ** 2)), places=10)
+            self.assertAlmostEqual(ch_result['mae'], np.mean(np.abs(our_ch - mne_ch)), places=10)
+
+        # Готовое сравнение передается в отчет и не пересчитывается
+        report = self.validator.generate_comparison_report(
+            None, None, self.our_data, self.mne_data, filter_comparison=comparison)
+        self.assertIn(f"{comparison['summary']['mean_correlation']:.4f}", report)
+
+        self.assertIn('error', self.validator.compare_filtering(self.our_data[:3], self.mne_data))
+
+    def test_mne_validation_mirrors_processing_params(self):
+        """Тест: MNE фильтрует с параметрами пользователя, результаты и Raw переиспользуются"""
+        data = self.mne_data * 1e-5
+        params = {'low_freq': 2.0, 'high_freq': 30.0, 'notch_freq': 60.0}
+
+        result = self.validator.compare_with_mne(data, 250, processing_params=params)
+        self.assertTrue(result['available'], result['message'])
+        self.assertEqual(result['filter_params'], {'low_freq': 2.0, 'high_freq': 30.0, 'notch_freq': 60.0})
+
+        # Raw один на запись и ссылается на исходные данные без копии
+        raw = self.validator.get_raw(data, 250)
+        self.assertTrue(np.shares_memory(raw._data, data))
+
+        repeated = self.validator.compare_with_mne(data, 250, processing_params=params)
+        np.testing.assert_array_equal(repeated['mne_data'], result['mne_data'])
+        self.assertIs(self.validator.get_raw(data, 250), raw)
+
+        # PSD считается (раньше падало на отсутствующем mne_available) и сравнивается на одной сетке
+        psd = self.validator.validate_psd(data, result['mne_data'], 250, processing_params=params)
+        self.assertEqual(psd['our_psd'].shape, psd['mne_psd'].shape)
+        self.assertGreater(psd['correlation'], 0.999)
+        self.assertIs(self.validator.compute_mne_psd(data, 250, processing_params=params),
+                      self.validator.compute_mne_psd(data, 250, processing_params=params))
+
+    def test_recording_hashed_once_per_array(self):
+        """Тест: повторная валидация той же записи не хеширует ее заново, новая запись - хеширует"""
+        data = self.mne_data * 1e-5
+        params = {'low_freq': 2.0, 'high_freq': 30.0, 'notch_freq': 50.0}
+        fingerprint = mock.Mock(wraps=EEGPreprocessor._recording_fingerprint)
+
+        with mock.patch.object(EEGPreprocessor, '_recording_fingerprint', fingerprint):
+            for _ in range(2):
+                result = self.validator.compare_with_mne(data, 250, processing_params=params)
+                self.validator.validate_psd(data, result['mne_data'], 250, processing_params=params)
+            self.assertEqual(fingerprint.call_count, 1)
+
+            self.validator.compare_with_mne(data.copy(), 250, processing_params=params)
+            self.assertEqual(fingerprint.call_count, 2)
+
+
+if __name__ == '__main__':
+    # Запуск тестов
+    unittest.main(verbosity=2)
@@ -0,0 +1,54 @@
+import os
+import re
+import sys
+import time
+import unittest
+
+# Добавляем путь к корневой директории проекта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import serial
+
+from realtime_work.realtime_driver import SerialEEGDriver
+from realtime_work.virtual_serial import VirtualSerialPort, emotion_source
+
+EMOTION_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'emotion_6', '4_drawing.csv')
+
+
+@unittest.skipUnless(os.name == 'posix', "pty доступен только на POSIX системах")
+class TestVirtualSerialPort(unittest.TestCase):
+
+    def _read_lines(self, port, duration=0.5):
+        with serial.Serial(port.port_name, timeout=0.1) as ser:
+            data = b""
+            deadline = time.time() + duration
+            while time.time() < deadline:
+                data += ser.read(ser.in_waiting or 1)
+        return data.split(b"\n")[1:-1]  # Первая и последняя строки могут быть неполными
+
+    def test_sketch_format(self):
+        """Тест формата строк скетча eeg_reader.ino при воспроизведении emotion_6"""
+        with VirtualSerialPort(emotion_source(EMOTION_FILE), sample_rate_hz=500, seed=0) as port:
+            lines = self._read_lines(port)
+
+        self.assertGreater(len(lines), 100)
+        self.assertTrue(all(re.fullmatch(rb"\d+\.\d{3},\d{1,4}\r", line) for line in lines))
+
+        driver = SerialEEGDriver(port='virtual')
+        samples = [driver._parse_line(line.strip()) for line in lines]
+        self.assertTrue(all(0 <= sample.amplitudes[0] <= 1023 for sample in samples))
+
+    def test_corruption_is_tolerated(self):
+        """Тест: испорченные строки не ломают разбор"""
+        with VirtualSerialPort(sample_rate_hz=1000, corruption_rate=0.2, seed=1) as port:
+            lines = self._read_lines(port)
+            corrupted = port.lines_corrupted
+
+        self.assertGreater(corrupted, 0)
+        driver = SerialEEGDriver(port='virtual')
+        parsed = [driver._parse_line(line.strip()) for line in lines]
+        self.assertGreater(sum(sample is not None for sample in parsed), len(lines) // 2)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
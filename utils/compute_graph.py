@@ -0,0 +1,225 @@
+"""
+Граф вычислений с отслеживанием зависимостей: загрузка -> обработка -> анализ -> графики.
+
+Каждый узел запоминает версии входов, из которых посчитан его результат, и
+пересчитывается только если какая-то из них изменилась. Входы (исходные данные,
+параметры, выбранный канал) получают новую версию лишь при фактическом изменении
+значения, поэтому смена одного параметра пересчитывает только зависящие от него узлы.
+
+Узел с retain=False хранит только версии зависимостей, а не значение: дешевые
+промежуточные этапы обработки не держат в памяти лишние копии записи. Когда их
+значение нужно пересчитываемому нижестоящему узлу, оно восстанавливается из
+ближайших хранимых узлов выше по графу - такое восстановление считается пересчетом
+(stale_nodes, before_compute, счетчик computed).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def _same_value(old, new):
+    # Массивы сравниваются по объекту: сравнивать содержимое больших записей дорого
+    if old is new:
+        return True
+    if isinstance(old, np.ndarray) or isinstance(new, np.ndarray):
+        return False
+    try:
+        return bool(old == new)
+    except (ValueError, TypeError):
+        # Словари и кортежи с массивами внутри
+        return False
+
+
+class GraphNode:
+    __slots__ = ('name', 'func', 'deps', 'description', 'is_input', 'retain', 'value', 'version',
+                 'dep_versions', 'lock', 'computed', 'reused', 'last_duration')
+
+    def __init__(self, name, func=None, deps=(), description=None, is_input=False, retain=True):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.description = description
+        self.is_input = is_input
+        self.retain = retain
+        self.value = None
+        self.version = 0
+        # Версии зависимостей, по которым посчитано value (None - еще не считалось)
+        self.dep_versions = None
+        self.lock = threading.RLock()
+        self.computed = 0
+        self.reused = 0
+        self.last_duration = 0.0
+
+
+class ComputeGraph:
+    """Мемоизирующий граф. Узлы вычисляются лениво при запросе get().
+
+    Вычисление узла защищено его собственной блокировкой (зависимости берутся в
+    порядке от узла к входам, поэтому взаимных блокировок нет): тяжелую обработку
+    можно считать в рабочем потоке, пока GUI-поток перерисовывает графики,
+    не зависящие от нее.
+    """
+
+    def __init__(self):
+        self._nodes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add_input(self, name, value=None):
+        self._add(GraphNode(name, is_input=True))
+        self._nodes[name].value = value
+        return self
+
+    def add_node(self, name, func, deps, description=None, retain=True):
+        """func(*значения deps); description - сообщение о пересчете этапа.
+
+        retain=False - значение не хранится, узел помнит только версии зависимостей.
+        """
+        for dep in deps:
+            if dep not in self._nodes:
+                raise ValueError(f"Неизвестная зависимость '{dep}' узла '{name}'")
+        self._add(GraphNode(name, func, deps, description, retain=retain))
+        return self
+
+    def set_input(self, name, value):
+        """Новое значение входа; возвращает True, если оно действительно изменилось"""
+        node = self._node(name)
+        if not node.is_input:
+            raise ValueError(f"'{name}' - вычисляемый узел, а не вход")
+        with self._lock:
+            if _same_value(node.value, value):
+                return False
+            node.value = value
+            node.version += 1
+            return True
+
+    def set_inputs(self, **values):
+        return [name for name, value in values.items() if self.set_input(name, value)]
+
+    def get(self, name, before_compute=None):
+        """Значение узла; before_compute(node) вызывается перед каждым фактическим пересчетом"""
+        # Значения, посчитанные за этот вызов (в том числе нехранимых узлов), живут до его конца
+        scratch = {}
+        self._evaluate(name, before_compute, scratch)
+        return self._value(name, scratch, before_compute)
+
+    def peek(self, name):
+        """Последнее хранимое значение без пересчета (None, если узел не считался или не хранится)"""
+        return self._node(name).value
+
+    def is_stale(self, name):
+        return bool(self.stale_nodes(name))
+
+    def stale_nodes(self, name):
+        """Узлы, которые будут пересчитаны при get(name), в порядке вычисления"""
+        stale = OrderedDict()
+        self._collect_stale(name, stale, {})
+        self._mark_regenerated(name, stale)
+        return [node_name for node_name, is_stale in stale.items() if is_stale]
+
+    def invalidate(self, name):
+        """Принудительный пересчет узла при следующем запросе"""
+        node = self._node(name)
+        with node.lock:
+            node.dep_versions = None
+
+    def report(self):
+        lines = [f"{'Узел':<22}{'пересчетов':>12}{'из памяти':>12}{'последний, с':>15}"]
+        for node in self._nodes.values():
+            if not node.is_input:
+                lines.append(f"{node.name:<22}{node.computed:>12}{node.reused:>12}{node.last_duration:>15.3f}")
+        return "\n".join(lines)
+
+    def _add(self, node):
+        if node.name in self._nodes:
+            raise ValueError(f"Узел '{node.name}' уже есть в графе")
+        self._nodes[node.name] = node
+
+    def _node(self, name):
+        try:
+            return self._nodes[name]
+        except KeyError:
+            raise ValueError(f"Неизвестный узел графа: '{name}'") from None
+
+    def _evaluate(self, name, before_compute, scratch):
+        """Приводит узел в актуальное состояние и возвращает его версию"""
+        if name in scratch:
+            return scratch[name][1]
+
+        node = self._node(name)
+        if node.is_input:
+            with self._lock:
+                scratch[name] = (node.value, node.version)
+                return node.version
+
+        with node.lock:
+            dep_versions = tuple(self._evaluate(dep, before_compute, scratch) for dep in node.deps)
+            if node.dep_versions == dep_versions:
+                node.reused += 1
+                return node.version
+
+            values = [self._value(dep, scratch, before_compute) for dep in node.deps]
+            value = self._compute(node, values, before_compute)
+
+            # Этап, вернувший тот же объект (выключенный шаг обработки), не сбрасывает нижестоящие узлы
+            if node.dep_versions is None or not node.retain or value is not node.value:
+                node.version += 1
+            node.value = value if node.retain else None
+            node.dep_versions = dep_versions
+            scratch[name] = (value, node.version)
+            return node.version
+
+    def _value(self, name, scratch, before_compute=None):
+        # Узел уже актуален (после _evaluate): значение хранится или восстанавливается по зависимостям
+        if name in scratch:
+            return scratch[name][0]
+
+        node = self._nodes[name]
+        with node.lock:
+            if node.retain:
+                return node.value
+            values = [self._value(dep, scratch, before_compute) for dep in node.deps]
+            value = self._compute(node, values, before_compute)
+            scratch[name] = (value, node.version)
+            return value
+
+    @staticmethod
+    def _compute(node, values, before_compute):
+        if before_compute is not None:
+            before_compute(node)
+        start = time.perf_counter()
+        value = node.func(*values)
+        node.last_duration = time.perf_counter() - start
+        node.computed += 1
+        return value
+
+    def _collect_stale(self, name, stale, versions):
+        # versions: ожидаемая версия узла после пересчета (для проверки нижестоящих)
+        if name in versions:
+            return versions[name]
+
+        node = self._nodes[name]
+        if node.is_input:
+            versions[name] = node.version
+            return node.version
+
+        dep_versions = tuple(self._collect_stale(dep, stale, versions) for dep in node.deps)
+        is_stale = node.dep_versions != dep_versions
+        stale[name] = is_stale
+        if is_stale:
+            # Пересчету нужны значения зависимостей - нехранимые придется восстановить
+            for dep in node.deps:
+                self._mark_regenerated(dep, stale)
+        # Пересчитанный узел считаем измененным - точную версию заранее не узнать
+        versions[name] = (node.version, 'stale') if is_stale else node.version
+        return versions[name]
+
+    def _mark_regenerated(self, name, stale):
+        node = self._nodes[name]
+        if node.is_input or node.retain or stale.get(name):
+            return
+        stale[name] = True
+        for dep in node.deps:
+            self._mark_regenerated(dep, stale)
@@ -0,0 +1,114 @@
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+from utils.filter_validation import FilterValidator
+from utils.lazy_import import lazy_import
+
+signal = lazy_import('scipy.signal')
+
+
+@dataclass(frozen=True)
+class FilterDesign:
+    sos: np.ndarray  # коэффициенты фильтра в виде SOS-секций
+    params: tuple  # частоты после валидации и автокоррекции
+    warnings: tuple  # предупреждения валидатора
+
+
+class FilterDesignCache:
+    """Мемоизированная фабрика фильтров: валидация и расчет коэффициентов один раз на ключ.
+
+    Ключ - (kind, band, fs, order). Для notch-фильтра band - частота режекции,
+    а order - добротность.
+    """
+
+    KINDS = ('bandpass', 'notch')
+
+    def __init__(self):
+        self._designs = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_sos(self, kind, band, fs, order=4):
+        return self.get_design(kind, band, fs, order).sos
+
+    def get_design(self, kind, band, fs, order=4):
+        key = self._make_key(kind, band, fs, order)
+
+        with self._lock:
+            design = self._designs.get(key)
+            if design is not None:
+                self.hits += 1
+                return design
+
+        design = self._create_design(*key)
+
+        with self._lock:
+            # Другой поток мог успеть рассчитать тот же фильтр
+            if key in self._designs:
+                self.hits += 1
+                return self._designs[key]
+            self._designs[key] = design
+            self.misses += 1
+
+        # Предупреждения выводятся только при первом расчете фильтра
+        if design.warnings:
+            print(f"⚠️  АВТОКОРРЕКЦИЯ ПАРАМЕТРОВ ФИЛЬТРА ({kind}, {band}, {fs} Гц):")
+            for warning in design.warnings:
+                print(f"   • {warning}")
+
+        return design
+
+    def get_statistics(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._designs),
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+    def clear(self):
+        with self._lock:
+            self._designs.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _make_key(self, kind, band, fs, order):
+        if kind not in self.KINDS:
+            raise ValueError(f"Неизвестный тип фильтра: {kind}. Доступны: {', '.join(self.KINDS)}")
+
+        if kind == 'bandpass':
+            low_freq, high_freq = band
+            band = (float(low_freq), float(high_freq))
+        else:
+            band = float(band)
+
+        return kind, band, float(fs), order
+
+    @staticmethod
+    def _create_design(kind, band, fs, order):
+        if kind == 'bandpass':
+            low_freq, high_freq, warnings = FilterValidator.validate_bandpass_params(band[0], band[1], fs)
+            try:
+                sos = signal.butter(order, [low_freq, high_freq], btype='band', fs=fs, output='sos')
+            except Exception as e:
+                raise ValueError(f"Ошибка создания фильтра: {e}. Частоты: {low_freq:.2f}-{high_freq:.2f} Гц")
+            params = (low_freq, high_freq)
+        else:
+            notch_freq, warnings = FilterValidator.validate_notch_params(band, fs)
+            try:
+                b, a = signal.iirnotch(notch_freq, order, fs=fs)
+            except Exception as e:
+                raise ValueError(f"Ошибка создания notch фильтра: {e}. Частота: {notch_freq:.2f} Гц")
+            sos = signal.tf2sos(b, a)
+            params = (notch_freq,)
+
+        return FilterDesign(sos=sos, params=params, warnings=tuple(warnings))
+
+
+# Общий кеш для анализатора и препроцессора
+filter_design_cache = FilterDesignCache()
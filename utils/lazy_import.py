@@ -0,0 +1,70 @@
+import importlib
+import importlib.util
+import threading
+import time
+from collections import OrderedDict
+
+# Время первой загрузки отложенных модулей (секунды) в порядке загрузки
+LAZY_LOAD_TIMES = OrderedDict()
+
+_load_lock = threading.RLock()
+
+
+class LazyModule:
+    """Модуль, который импортируется при первом обращении к атрибуту.
+
+    Тяжелые библиотеки (scipy.signal, pandas, MNE, pywt, pyedflib, serial) нужны не в каждом
+    сеансе, а их импорт занимает большую часть запуска приложения. Загрузка защищена
+    блокировкой - первым к модулю может обратиться рабочий поток.
+    """
+
+    __slots__ = ('_name', '_module')
+
+    def __init__(self, name):
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_module', None)
+
+    def _load(self):
+        module = self._module
+        if module is not None:
+            return module
+
+        with _load_lock:
+            if self._module is None:
+                start = time.perf_counter()
+                module = importlib.import_module(self._name)
+                LAZY_LOAD_TIMES.setdefault(self._name, time.perf_counter() - start)
+                object.__setattr__(self, '_module', module)
+        return self._module
+
+    @property
+    def is_loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
+
+    def __setattr__(self, attribute, value):
+        setattr(self._load(), attribute, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'загружен' if self._module is not None else 'не загружен'
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def lazy_import(name):
+    """Отложенный импорт модуля; отсутствие модуля обнаруживается сразу, без загрузки"""
+    if importlib.util.find_spec(name) is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    return LazyModule(name)
+
+
+def is_available(name):
+    """Установлен ли модуль (без его импорта)"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
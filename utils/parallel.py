@@ -0,0 +1,118 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+def _run_shared_block(shm_name, shape, dtype, start, stop, func, args, kwargs):
+    # Выполняется в дочернем процессе: подключаемся к общей памяти без копирования входа
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        data = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        return func(data[start:stop], *args, **kwargs)
+    finally:
+        shm.close()
+
+
+class ChannelExecutor:
+    """Исполнитель поканальных вычислений: serial / thread / process.
+
+    Данные делятся на блоки каналов (ось 0), результаты собираются в исходном порядке.
+    Для процессов вход передается через shared memory, поэтому функция должна быть
+    доступна для pickle (функция модуля или staticmethod).
+    """
+
+    BACKENDS = ('serial', 'thread', 'process')
+
+    def __init__(self, backend='serial', max_workers=None):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Неизвестный backend: {backend}. Доступны: {', '.join(self.BACKENDS)}")
+
+        self.backend = backend
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_parallel(self):
+        return self.backend != 'serial' and self.max_workers > 1
+
+    def map(self, func, items):
+        items = list(items)
+        if not self.is_parallel or len(items) < 2:
+            return [func(item) for item in items]
+
+        # executor.map возвращает результаты в порядке входных элементов
+        return list(self._get_pool().map(func, items))
+
+    def map_blocks(self, func, data, *args, **kwargs):
+        data = np.asarray(data)
+        if data.ndim < 2 or not self.is_parallel:
+            return func(data, *args, **kwargs)
+
+        blocks = self._split_blocks(data.shape[0])
+        if len(blocks) < 2:
+            return func(data, *args, **kwargs)
+
+        if self.backend == 'thread':
+            results = self._get_pool().map(lambda bounds: func(data[bounds[0]:bounds[1]], *args, **kwargs), blocks)
+            return np.concatenate(list(results), axis=0)
+
+        return self._map_blocks_shared(func, data, blocks, args, kwargs)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+    def __getstate__(self):
+        # В дочерних процессах вложенный параллелизм не нужен
+        return {'backend': 'serial', 'max_workers': 1}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _split_blocks(self, n_channels):
+        n_blocks = min(n_channels, self.max_workers)
+        if n_blocks < 1:
+            return []
+        bounds = np.linspace(0, n_channels, n_blocks + 1).astype(int)
+        return [(int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:])]
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                if self.backend == 'process':
+                    self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+                else:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers)
+            return self._pool
+
+    def _map_blocks_shared(self, func, data, blocks, args, kwargs):
+        shm = shared_memory.SharedMemory(create=True, size=max(data.nbytes, 1))
+        try:
+            shared = np.ndarray(data.shape, dtype=data.dtype, buffer=shm.buf)
+            shared[...] = data
+
+            pool = self._get_pool()
+            futures = [
+                pool.submit(_run_shared_block, shm.name, data.shape, data.dtype, start, stop, func, args, kwargs)
+                for start, stop in blocks
+            ]
+            return np.concatenate([future.result() for future in futures], axis=0)
+        finally:
+            shm.close()
+            shm.unlink()
+
+
+# Исполнитель по умолчанию - последовательный, приложение может заменить его на параллельный
+default_executor = ChannelExecutor('serial')
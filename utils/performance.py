@@ -1,42 +1,302 @@
-import gc
+import itertools
+import json
 import os
 import sys
+import threading
 import time
+import tracemalloc
+from collections import deque
 from typing import Any, Dict
 
 import numpy as np
 import psutil
 
+# Сколько последних вызовов каждой операции хранится для перцентилей
+HISTORY_SIZE = 1024
+
+# Сколько последних завершенных спанов хранится для построения дерева вызовов
+SPAN_HISTORY_SIZE = 10000
+
+NS_PER_SECOND = 1e9
+BYTES_PER_MB = 1024 * 1024
+
+# tracemalloc общий на процесс, а мониторов несколько (анализатор, препроцессор, приложение):
+# трассировку останавливает последний отключивший ее монитор и только если ее запустили мониторы
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_owned = False
+
+
+class OperationStats:
+    """Статистика одной операции: счетчики за все время и кольцевой буфер последних вызовов."""
+
+    def __init__(self, capacity=HISTORY_SIZE):
+        self.durations_ns = np.zeros(capacity, dtype=np.int64)
+        self.memory_deltas_mb = np.full(capacity, np.nan, dtype=np.float32)
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.memory_samples = 0
+        self.total_memory_delta_mb = 0.0
+        self.peak_memory_mb = 0.0
+
+    def add(self, duration_ns, memory_delta_mb=None, memory_peak_mb=None):
+        slot = self.count % self.durations_ns.size
+        self.durations_ns[slot] = duration_ns
+        self.count += 1
+        self.total_ns += duration_ns
+        self.max_ns = max(self.max_ns, duration_ns)
+
+        if memory_delta_mb is None:
+            self.memory_deltas_mb[slot] = np.nan
+        else:
+            self.memory_deltas_mb[slot] = memory_delta_mb
+            self.memory_samples += 1
+            self.total_memory_delta_mb += memory_delta_mb
+            self.peak_memory_mb = max(self.peak_memory_mb, memory_peak_mb or 0.0)
+
+    @property
+    def total_time(self):
+        return self.total_ns / NS_PER_SECOND
+
+    @property
+    def mean_time(self):
+        return self.total_time / self.count if self.count else 0.0
+
+    @property
+    def max_time(self):
+        return self.max_ns / NS_PER_SECOND
+
+    def recent_durations(self):
+        # Секунды для сохраненных вызовов (порядок внутри буфера не важен для перцентилей)
+        return self.durations_ns[:min(self.count, self.durations_ns.size)] / NS_PER_SECOND
+
+    def percentiles(self, quantiles=(50, 95, 99)):
+        durations = self.recent_durations()
+        if durations.size == 0:
+            return {f"p{q}": 0.0 for q in quantiles}
+
+        values = np.percentile(durations, quantiles)
+        return {f"p{q}": float(value) for q, value in zip(quantiles, values)}
+
+    def to_dict(self):
+        result = {
+            'count': self.count,
+            'total_time': self.total_time,
+            'mean_time': self.mean_time,
+            'max_time': self.max_time,
+            **self.percentiles()
+        }
+        if self.memory_samples:
+            result['memory_delta_mb'] = self.total_memory_delta_mb
+            result['memory_peak_mb'] = self.peak_memory_mb
+        return result
+
 
 class PerformanceMonitor:
 
-    def __init__(self):
-        self.measurements = {}
+    def __init__(self, memory_sampling=False):
+        self.operations = {}
+        self.children = {}
+        self.spans = deque(maxlen=SPAN_HISTORY_SIZE)
+        self.root_time_ns = 0
+        self.thread_names = {}
         self.memory_snapshots = {}
         self.tracked_objects = {}
+        self.memory_sampling = False
 
-    def measure(self, operation_name):
-        return self.MeasurementContext(self, operation_name)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._span_ids = itertools.count(1)
+        # Начало отсчета для временных меток трассировки
+        self._origin_ns = time.perf_counter_ns()
 
-    class MeasurementContext:
-        def __init__(self, monitor, name):
+        if memory_sampling:
+            self.enable_memory_sampling()
+
+    def measure(self, operation_name, memory=False):
+        return self.Span(self, operation_name, memory and self.memory_sampling)
+
+    def measure_with_memory(self, operation_name: str):
+        # Память измеряется только если сэмплирование включено явно
+        return self.measure(operation_name, memory=True)
+
+    def enable_memory_sampling(self):
+        global _tracemalloc_users, _tracemalloc_owned
+        with _tracemalloc_lock:
+            if self.memory_sampling:
+                return
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _tracemalloc_owned = True
+            _tracemalloc_users += 1
+            self.memory_sampling = True
+
+    def disable_memory_sampling(self):
+        global _tracemalloc_users, _tracemalloc_owned
+        with _tracemalloc_lock:
+            if not self.memory_sampling:
+                return
+            self.memory_sampling = False
+            _tracemalloc_users -= 1
+            if _tracemalloc_users == 0 and _tracemalloc_owned:
+                if tracemalloc.is_tracing():
+                    tracemalloc.stop()
+                _tracemalloc_owned = False
+
+    class Span:
+        __slots__ = ('monitor', 'name', 'memory', 'span_id', 'parent_id', 'start_ns', 'memory_before')
+
+        def __init__(self, monitor, name, memory=False):
             self.monitor = monitor
             self.name = name
+            self.memory = memory
 
         def __enter__(self):
-            self.start_time = time.time()
+            stack = self.monitor._span_stack()
+            self.parent_id = stack[-1].span_id if stack else None
+            self.span_id = next(self.monitor._span_ids)
+            stack.append(self)
+
+            if self.memory:
+                self.memory_before = tracemalloc.get_traced_memory()[0]
+            self.start_ns = time.perf_counter_ns()
             return self
 
         def __exit__(self, exc_type, exc_val, exc_tb):
-            execution_time = time.time() - self.start_time
+            duration_ns = time.perf_counter_ns() - self.start_ns
+
+            memory_delta_mb = memory_peak_mb = None
+            if self.memory and tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                memory_delta_mb = (current - self.memory_before) / BYTES_PER_MB
+                memory_peak_mb = peak / BYTES_PER_MB
+
+            stack = self.monitor._span_stack()
+            stack.pop()
+            parent_name = stack[-1].name if stack else None
+
+            self.monitor._record(self, parent_name, duration_ns, memory_delta_mb, memory_peak_mb)
+
+    def set_thread_name(self, name):
+        # Имя потока для трассировки (у QThread в Python нет осмысленного имени)
+        with self._lock:
+            self.thread_names[threading.get_ident()] = name
+
+    def _span_stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, span, parent_name, duration_ns, memory_delta_mb, memory_peak_mb):
+        with self._lock:
+            stats = self.operations.get(span.name)
+            if stats is None:
+                stats = self.operations[span.name] = OperationStats()
+            stats.add(duration_ns, memory_delta_mb, memory_peak_mb)
+
+            if parent_name is not None:
+                self.children.setdefault(parent_name, set()).add(span.name)
+            else:
+                self.root_time_ns += duration_ns
+
+            thread_id = threading.get_ident()
+            if thread_id not in self.thread_names:
+                self.thread_names[thread_id] = threading.current_thread().name
+
+            self.spans.append((span.span_id, span.parent_id, span.name, span.start_ns, duration_ns, thread_id))
+
+    def get_operation_stats(self, operation_name=None):
+        with self._lock:
+            if operation_name is not None:
+                stats = self.operations.get(operation_name)
+                return stats.to_dict() if stats else None
+            return {name: stats.to_dict() for name, stats in self.operations.items()}
+
+    def get_total_time(self):
+        # Только спаны верхнего уровня, чтобы вложенные не учитывались дважды
+        return self.root_time_ns / NS_PER_SECOND
+
+    def get_span_tree(self):
+        with self._lock:
+            spans = list(self.spans)
+
+        nodes = {span_id: {'name': name, 'start_ns': start_ns, 'duration': duration_ns / NS_PER_SECOND,
+                           'thread': self.thread_names.get(thread_id, str(thread_id)), 'children': []}
+                 for span_id, _, name, start_ns, duration_ns, thread_id in spans}
+        roots = []
+        for span_id, parent_id, *_ in spans:
+            parent = nodes.get(parent_id)
+            (parent['children'] if parent else roots).append(nodes[span_id])
+
+        # Дочерние спаны завершаются раньше родителя - восстанавливаем порядок старта
+        for node in nodes.values():
+            node['children'].sort(key=lambda child: child['start_ns'])
+        roots.sort(key=lambda node: node['start_ns'])
+        return roots
+
+    def export_trace_events(self):
+        # Формат Chrome trace-event (открывается в Perfetto / chrome://tracing), время в микросекундах
+        with self._lock:
+            spans = list(self.spans)
+            thread_names = dict(self.thread_names)
+
+        pid = os.getpid()
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': 'EEG Analyzer'}}]
+        events.extend(
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': thread_id, 'args': {'name': name}}
+            for thread_id, name in thread_names.items()
+        )
+        events.extend(
+            {
+                'name': name,
+                'cat': 'eeg',
+                'ph': 'X',
+                'ts': (start_ns - self._origin_ns) / 1000,
+                'dur': duration_ns / 1000,
+                'pid': pid,
+                'tid': thread_id,
+                'args': {'span_id': span_id, 'parent_id': parent_id}
+            }
+            for span_id, parent_id, name, start_ns, duration_ns, thread_id in spans
+        )
 
-            if self.name not in self.monitor.measurements:
-                self.monitor.measurements[self.name] = []
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
 
-            self.monitor.measurements[self.name].append({
-                'time': execution_time,
-                'timestamp': time.time()
-            })
+    def export_json(self):
+        with self._lock:
+            spans = list(self.spans)
+            thread_names = dict(self.thread_names)
+
+        return {
+            'total_time': self.get_total_time(),
+            'operations': self.get_operation_stats(),
+            'spans': [
+                {
+                    'id': span_id,
+                    'parent_id': parent_id,
+                    'name': name,
+                    'start': (start_ns - self._origin_ns) / NS_PER_SECOND,
+                    'duration': duration_ns / NS_PER_SECOND,
+                    'thread_id': thread_id,
+                    'thread': thread_names.get(thread_id, str(thread_id))
+                }
+                for span_id, parent_id, name, start_ns, duration_ns, thread_id in spans
+            ],
+            'tracked_objects': self.tracked_objects
+        }
+
+    def save_trace(self, file_path, trace_format='chrome'):
+        if trace_format == 'chrome':
+            payload = self.export_trace_events()
+        elif trace_format == 'json':
+            payload = self.export_json()
+        else:
+            raise ValueError(f"Неизвестный формат трассировки: {trace_format}. Доступны: chrome, json")
+
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, indent=1)
 
     def get_system_info(self):
         process = psutil.Process(os.getpid())
@@ -46,13 +306,10 @@ class PerformanceMonitor:
         }
 
     def get_summary(self):
-        if not self.measurements:
+        if not self.operations:
             return "Измерения не проводились"
 
-        total_time = sum(
-            sum(m['time'] for m in measurements)
-            for measurements in self.measurements.values()
-        )
+        total_time = self.get_total_time()
 
         current_memory = psutil.Process(os.getpid()).memory_info().rss / 1024 / 1024
 
@@ -81,60 +338,41 @@ class PerformanceMonitor:
             'timestamp': time.time()
         }
 
-    def measure_with_memory(self, operation_name: str):
-        return self.MemoryMeasurementContext(self, operation_name)
-
-    class MemoryMeasurementContext:
-        def __init__(self, monitor, name):
-            self.monitor = monitor
-            self.name = name
-            self.memory_before = 0
-            self.memory_after = 0
-
-        def __enter__(self):
-            gc.collect()  # Принудительная сборка мусора для точности
-            self.start_time = time.time()
-            process = psutil.Process(os.getpid())
-            self.memory_before = process.memory_info().rss / 1024 / 1024
-            return self
-
-        def __exit__(self, exc_type, exc_val, exc_tb):
-            execution_time = time.time() - self.start_time
-            gc.collect()
-            process = psutil.Process(os.getpid())
-            self.memory_after = process.memory_info().rss / 1024 / 1024
-            memory_delta = self.memory_after - self.memory_before
-
-            if self.name not in self.monitor.measurements:
-                self.monitor.measurements[self.name] = []
-
-            self.monitor.measurements[self.name].append({
-                'time': execution_time,
-                'memory_before_mb': self.memory_before,
-                'memory_after_mb': self.memory_after,
-                'memory_delta_mb': memory_delta,
-                'timestamp': time.time()
-            })
-
     def get_eeg_memory_usage(self) -> Dict[str, float]:
         return {name: info['memory_mb'] for name, info in self.tracked_objects.items()}
 
+    def _format_operation(self, name, stats, indent=""):
+        percentiles = stats.percentiles()
+        return (f"{indent}{name}: {stats.total_time:.3f}с (среднее: {stats.mean_time:.3f}с, "
+                f"p50: {percentiles['p50']:.3f}с, p95: {percentiles['p95']:.3f}с, "
+                f"p99: {percentiles['p99']:.3f}с, вызовов: {stats.count})")
+
     def get_detailed_summary(self) -> str:
-        if not self.measurements and not self.tracked_objects:
+        if not self.operations and not self.tracked_objects:
             return "Измерения не проводились"
 
         summary = []
 
-        # Время выполнения операций
-        if self.measurements:
+        with self._lock:
+            operations = dict(self.operations)
+            children = {name: sorted(names) for name, names in self.children.items()}
+
+        # Время выполнения операций (вложенные операции - с отступом под родителем)
+        if operations:
             summary.append("=== ВРЕМЯ ВЫПОЛНЕНИЯ ===")
-            total_time = 0
-            for op_name, measurements in self.measurements.items():
-                op_time = sum(m['time'] for m in measurements)
-                total_time += op_time
-                avg_time = op_time / len(measurements)
-                summary.append(f"{op_name}: {op_time:.3f}с (среднее: {avg_time:.3f}с, вызовов: {len(measurements)})")
-            summary.append(f"Общее время: {total_time:.3f}с")
+            nested = set().union(*children.values()) if children else set()
+
+            def add_operation(name, depth, visited):
+                summary.append(self._format_operation(name, operations[name], "  " * depth + ("└ " if depth else "")))
+                for child in children.get(name, []):
+                    if child in operations and child not in visited:
+                        add_operation(child, depth + 1, visited | {child})
+
+            for op_name in operations:
+                if op_name not in nested:
+                    add_operation(op_name, 0, {op_name})
+
+            summary.append(f"Общее время: {self.get_total_time():.3f}с")
             summary.append("")
 
         # Использование памяти EEG объектами
@@ -148,16 +386,13 @@ class PerformanceMonitor:
             summary.append(f"Общая память EEG данных: {total_eeg_memory:.2f} МБ")
             summary.append("")
 
-        # Изменения памяти по операциям
-        memory_ops = {name: measurements for name, measurements in self.measurements.items()
-                      if any('memory_delta_mb' in m for m in measurements)}
+        # Изменения памяти по операциям (только при включенном сэмплировании)
+        memory_ops = {name: stats for name, stats in operations.items() if stats.memory_samples}
         if memory_ops:
-            summary.append("=== ИЗМЕНЕНИЯ ПАМЯТИ ПО ОПЕРАЦИЯМ ===")
-            for op_name, measurements in memory_ops.items():
-                memory_deltas = [m.get('memory_delta_mb', 0) for m in measurements]
-                total_delta = sum(memory_deltas)
-                avg_delta = total_delta / len(memory_deltas)
-                summary.append(f"{op_name}: {total_delta:+.2f} МБ (среднее: {avg_delta:+.2f} МБ)")
+            summary.append("=== ИЗМЕНЕНИЯ ПАМЯТИ ПО ОПЕРАЦИЯМ (tracemalloc) ===")
+            for op_name, stats in memory_ops.items():
+                avg_delta = stats.total_memory_delta_mb / stats.memory_samples
+                summary.append(f"{op_name}: {stats.total_memory_delta_mb:+.2f} МБ (среднее: {avg_delta:+.2f} МБ)")
 
         # Общая информация о системе
         current_memory = psutil.Process(os.getpid()).memory_info().rss / 1024 / 1024
@@ -166,7 +401,11 @@ class PerformanceMonitor:
         return "\n".join(summary)
 
     def clear_tracking(self):
-        self.measurements.clear()
+        with self._lock:
+            self.operations.clear()
+            self.children.clear()
+            self.spans.clear()
+            self.root_time_ns = 0
         self.tracked_objects.clear()
         self.memory_snapshots.clear()
 
@@ -196,17 +435,18 @@ class PerformanceMonitor:
             "Анализ тета-ритма"
         ]
 
-        if not self.measurements:
+        if not self.operations:
             return "Анализ ритмов не проводился"
 
         summary = []
         summary.append("")
 
         # Фильтруем только операции анализа ритмов
-        rhythm_measurements = {}
-        for op_name, measurements in self.measurements.items():
-            if any(rhythm_op.lower() in op_name.lower() for rhythm_op in rhythm_operations):
-                rhythm_measurements[op_name] = measurements
+        with self._lock:
+            rhythm_measurements = {
+                op_name: stats for op_name, stats in self.operations.items()
+                if any(rhythm_op.lower() in op_name.lower() for rhythm_op in rhythm_operations)
+            }
 
         if not rhythm_measurements:
             return "Операции анализа ритмов не найдены"
@@ -214,42 +454,32 @@ class PerformanceMonitor:
         # Время выполнения анализа ритмов
         summary.append("ВРЕМЯ ВЫПОЛНЕНИЯ:")
         total_rhythm_time = 0
-        for op_name, measurements in rhythm_measurements.items():
-            op_time = sum(m['time'] for m in measurements)
-            total_rhythm_time += op_time
-            avg_time = op_time / len(measurements)
-            summary.append(f"• {op_name}: {op_time:.3f}с (среднее: {avg_time:.3f}с)")
+        for op_name, stats in rhythm_measurements.items():
+            total_rhythm_time += stats.total_time
+            summary.append(self._format_operation(op_name, stats, "• "))
 
         summary.append(f"• Общее время анализа ритмов: {total_rhythm_time:.3f}с")
         summary.append("")
 
         # Использование памяти при анализе ритмов
-        memory_ops = {name: measurements for name, measurements in rhythm_measurements.items()
-                      if any('memory_delta_mb' in m for m in measurements)}
+        memory_ops = {name: stats for name, stats in rhythm_measurements.items() if stats.memory_samples}
 
         if memory_ops:
-            summary.append("ИСПОЛЬЗОВАНИЕ ПАМЯТИ:")
+            summary.append("ИСПОЛЬЗОВАНИЕ ПАМЯТИ (tracemalloc):")
             total_memory_delta = 0
             max_memory_usage = 0
 
-            for op_name, measurements in memory_ops.items():
-                memory_deltas = [m.get('memory_delta_mb', 0) for m in measurements]
-                memory_peaks = [m.get('memory_after_mb', 0) for m in measurements]
-
-                total_delta = sum(memory_deltas)
-                avg_delta = total_delta / len(memory_deltas)
-                max_peak = max(memory_peaks) if memory_peaks else 0
-
-                total_memory_delta += total_delta
-                max_memory_usage = max(max_memory_usage, max_peak)
+            for op_name, stats in memory_ops.items():
+                total_memory_delta += stats.total_memory_delta_mb
+                max_memory_usage = max(max_memory_usage, stats.peak_memory_mb)
 
-                summary.append(f"• {op_name}: {total_delta:.2f} МБ (пик: {max_peak:.1f} МБ)")
+                summary.append(f"• {op_name}: {stats.total_memory_delta_mb:.2f} МБ (пик: {stats.peak_memory_mb:.1f} МБ)")
 
             summary.append(f"• Общее изменение памяти: {total_memory_delta:.2f} МБ")
-            summary.append(f"• Общее использование: {max_memory_usage:.1f} МБ")
+            summary.append(f"• Пиковое использование: {max_memory_usage:.1f} МБ")
         else:
             summary.append("ИСПОЛЬЗОВАНИЕ ПАМЯТИ:")
-            summary.append("• Детальные данные о памяти недоступны")
+            summary.append("• Сэмплирование памяти выключено")
 
             # Показываем общую информацию о памяти
             current_memory = psutil.Process(os.getpid()).memory_info().rss / 1024 / 1024
@@ -258,7 +488,7 @@ class PerformanceMonitor:
         summary.append("")
         summary.append("СТАТИСТИКА:")
         summary.append(f"• Количество операций анализа: {len(rhythm_measurements)}")
-        summary.append(f"• Общее количество вызовов: {sum(len(m) for m in rhythm_measurements.values())}")
+        summary.append(f"• Общее количество вызовов: {sum(stats.count for stats in rhythm_measurements.values())}")
 
         if total_rhythm_time > 0:
             summary.append(f"• Средняя скорость анализа: {1 / total_rhythm_time:.2f} операций/сек")
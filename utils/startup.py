@@ -0,0 +1,104 @@
+"""
+Замер времени запуска приложения: этапы до первого окна и отложенные импорты.
+
+Подробная разбивка по модулям строится запуском `python -X importtime` в отдельном
+процессе, поэтому не влияет на замер текущего запуска.
+"""
+
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import OrderedDict
+
+import psutil
+
+from utils.lazy_import import LAZY_LOAD_TIMES
+
+# Строка вывода -X importtime: "import time: <собственное, мкс> | <с вложенными, мкс> | <отступ><модуль>"
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)')
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class StartupTimer:
+    """Этапы запуска: каждый mark() закрывает этап, начатый предыдущей отметкой"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self._last = self.start
+        self.phases = OrderedDict()
+        try:
+            # Время от создания процесса до импорта этого модуля (запуск интерпретатора, site)
+            self.interpreter_time = max(0.0, time.time() - psutil.Process().create_time())
+        except Exception:
+            self.interpreter_time = 0.0
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.phases[name] = now - self._last
+        self._last = now
+        return self.phases[name]
+
+    @property
+    def total_time(self):
+        return self.interpreter_time + (self._last - self.start)
+
+    def report(self):
+        lines = ["ВРЕМЯ ЗАПУСКА", "-" * 48]
+        lines.append(f"{'Запуск интерпретатора':<36}{self.interpreter_time:>10.3f} с")
+        for name, duration in self.phases.items():
+            lines.append(f"{name:<36}{duration:>10.3f} с")
+        lines.append("-" * 48)
+        lines.append(f"{'Итого до первого окна':<36}{self.total_time:>10.3f} с")
+
+        lines.append("")
+        lines.append("ОТЛОЖЕННЫЕ ИМПОРТЫ (загружены при первом использовании)")
+        lines.append("-" * 48)
+        if LAZY_LOAD_TIMES:
+            for name, duration in LAZY_LOAD_TIMES.items():
+                lines.append(f"{name:<36}{duration:>10.3f} с")
+        else:
+            lines.append("Пока не загружались")
+        return "\n".join(lines)
+
+
+def parse_importtime(output):
+    """Разбор вывода -X importtime: список (модуль, собственное время, с вложенными, глубина) в секундах"""
+    rows = []
+    for line in output.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append({
+                'module': name,
+                'self': int(self_us) / 1e6,
+                'cumulative': int(cumulative_us) / 1e6,
+                'depth': len(indent) // 2
+            })
+    return rows
+
+
+def import_breakdown(module='main', limit=25, timeout=60):
+    """Самые дорогие импорты модуля в чистом процессе (как `python -X importtime -c "import module"`)"""
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=timeout)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Не удалось импортировать {module}: {completed.stderr.strip().splitlines()[-1:]}")
+
+    rows = parse_importtime(completed.stderr)
+    return sorted(rows, key=lambda row: row['cumulative'], reverse=True)[:limit]
+
+
+def format_import_breakdown(rows):
+    lines = [f"{'Модуль':<48}{'собств., с':>12}{'всего, с':>12}", "-" * 72]
+    for row in rows:
+        name = '  ' * row['depth'] + row['module']
+        lines.append(f"{name:<48}{row['self']:>12.3f}{row['cumulative']:>12.3f}")
+    return "\n".join(lines)
+
+
+# Таймер текущего процесса; отметки ставит main.py
+startup_timer = StartupTimer()
@@ -17,13 +17,15 @@ class ValidationThread(QThread):
     result_signal = pyqtSignal(dict)
     error_signal = pyqtSignal(str)
 
-    def __init__(self, validator, data, sampling_rate, channel_names, our_filtered):
+    def __init__(self, validator, data, sampling_rate, channel_names, our_filtered, processing_params=None):
         super().__init__()
         self.validator = validator
         self.data = data
         self.sampling_rate = sampling_rate
         self.channel_names = channel_names
         self.our_filtered = our_filtered
+        # Параметры пользовательской обработки - MNE фильтрует с той же полосой и notch
+        self.processing_params = processing_params
 
     def run(self):
         try:
@@ -33,7 +35,8 @@ class ValidationThread(QThread):
             mne_result = self.validator.compare_with_mne(
                 self.data,
                 self.sampling_rate,
-                self.channel_names
+                self.channel_names,
+                processing_params=self.processing_params
             )
 
             if not mne_result['available']:
@@ -48,6 +51,15 @@ class ValidationThread(QThread):
                 mne_result['mne_data']
             )
 
+            # Сравниваем спектры (PSD MNE берется из кеша валидатора при повторе)
+            psd_comparison = self.validator.validate_psd(
+                self.data,
+                self.our_filtered,
+                self.sampling_rate,
+                self.channel_names,
+                processing_params=self.processing_params
+            )
+
             self.progress_signal.emit(80)
 
             # Генерируем отчёт
@@ -55,13 +67,18 @@ class ValidationThread(QThread):
                 self.data,
                 mne_result['mne_data'],
                 self.our_filtered,
-                mne_result['mne_data']
+                mne_result['mne_data'],
+                filter_comparison=comparison,
+                psd_comparison=psd_comparison,
+                filter_params=mne_result['filter_params']
             )
 
             self.progress_signal.emit(100)
 
             result = {
                 'comparison': comparison,
+                'psd_comparison': psd_comparison,
+                'filter_params': mne_result['filter_params'],
                 'report': report,
                 'mne_data': mne_result['mne_data'],
                 'our_data': self.our_filtered
@@ -140,6 +157,11 @@ class ValidationDialog(QDialog):
         lines.append("=" * 34)
         lines.append(f"Каналов (показано): {len(channels)}")
         lines.append(f"Fs: {self.sampling_rate} Hz")
+        filter_params = result.get("filter_params")
+        if filter_params:
+            notch = filter_params.get("notch_freq")
+            lines.append(f"Фильтр MNE: {filter_params['low_freq']:.2f}-{filter_params['high_freq']:.2f} Hz, "
+                         f"notch: {f'{notch:.1f} Hz' if notch else 'нет'}")
         lines.append("")
         lines.append("СВОДКА")
         lines.append("-" * 34)
@@ -149,6 +171,10 @@ class ValidationDialog(QDialog):
         lines.append(f"Средний MAE:        {avg(mae):.6f}")
         lines.append(f"Средний NRMSE:      {avg_nrmse:.2f} %")
         lines.append("")
+        psd = result.get("psd_comparison")
+        if psd:
+            lines.append(f"PSD: корреляция {psd['correlation']:.4f}, RMSE {psd['rmse']:.6g}")
+            lines.append("")
         lines.append("ИТОГ")
         lines.append("-" * 34)
         lines.append(verdict(avg_corr, avg_nrmse))
@@ -184,13 +210,15 @@ class ValidationDialog(QDialog):
 
         return "\n".join(lines)
 
-    def __init__(self, validator, data, sampling_rate, channel_names, our_filtered, parent=None):
+    def __init__(self, validator, data, sampling_rate, channel_names, our_filtered, parent=None,
+                 processing_params=None):
         super().__init__(parent)
         self.validator = validator
         self.data = data
         self.sampling_rate = sampling_rate
         self.channel_names = channel_names
         self.our_filtered = our_filtered
+        self.processing_params = processing_params
         self.validation_result = None
 
         self.initUI()
@@ -400,7 +428,8 @@ class ValidationDialog(QDialog):
             self.data,
             self.sampling_rate,
             self.channel_names,
-            self.our_filtered
+            self.our_filtered,
+            processing_params=self.processing_params
         )
 
         self.validation_thread.progress_signal.connect(self.update_progress)
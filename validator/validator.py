@@ -1,37 +1,162 @@
-import mne
+import os
+from collections import OrderedDict
+
 import numpy as np
-from scipy.stats import pearsonr
+
+from preprocessor.preprocessor import DEFAULT_PROCESSING_PARAMS, EEGPreprocessor
+from utils.filter_design import filter_design_cache
+from utils.lazy_import import is_available, lazy_import
+
+signal = lazy_import('scipy.signal')
+stats = lazy_import('scipy.stats')
+
+# MNE загружается при первой валидации; без него валидация сообщает о недоступности
+MNE_AVAILABLE = is_available('mne')
+mne = lazy_import('mne') if MNE_AVAILABLE else None
+
+# Фильтрация MNE распараллеливается по каналам начиная с этого числа каналов
+# (для нескольких каналов запуск пула joblib дороже самой фильтрации)
+MNE_PARALLEL_MIN_CHANNELS = 16
+
+# Сколько элементов (каналы x отсчеты) обрабатывать за раз при расчете метрик
+METRICS_BLOCK_ELEMENTS = 1 << 22
+
+# Параметры спектра для сравнения PSD (метод Уэлча, как в MNE по умолчанию)
+PSD_FMIN = 0.5
+PSD_FMAX = 50.0
+PSD_N_FFT = 256
+
+# Сколько результатов MNE (фильтрация, PSD) хранить для повторных валидаций
+MNE_CACHE_SIZE = 8
+
+
+def welch_psd(data, sampling_rate, fmin=PSD_FMIN, fmax=PSD_FMAX, n_fft=PSD_N_FFT):
+    """PSD методом Уэлча с теми же параметрами, что Raw.compute_psd в MNE
+    (окно Хэмминга, сегменты n_fft без перекрытия, удаление среднего сегмента)"""
+    n_fft = min(n_fft, np.shape(data)[-1])
+    freqs, psd = signal.welch(data, fs=sampling_rate, window='hamming', nperseg=n_fft,
+                              noverlap=0, detrend='constant', scaling='density', axis=-1)
+    band = (freqs >= fmin) & (freqs <= fmax)
+    return psd[..., band], freqs[band]
+
+
+def filtering_metrics(our_filtered, mne_filtered):
+    """Метрики сравнения сразу для всех каналов: массивы длиной n_channels.
+
+    Каналы обрабатываются блоками по METRICS_BLOCK_ELEMENTS элементов, чтобы
+    временные массивы не росли с длиной записи.
+    """
+    our_filtered = np.atleast_2d(our_filtered)
+    mne_filtered = np.atleast_2d(mne_filtered)
+    n_channels, n_samples = our_filtered.shape
+
+    sums = {key: np.empty(n_channels) for key in ('ss_res', 'ss_tot', 'ss_our', 'cross', 'abs_err', 'range')}
+    block = max(1, METRICS_BLOCK_ELEMENTS // max(n_samples, 1))
+
+    for start in range(0, n_channels, block):
+        rows = slice(start, start + block)
+        our = np.asarray(our_filtered[rows], dtype=float)
+        ref = np.asarray(mne_filtered[rows], dtype=float)
+
+        diff = our - ref
+        sums['ss_res'][rows] = np.einsum('ij,ij->i', diff, diff)
+        sums['abs_err'][rows] = np.abs(diff).sum(axis=1)
+        sums['range'][rows] = np.ptp(ref, axis=1)
+
+        our_c = our - our.mean(axis=1, keepdims=True)
+        ref_c = ref - ref.mean(axis=1, keepdims=True)
+        sums['ss_tot'][rows] = np.einsum('ij,ij->i', ref_c, ref_c)
+        sums['ss_our'][rows] = np.einsum('ij,ij->i', our_c, our_c)
+        sums['cross'][rows] = np.einsum('ij,ij->i', our_c, ref_c)
+
+    rmse = np.sqrt(sums['ss_res'] / n_samples)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Корреляция Пирсона; для постоянного сигнала не определена (nan), как в pearsonr
+        correlation = np.clip(sums['cross'] / np.sqrt(sums['ss_our'] * sums['ss_tot']), -1.0, 1.0)
+        nrmse = np.where(sums['range'] > 0, rmse / sums['range'] * 100, 0.0)
+        r_squared = np.where(sums['ss_tot'] > 0, 1 - sums['ss_res'] / sums['ss_tot'], 0.0)
+
+    # p-value двустороннего теста, то же распределение, что в scipy.stats.pearsonr
+    ab = n_samples / 2 - 1
+    p_value = 2 * stats.beta.sf(np.abs(correlation), ab, ab, loc=-1, scale=2)
+
+    return {
+        'correlation': correlation,
+        'p_value': p_value,
+        'rmse': rmse,
+        'mae': sums['abs_err'] / n_samples,
+        'nrmse': nrmse,
+        'r_squared': r_squared
+    }
 
 
 class EEGValidator:
 
-    def __init__(self):
+    def __init__(self, n_jobs=None):
         self.comparison_results = {}
+        self.mne_available = MNE_AVAILABLE
+        # Число процессов фильтрации MNE (по умолчанию - все ядра)
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        # Raw последней записи: (отпечаток, Raw) - один объект MNE на запись
+        self._raw = (None, None)
+        # Отпечаток последней записи: (массив, форма/тип/частота, отпечаток)
+        self._fingerprint = (None, None, None)
+        # Результаты MNE по (отпечаток записи, операция, параметры)
+        self._mne_cache = OrderedDict()
+
+    @staticmethod
+    def mne_filter_params(sampling_rate, processing_params=None):
+        """Полоса и notch, с которыми фильтрует пользовательский конвейер (после автокоррекции)"""
+        params = dict(DEFAULT_PROCESSING_PARAMS, **(processing_params or {}))
+        bandpass = filter_design_cache.get_design('bandpass', (params['low_freq'], params['high_freq']), sampling_rate, 4)
+        notch = filter_design_cache.get_design('notch', params['notch_freq'], sampling_rate, 30)
 
-    def compare_with_mne(self, data, sampling_rate, channel_names=None):
-        try:
-            # Создаём MNE Raw объект
-            if channel_names is None:
-                channel_names = [f'Ch{i + 1}' for i in range(data.shape[0])]
+        return {
+            'low_freq': float(bandpass.params[0]),
+            'high_freq': float(bandpass.params[1]),
+            'notch_freq': float(notch.params[0]) if notch.params[0] > 0 else None
+        }
+
+    def get_raw(self, data, sampling_rate, channel_names=None):
+        """MNE Raw для записи; для той же записи возвращается тот же объект.
 
-            info = mne.create_info(
-                ch_names=channel_names,
-                sfreq=sampling_rate,
-                ch_types='eeg'
-            )
+        Данные float64 не копируются - Raw ссылается на исходный массив,
+        поэтому его нельзя менять на месте (фильтрация идет по копии).
+        """
+        key = self._recording_key(data, sampling_rate, channel_names)
+        if self._raw[0] == key:
+            return self._raw[1]
 
-            raw = mne.io.RawArray(data, info, verbose=False)
+        if channel_names is None:
+            channel_names = [f'Ch{i + 1}' for i in range(data.shape[0])]
 
-            # Применяем фильтрацию MNE
-            raw_filtered = raw.copy()
-            raw_filtered.filter(l_freq=1.0, h_freq=40.0, verbose=False)
+        info = mne.create_info(
+            ch_names=list(channel_names),
+            sfreq=sampling_rate,
+            ch_types='eeg'
+        )
 
-            mne_filtered_data = raw_filtered.get_data()
+        raw = mne.io.RawArray(np.asarray(data, dtype=float), info, copy='auto', verbose=False)
+        self._raw = (key, raw)
+        return raw
+
+    def compare_with_mne(self, data, sampling_rate, channel_names=None, processing_params=None):
+        if not self.mne_available:
+            return {
+                'available': False,
+                'message': 'MNE-Python не установлен'
+            }
+
+        try:
+            filter_params = self.mne_filter_params(sampling_rate, processing_params)
+            mne_filtered_data = self._filtered_raw(data, sampling_rate, channel_names, filter_params).get_data()
 
             return {
                 'available': True,
                 'mne_data': mne_filtered_data,
                 'original_data': data,
+                'filter_params': filter_params,
                 'message': 'Данные обработаны с помощью MNE-Python'
             }
 
@@ -41,66 +166,82 @@ class EEGValidator:
                 'message': f'Ошибка при работе с MNE: {str(e)}'
             }
 
+    def _filtered_raw(self, data, sampling_rate, channel_names, filter_params):
+        # Применяем фильтрацию MNE с полосой и notch пользовательского конвейера
+        key = (self._recording_key(data, sampling_rate, channel_names), 'filter',
+               tuple(sorted(filter_params.items())))
+
+        def compute():
+            raw_filtered = self.get_raw(data, sampling_rate, channel_names).copy()
+            n_jobs = self.n_jobs if data.shape[0] >= MNE_PARALLEL_MIN_CHANNELS else 1
+            raw_filtered.filter(l_freq=filter_params['low_freq'], h_freq=filter_params['high_freq'],
+                                n_jobs=n_jobs, verbose=False)
+            if filter_params['notch_freq']:
+                raw_filtered.notch_filter(filter_params['notch_freq'], n_jobs=n_jobs, verbose=False)
+            return raw_filtered
+
+        return self._cached(key, compute)
+
+    def _cached(self, key, compute):
+        if key in self._mne_cache:
+            self._mne_cache.move_to_end(key)
+            return self._mne_cache[key]
+
+        value = compute()
+        self._mne_cache[key] = value
+        while len(self._mne_cache) > MNE_CACHE_SIZE:
+            self._mne_cache.popitem(last=False)
+        return value
+
+    def clear_cache(self):
+        self._raw = (None, None)
+        self._fingerprint = (None, None, None)
+        self._mne_cache.clear()
+
+    def _recording_key(self, data, sampling_rate, channel_names):
+        return (self._data_fingerprint(data, sampling_rate),
+                tuple(channel_names) if channel_names is not None else None)
+
+    def _data_fingerprint(self, data, sampling_rate):
+        # Хеш всей записи дорогой (около секунды на сотни МБ), а за одну валидацию ключ
+        # нужен несколько раз. Для того же объекта массива отпечаток берется из памяти:
+        # массивы сравниваются по объекту, как в ComputeGraph, запись на месте не меняется
+        held, meta, fingerprint = self._fingerprint
+        current = (np.shape(data), np.asarray(data).dtype.str, float(sampling_rate))
+        if held is data and meta == current:
+            return fingerprint
+
+        fingerprint = EEGPreprocessor._recording_fingerprint(data, sampling_rate)
+        self._fingerprint = (data, current, fingerprint)
+        return fingerprint
+
     def compare_filtering(self, our_filtered, mne_filtered):
         if our_filtered.shape != mne_filtered.shape:
             return {
                 'error': 'Размеры данных не совпадают'
             }
 
+        metrics = filtering_metrics(our_filtered, mne_filtered)
         results = {
-            'channels': []
+            'channels': [
+                {'channel': ch_idx, **{key: float(values[ch_idx]) for key, values in metrics.items()}}
+                for ch_idx in range(our_filtered.shape[0])
+            ]
         }
 
-        for ch_idx in range(our_filtered.shape[0]):
-            our_ch = our_filtered[ch_idx]
-            mne_ch = mne_filtered[ch_idx]
-
-            # Корреляция
-            correlation, p_value = pearsonr(our_ch, mne_ch)
-
-            # Среднеквадратичная ошибка
-            mse = np.mean((our_ch - mne_ch) ** 2)
-            rmse = np.sqrt(mse)
-
-            # Средняя абсолютная ошибка
-            mae = np.mean(np.abs(our_ch - mne_ch))
-
-            # Нормализованная относительная ошибка (NRMSE)
-            # Нормализуем по диапазону сигнала MNE
-            signal_range = np.max(mne_ch) - np.min(mne_ch)
-            if signal_range > 0:
-                nrmse = (rmse / signal_range) * 100
-            else:
-                nrmse = 0
-
-            # Коэффициент детерминации (R²)
-            ss_res = np.sum((mne_ch - our_ch) ** 2)
-            ss_tot = np.sum((mne_ch - np.mean(mne_ch)) ** 2)
-            r_squared = 1 - (ss_res / ss_tot) if ss_tot > 0 else 0
-
-            results['channels'].append({
-                'channel': ch_idx,
-                'correlation': correlation,
-                'p_value': p_value,
-                'rmse': rmse,
-                'mae': mae,
-                'nrmse': nrmse,
-                'r_squared': r_squared
-            })
-
         # Общая статистика
         results['summary'] = {
-            'mean_correlation': np.mean([ch['correlation'] for ch in results['channels']]),
-            'mean_rmse': np.mean([ch['rmse'] for ch in results['channels']]),
-            'mean_mae': np.mean([ch['mae'] for ch in results['channels']]),
-            'mean_nrmse': np.mean([ch['nrmse'] for ch in results['channels']]),
-            'mean_r_squared': np.mean([ch['r_squared'] for ch in results['channels']])
+            'mean_correlation': float(np.mean(metrics['correlation'])),
+            'mean_rmse': float(np.mean(metrics['rmse'])),
+            'mean_mae': float(np.mean(metrics['mae'])),
+            'mean_nrmse': float(np.mean(metrics['nrmse'])),
+            'mean_r_squared': float(np.mean(metrics['r_squared']))
         }
 
         return results
 
     def compare_psd(self, our_psd, mne_psd, freqs):
-        correlation, _ = pearsonr(our_psd.flatten(), mne_psd.flatten())
+        correlation, _ = stats.pearsonr(our_psd.flatten(), mne_psd.flatten())
 
         mse = np.mean((our_psd - mne_psd) ** 2)
         rmse = np.sqrt(mse)
@@ -137,18 +278,24 @@ class EEGValidator:
 
         return results
 
-    def generate_comparison_report(self, our_data, mne_data, our_filtered, mne_filtered):
+    def generate_comparison_report(self, our_data, mne_data, our_filtered, mne_filtered,
+                                   filter_comparison=None, psd_comparison=None, filter_params=None):
         report = []
         report.append("=" * 70)
         report.append("ОТЧЁТ СРАВНЕНИЯ С MNE-PYTHON")
         report.append("=" * 70)
         report.append("")
 
-        # Сравнение фильтрации
-        filter_comparison = self.compare_filtering(our_filtered, mne_filtered)
+        # Сравнение фильтрации (можно передать уже готовый результат compare_filtering)
+        if filter_comparison is None:
+            filter_comparison = self.compare_filtering(our_filtered, mne_filtered)
 
         report.append("СРАВНЕНИЕ ФИЛЬТРАЦИИ:")
         report.append("-" * 70)
+        if filter_params:
+            notch = filter_params.get('notch_freq')
+            report.append(f"Полоса MNE: {filter_params['low_freq']:.2f}-{filter_params['high_freq']:.2f} Гц, "
+                          f"notch: {f'{notch:.1f} Гц' if notch else 'нет'}")
         report.append(f"Средняя корреляция: {filter_comparison['summary']['mean_correlation']:.4f}")
         report.append(f"Средний R²: {filter_comparison['summary']['mean_r_squared']:.4f}")
         report.append(f"Средняя RMSE: {filter_comparison['summary']['mean_rmse']:.6f}")
@@ -156,6 +303,14 @@ class EEGValidator:
         report.append(f"Средняя NRMSE: {filter_comparison['summary']['mean_nrmse']:.2f}%")
         report.append("")
 
+        if psd_comparison:
+            report.append("СРАВНЕНИЕ PSD (метод Уэлча):")
+            report.append("-" * 70)
+            report.append(f"Корреляция: {psd_comparison['correlation']:.4f}")
+            report.append(f"RMSE: {psd_comparison['rmse']:.6g}")
+            report.append(f"Средняя разница: {psd_comparison['mean_diff']:.6g}")
+            report.append("")
+
         report.append("ПО КАНАЛАМ:")
         for ch_result in filter_comparison['channels']:
             report.append(f"Канал {ch_result['channel']}:")
@@ -166,27 +321,46 @@ class EEGValidator:
 
         return "\n".join(report)
 
-    def compute_mne_psd(self, data, sampling_rate, channel_names=None):
+    def compute_mne_psd(self, data, sampling_rate, channel_names=None, processing_params=None,
+                        fmin=PSD_FMIN, fmax=PSD_FMAX, n_fft=PSD_N_FFT):
+        """PSD методом Уэлча в MNE. При заданных processing_params - по данным,
+        отфильтрованным MNE с параметрами пользовательского конвейера"""
         if not self.mne_available:
             return None
 
         try:
-            import mne
-
-            if channel_names is None:
-                channel_names = [f'Ch{i + 1}' for i in range(data.shape[0])]
-
-            info = mne.create_info(
-                ch_names=channel_names,
-                sfreq=sampling_rate,
-                ch_types='eeg'
-            )
+            if processing_params is None:
+                raw = self.get_raw(data, sampling_rate, channel_names)
+                source = None
+            else:
+                filter_params = self.mne_filter_params(sampling_rate, processing_params)
+                raw = self._filtered_raw(data, sampling_rate, channel_names, filter_params)
+                source = tuple(sorted(filter_params.items()))
 
-            raw = mne.io.RawArray(data, info, verbose=False)
-            psd, freqs = raw.compute_psd(fmin=0.5, fmax=50, verbose=False).get_data(return_freqs=True)
+            key = (self._recording_key(data, sampling_rate, channel_names), 'psd', source, fmin, fmax, n_fft)
+            n_fft = min(n_fft, data.shape[1])
 
-            return psd, freqs
+            return self._cached(key, lambda: raw.compute_psd(
+                method='welch', fmin=fmin, fmax=fmax, n_fft=n_fft, verbose=False).get_data(return_freqs=True))
 
         except Exception as e:
             print(f"Ошибка вычисления PSD с MNE: {e}")
             return None
+
+    def validate_psd(self, data, our_filtered, sampling_rate, channel_names=None, processing_params=None):
+        """Сравнение PSD нашей обработки и MNE на одной сетке частот (одинаковый метод Уэлча)"""
+        mne_result = self.compute_mne_psd(data, sampling_rate, channel_names, processing_params)
+        if mne_result is None:
+            return None
+
+        mne_psd, freqs = mne_result
+        our_psd, our_freqs = welch_psd(our_filtered, sampling_rate)
+        if not np.allclose(freqs, our_freqs):
+            raise ValueError("Сетки частот PSD не совпадают")
+
+        return {
+            'freqs': freqs,
+            'our_psd': our_psd,
+            'mne_psd': mne_psd,
+            **self.compare_psd(our_psd, mne_psd, freqs)
+        }